@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -49,16 +50,71 @@ INSTALLED_APPS = [
     'main.users',
     'main.categories',
     'main.accounts',
-    'main.transactions'
+    'main.transactions',
+    'main.recurring',
+    'main.budgets',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ('django_filters.rest_framework.DjangoFilterBackend',),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ),
 }
 
+# Users of the auth tokens kept in memory by each worker, see
+# core.authentication. Set TOKEN_CACHE_SHARED to the alias of a cache in
+# CACHES to also share them, and their revocations, between workers
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_SHARED = None
+TOKEN_CACHE_SHARED_TTL = 300
+
+# Payloads of the reference viewsets (account types), see core.reference.
+# With the default cache of each worker, a change made through one worker
+# reaches the others within REFERENCE_VERSION_TTL seconds. Set
+# REFERENCE_CACHE to the alias of a cache in CACHES shared by the workers
+# to make it immediate
+REFERENCE_CACHE = 'default'
+REFERENCE_CACHE_TTL = 60
+REFERENCE_VERSION_TTL = 60
+REFERENCE_CACHE_SHARED_TTL = 24 * 60 * 60
+REFERENCE_MAX_AGE = 60 * 60
+
+# Currency of the accounts created without one, and currency the rates
+# of core.ExchangeRate are quoted against, see core.currencies
+DEFAULT_CURRENCY = 'USD'
+EXCHANGE_RATE_BASE = 'EUR'
+
+# cProfile dumps of the requests, see core.middleware.PerformanceMiddleware
+PERFORMANCE_PROFILE_RATE = 0
+PERFORMANCE_PROFILE_SLOW_MS = None
+PERFORMANCE_PROFILE_DIR = '/tmp/profiles'
+
+# Prometheus metrics served on /metrics, see core.metrics. Each worker
+# writes its own file in METRICS_DIR, the test runs use a temporary one
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'app-metrics')
+METRICS_FLUSH_INTERVAL = 1
+TEST_RUNNER = 'core.runner.TestRunner'
+
+# One JSON line per request with its timings at INFO, off by default, so
+# neither the workers nor the tests print a line per request. Set
+# PERFORMANCE_LOG_LEVEL=INFO to log them
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 DJOSER = {
     'SERIALIZERS': {
         'current_user': 'main.users.serializers.UserSerializer',
@@ -75,6 +131,7 @@ DJOSER = {
 # ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -16,6 +16,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('main.users.urls')),
@@ -24,4 +26,7 @@ urlpatterns = [
     path('api/accounts/', include('main.accounts.urls')),
     path('api/categories/', include('main.categories.urls')),
     path('api/transactions/', include('main.transactions.urls')),
+    path('api/recurring/', include('main.recurring.urls')),
+    path('api/budgets/', include('main.budgets.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
@@ -1,8 +1,16 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections, transaction as db_transaction
+from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
 
 from core import models
+from core.balances import apply_balance_deltas, compute_balances, \
+    subtract_balances
+from core.ledger import get_transaction_entries, get_transaction_entry, \
+    record_transactions
+from core.versions import bump_data_version
 
 
 class UserAdmin(BaseUserAdmin):
@@ -29,8 +37,166 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class EstimatedCountPaginator(Paginator):
+    # An unfiltered changelist of a big table is counted with the row
+    # estimate of the Postgres statistics instead of a COUNT(*) that scans
+    # the whole table. Filtered lists and small tables are counted exactly
+    estimate_threshold = 100000
+
+    @cached_property
+    def count(self):
+        estimate = self.get_estimate()
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return estimate
+        return super().count
+
+    def get_estimate(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [query.model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    # Changelists of the tables with rows of every user
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class UserDataAdmin(LargeTableAdmin):
+    # Bumps the data version of the owners of the rows saved or deleted,
+    # as the API does, see core.versions
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_data_version(obj.user_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_data_version(obj.user_id)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        bump_data_version(*user_ids)
+
+
+class AccountAdmin(UserDataAdmin):
+    list_display = ['name', 'account_type', 'currency', 'user']
+    list_select_related = ['account_type', 'user']
+    raw_id_fields = ['user']
+    search_fields = ['name']
+    # Derived from the transactions, see core.balances
+    readonly_fields = ['balance', 'pending_balance']
+
+
+class TransactionCategoryAdmin(UserDataAdmin):
+    list_display = ['name', 'category_type', 'user']
+    list_select_related = ['user']
+    list_filter = ['category_type']
+    raw_id_fields = ['user']
+    search_fields = ['name']
+
+    def get_readonly_fields(self, request, obj=None):
+        # The type gives the sign of the transactions in the balances, it
+        # is changed through the API, which updates them
+        if obj is not None:
+            return ['category_type']
+        return []
+
+    @db_transaction.atomic
+    def delete_model(self, request, obj):
+        # Deleting a category deletes its transactions and their amounts
+        balances = compute_balances(
+            models.Transaction.objects.filter(category=obj))
+        super().delete_model(request, obj)
+        apply_balance_deltas(subtract_balances({}, balances))
+
+    @db_transaction.atomic
+    def delete_queryset(self, request, queryset):
+        balances = compute_balances(
+            models.Transaction.objects.filter(category__in=queryset))
+        super().delete_queryset(request, queryset)
+        apply_balance_deltas(subtract_balances({}, balances))
+
+
+class TransactionAdmin(LargeTableAdmin):
+    # The writes go through core.ledger like the ones of the API, so the
+    # balances, the daily rollups and the data versions follow them
+    list_display = ['id', 'transaction_date', 'description', 'amount',
+                    'currency', 'paid', 'category', 'account', 'user']
+    list_select_related = ['category', 'account', 'user']
+    # Uses the transaction_paid_date_idx index
+    list_filter = ['paid']
+    # Uses the transaction_date_id_idx index
+    date_hierarchy = 'transaction_date'
+    ordering = ['-transaction_date', '-id']
+    autocomplete_fields = ['category', 'account']
+    raw_id_fields = ['user', 'recurring']
+    # Follows the account, see Transaction.save
+    readonly_fields = ['currency']
+
+    @db_transaction.atomic
+    def save_model(self, request, obj, form, change):
+        removed = []
+        if change:
+            removed.append(get_transaction_entry(
+                models.Transaction.objects.select_related('category').get(
+                    pk=obj.pk)))
+        super().save_model(request, obj, form, change)
+        record_transactions(added=[get_transaction_entry(obj)],
+                            removed=removed)
+
+    @db_transaction.atomic
+    def delete_model(self, request, obj):
+        entry = get_transaction_entry(obj)
+        super().delete_model(request, obj)
+        record_transactions(removed=[entry])
+
+    @db_transaction.atomic
+    def delete_queryset(self, request, queryset):
+        entries = get_transaction_entries(list(queryset))
+        super().delete_queryset(request, queryset)
+        record_transactions(removed=entries)
+
+
+class RecurringTransactionAdmin(UserDataAdmin):
+    list_display = ['id', 'description', 'amount', 'rule', 'next_date',
+                    'category', 'account', 'user']
+    list_select_related = ['category', 'account', 'user']
+    ordering = ['-id']
+    autocomplete_fields = ['category', 'account']
+    raw_id_fields = ['user']
+    readonly_fields = ['materialized_until', 'next_date']
+
+
+class BudgetAdmin(UserDataAdmin):
+    list_display = ['category', 'start_month', 'amount', 'user']
+    list_select_related = ['category', 'user']
+    autocomplete_fields = ['category']
+    raw_id_fields = ['user']
+
+
+class ExchangeRateAdmin(LargeTableAdmin):
+    list_display = ['date', 'currency', 'rate']
+    list_filter = ['currency']
+    date_hierarchy = 'date'
+    ordering = ['-date', 'currency']
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.AccountType)
-admin.site.register(models.Account)
-admin.site.register(models.TransactionCategory)
-admin.site.register(models.Transaction)
+admin.site.register(models.Account, AccountAdmin)
+admin.site.register(models.TransactionCategory, TransactionCategoryAdmin)
+admin.site.register(models.Transaction, TransactionAdmin)
+admin.site.register(models.RecurringTransaction, RecurringTransactionAdmin)
+admin.site.register(models.Budget, BudgetAdmin)
+admin.site.register(models.ExchangeRate, ExchangeRateAdmin)
@@ -0,0 +1,84 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from core.caching import LRUCache
+
+TOKEN_CACHE_MAX_SIZE = getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000)
+TOKEN_CACHE_TTL = getattr(settings, 'TOKEN_CACHE_TTL', 60)
+# Alias of a Django cache shared by all the workers, None to disable it
+TOKEN_CACHE_SHARED = getattr(settings, 'TOKEN_CACHE_SHARED', None)
+TOKEN_CACHE_SHARED_TTL = getattr(settings, 'TOKEN_CACHE_SHARED_TTL', 300)
+# A revocation outlives every entry cached before it
+TOKEN_REVOCATION_TTL = max(TOKEN_CACHE_TTL, TOKEN_CACHE_SHARED_TTL)
+
+token_cache = LRUCache(TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL, 'token')
+
+
+def get_shared_cache():
+    if TOKEN_CACHE_SHARED is None:
+        return None
+    return caches[TOKEN_CACHE_SHARED]
+
+
+def get_cache_key(key, prefix='auth_credentials:'):
+    # The raw token is never used as a key of the shared cache
+    return prefix + hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_revocation_key(key):
+    return get_cache_key(key, 'auth_token_revoked:')
+
+
+def invalidate_token(key):
+    # Drops the cached user of the token in this worker and the shared
+    # cache, and records the time of the revocation in the shared cache:
+    # the other workers ignore the entries they cached before it
+    cache_key = get_cache_key(key)
+    token_cache.delete(cache_key)
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.set(get_revocation_key(key), time.time(),
+                         TOKEN_REVOCATION_TTL)
+        shared_cache.delete(cache_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    # Token authentication that keeps the user of each token in an
+    # in-process LRU, backed by an optional shared Django cache, so most
+    # requests don't query authtoken_token. Entries are dropped when the
+    # token is deleted or its user changes, see core.signals. With the
+    # shared cache every hit is checked against the revocations of the
+    # token, so the other workers stop using it at once too. Without it
+    # they keep it up to TOKEN_CACHE_TTL seconds
+
+    def authenticate_credentials(self, key):
+        cache_key = get_cache_key(key)
+        shared_cache = get_shared_cache()
+        entry = token_cache.get(cache_key)
+        if entry is None and shared_cache is not None:
+            entry = shared_cache.get(cache_key)
+            if entry is not None:
+                token_cache.set(cache_key, entry)
+        if entry is not None:
+            cached_at, credentials = entry
+            if shared_cache is None or not self.is_revoked(
+                    shared_cache, key, cached_at):
+                return credentials
+            token_cache.delete(cache_key)
+
+        # Before the query, a revocation committed while it runs is newer
+        cached_at = time.time()
+        credentials = super().authenticate_credentials(key)
+        entry = (cached_at, credentials)
+        token_cache.set(cache_key, entry)
+        if shared_cache is not None:
+            shared_cache.set(cache_key, entry, TOKEN_CACHE_SHARED_TTL)
+        return credentials
+
+    def is_revoked(self, shared_cache, key, cached_at):
+        revoked_at = shared_cache.get(get_revocation_key(key))
+        return revoked_at is not None and revoked_at >= cached_at
@@ -0,0 +1,202 @@
+import calendar
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+from core.models import Account, Transaction, TransactionDailyRollup, \
+    CATEGORY_TYPES
+
+ZERO_BALANCE = (Decimal(0), Decimal(0))
+CENT = Decimal('0.01')
+# Accounts per UPDATE when applying balance deltas
+BALANCE_CHUNK_SIZE = 200
+# Periods of the balance series, see get_period_ends
+SERIES_INTERVALS = ('day', 'week', 'month')
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def signed_amount(category_type, amount):
+    # Incomes add to the balance and expenses subtract from it
+    if category_type == CATEGORY_TYPES.INCOME.value:
+        return amount
+    return -amount
+
+
+def apply_balance_entries(added=(), removed=()):
+    # Adds and removes the entries (see core.ledger) from the stored
+    # balances of their accounts, so moving a transaction between accounts
+    # or categories is a single call
+    deltas = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    for sign, entries in ((1, added), (-1, removed)):
+        for entry in entries:
+            amount = sign * signed_amount(entry.category_type,
+                                          Decimal(entry.amount))
+            deltas[entry.account_id][0 if entry.paid else 1] += amount
+    apply_balance_deltas(deltas)
+
+
+def apply_balance_deltas(deltas):
+    # Takes {account id: (balance delta, pending balance delta)} and adds
+    # them with one UPDATE per BALANCE_CHUNK_SIZE accounts using F() so
+    # concurrent writes don't overwrite each other
+    deltas = [(account_id, paid, pending)
+              for account_id, (paid, pending) in deltas.items()
+              if paid or pending]
+    for start in range(0, len(deltas), BALANCE_CHUNK_SIZE):
+        chunk = deltas[start:start + BALANCE_CHUNK_SIZE]
+        Account.objects.filter(id__in=[row[0] for row in chunk]).update(
+            balance=F('balance') + get_delta_case(chunk, 1),
+            pending_balance=F('pending_balance') + get_delta_case(chunk, 2))
+
+
+def get_delta_case(rows, index):
+    # The value at the index of the row of each account
+    return Case(*(When(id=row[0], then=Value(row[index])) for row in rows),
+                default=Value(Decimal(0)),
+                output_field=DecimalField(max_digits=15, decimal_places=2))
+
+
+def convert_balances(accounts, rates):
+    # Sums the balance and the pending balance of the accounts converted
+    # with the factors of rates (see core.currencies.get_latest_rates),
+    # applied once per currency to the totals of a single grouped query
+    balance, pending_balance = Decimal(0), Decimal(0)
+    totals = accounts.order_by().values('currency').annotate(
+        total=Sum('balance'), pending_total=Sum('pending_balance'))
+    for row in totals:
+        rate = rates[row['currency']]
+        balance += row['total'] * rate
+        pending_balance += row['pending_total'] * rate
+    return balance.quantize(CENT), pending_balance.quantize(CENT)
+
+
+def subtract_balances(balances, other):
+    # Difference between two results of compute_balances
+    return {
+        account_id: tuple(
+            value - other_value for value, other_value in
+            zip(balances.get(account_id, ZERO_BALANCE),
+                other.get(account_id, ZERO_BALANCE))
+        )
+        for account_id in set(balances) | set(other)
+    }
+
+
+def compute_balances(transactions=None):
+    # Returns {account id: (balance, pending balance)} computed from scratch
+    # with one grouped query over the given transactions
+    if transactions is None:
+        transactions = Transaction.objects.all()
+    balances = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    totals = transactions.order_by().values(
+        'account_id', 'paid', 'category__category_type'
+    ).annotate(total=Sum('amount'))
+    for row in totals:
+        # SQLite sums the decimals as floats
+        amount = signed_amount(row['category__category_type'],
+                               row['total'].quantize(CENT))
+        balances[row['account_id']][0 if row['paid'] else 1] += amount
+    return {
+        account_id: tuple(values) for account_id, values in balances.items()
+    }
+
+
+def rebuild_balances(accounts=None, fix=True):
+    # Compares the stored balances with the ones computed from the
+    # transactions, returns the mismatches as (account id, stored,
+    # computed) and overwrites them when fix is set
+    if accounts is None:
+        accounts = Account.objects.all()
+    computed = compute_balances(
+        Transaction.objects.filter(account__in=accounts))
+
+    mismatches = []
+    stored_balances = accounts.order_by('id').values_list(
+        'id', 'balance', 'pending_balance')
+    for account_id, balance, pending_balance in stored_balances.iterator():
+        expected = computed.get(account_id, ZERO_BALANCE)
+        if (balance, pending_balance) != expected:
+            mismatches.append(
+                (account_id, (balance, pending_balance), expected))
+            if fix:
+                Account.objects.filter(id=account_id).update(
+                    balance=expected[0], pending_balance=expected[1])
+    return mismatches
+
+
+def get_daily_deltas(accounts, start, paid=None):
+    # Returns {account id: {day: signed total}} of the days after start,
+    # with one query grouped by day over the daily rollups or, to only
+    # count the paid or the pending transactions, over the transactions
+    if paid is None:
+        rows = TransactionDailyRollup.objects.filter(
+            account__in=accounts, day__gt=start).order_by().values(
+            'account_id', 'category__category_type', date=F('day')
+        ).annotate(amount=Sum('total'))
+    else:
+        rows = Transaction.objects.filter(
+            account__in=accounts, paid=paid,
+            transaction_date__gt=start).order_by().values(
+            'account_id', 'category__category_type',
+            date=F('transaction_date')
+        ).annotate(amount=Sum('amount'))
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for row in rows:
+        # SQLite sums the decimals as floats
+        deltas[row['account_id']][row['date']] += signed_amount(
+            row['category__category_type'], row['amount'].quantize(CENT))
+    return deltas
+
+
+def get_balance_series(accounts, start, end, paid=None):
+    # Returns {account id: [balance at the end of each day from start to
+    # end]}, without reading the transactions one by one. The balance of
+    # start is the stored one minus the per day deltas after it, the next
+    # ones add up the deltas of each day. With paid set, the series is of
+    # the balance or of the pending balance, else of both together
+    columns = {
+        None: ('balance', 'pending_balance'),
+        True: ('balance',),
+        False: ('pending_balance',),
+    }[paid]
+    balances = {
+        row[0]: sum(row[1:], Decimal(0))
+        for row in accounts.values_list('id', *columns)
+    }
+    deltas = get_daily_deltas(list(balances), start, paid)
+    days = (end - start).days + 1
+
+    series = {}
+    for account_id, balance in balances.items():
+        daily = [Decimal(0)] * days
+        for date, amount in deltas.get(account_id, {}).items():
+            if date > end:
+                # Already in the stored balance, but after the series
+                balance -= amount
+            else:
+                daily[(date - start).days] = amount
+        opening = balance - sum(daily)
+        series[account_id] = list(accumulate(daily[1:], initial=opening))
+    return series
+
+
+def get_period_ends(start, end, interval):
+    # Last day of each day, week (Monday to Sunday) or month from start to
+    # end, the last period is cut at end
+    dates = []
+    date = start
+    while date <= end:
+        if interval == 'week':
+            last = date + datetime.timedelta(days=6 - date.weekday())
+        elif interval == 'month':
+            last = date.replace(
+                day=calendar.monthrange(date.year, date.month)[1])
+        else:
+            last = date
+        last = min(last, end)
+        dates.append(last)
+        date = last + ONE_DAY
+    return dates
@@ -0,0 +1,252 @@
+import datetime
+import math
+import random
+import time
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.balances import rebuild_balances
+from core.currencies import load_rates
+from core.instrumentation import QueryTimer
+from core.models import Account, AccountType, Budget, RecurringTransaction, \
+    Transaction, TransactionCategory, CATEGORY_TYPES
+from core.recurring import reschedule
+from core.rollups import rebuild_rollups
+
+SEED_CHUNK_SIZE = 5000
+
+
+def seed_dataset(users=10, accounts=3, categories=10, transactions=1000,
+                 recurring=5, seed=0):
+    # Creates users, each one with its accounts, categories, transactions
+    # spread over the last year, recurring rules starting tomorrow and a
+    # budget per expense category, and the exchange rates of the default
+    # currency over the year. Returns the users
+    rng = random.Random(seed)
+    User = get_user_model()
+    account_type = AccountType.objects.get_or_create(name='Benchmark')[0]
+    today = datetime.date.today()
+    load_rates([(settings.DEFAULT_CURRENCY,
+                 today - datetime.timedelta(days=365), Decimal('1.1'))],
+               fill_until=today)
+    created = []
+    for i in range(users):
+        user = User.objects.create_user(
+            email='bench-%d@benchmark.local' % i, name='Bench %d' % i,
+            password='!', id_google='bench-google-%d' % i)
+        user_accounts = Account.objects.bulk_create([
+            Account(name='Account %d' % j, description='Benchmark',
+                    account_type=account_type, user=user)
+            for j in range(accounts)
+        ])
+        user_categories = TransactionCategory.objects.bulk_create([
+            TransactionCategory(
+                name='Category %d' % j, user=user,
+                category_type=(CATEGORY_TYPES.INCOME.value if j % 4 == 0
+                               else CATEGORY_TYPES.EXPENSE.value))
+            for j in range(categories)
+        ])
+        if not user_accounts or not user_categories:
+            created.append(user)
+            continue
+        # SQLite doesn't return the ids of bulk_create
+        user_accounts = list(Account.objects.filter(user=user))
+        user_categories = list(TransactionCategory.objects.filter(user=user))
+
+        rows = (
+            Transaction(
+                amount=rng.randint(100, 100000) / 100,
+                description='Benchmark transaction %d' % j,
+                paid=rng.random() < 0.9,
+                transaction_date=today - datetime.timedelta(
+                    days=rng.randrange(365)),
+                category=rng.choice(user_categories),
+                account=rng.choice(user_accounts), user=user)
+            for j in range(transactions)
+        )
+        while True:
+            chunk = list(islice(rows, SEED_CHUNK_SIZE))
+            if not chunk:
+                break
+            Transaction.objects.bulk_create(chunk)
+        rebuild_rollups(user)
+        seed_plans(rng, user, user_accounts, user_categories, recurring,
+                   today)
+        created.append(user)
+    rebuild_balances(Account.objects.filter(user__in=created))
+    return created
+
+
+def seed_plans(rng, user, accounts, categories, recurring, today):
+    # Recurring rules of the user, all due from tomorrow so none is
+    # materialized, and a budget per expense category over the year
+    rules = []
+    for j in range(recurring):
+        rule = RecurringTransaction(
+            amount=rng.randint(100, 100000) / 100,
+            description='Benchmark recurring %d' % j,
+            rule=rng.choice(('FREQ=WEEKLY', 'FREQ=MONTHLY;BYMONTHDAY=1')),
+            start_date=today + datetime.timedelta(days=1),
+            category=rng.choice(categories),
+            account=rng.choice(accounts), user=user)
+        reschedule(rule)
+        rules.append(rule)
+    RecurringTransaction.objects.bulk_create(rules)
+    Budget.objects.bulk_create([
+        Budget(amount=rng.randint(100, 1000) * 10,
+               start_month=today.replace(year=today.year - 1, day=1),
+               category=category, user=user)
+        for category in categories
+        if category.category_type == CATEGORY_TYPES.EXPENSE.value
+    ])
+
+
+def get_endpoints(user):
+    # (name, method, path, data) of the requests measured for a seeded
+    # user, covering every route included in app/urls.py
+    account = Account.objects.filter(user=user).order_by('id').first()
+    category = TransactionCategory.objects.filter(
+        user=user).order_by('id').first()
+    transaction = Transaction.objects.filter(user=user).order_by('id').first()
+    recurring = RecurringTransaction.objects.filter(
+        user=user).order_by('id').first()
+    transactions_url = reverse('transactions:transactions-list')
+    recurring_url = reverse('recurring:recurring-list')
+    today = datetime.date.today()
+    last_year = today - datetime.timedelta(days=364)
+    endpoints = [
+        ('user token', 'post', reverse('user:token'),
+         {'id_google': user.id_google}),
+        ('user me', 'get', reverse('user:me'), None),
+        ('auth users me', 'get', '/api/auth/users/me/', None),
+        ('account types', 'get', reverse('accounttype-list'), None),
+        ('accounts list', 'get', reverse('accounts-list'), None),
+        ('categories list', 'get',
+         reverse('categories:transaction_category-list'), None),
+        ('transactions list', 'get', transactions_url, None),
+        ('transactions list sparse', 'get',
+         transactions_url + '?fields=id,amount,transaction_date', None),
+        ('transactions list expanded', 'get',
+         transactions_url + '?expand=category,account', None),
+        ('transactions list filtered', 'get',
+         transactions_url + '?paid=true&page_size=1000', None),
+        ('transactions export', 'get',
+         reverse('transactions:transactions-export'), None),
+        ('transactions summary', 'get',
+         reverse('transactions:transactions-summary')
+         + '?group_by=month,category_type', None),
+        ('transactions projected', 'get',
+         reverse('transactions:transactions-projected')
+         + '?projected_until=' + (today + datetime.timedelta(
+             days=90)).isoformat(), None),
+        ('recurring list', 'get', recurring_url, None),
+        ('budgets list', 'get', reverse('budgets:budgets-list'), None),
+        ('budgets report', 'get', reverse('budgets:budgets-report')
+         + '?date_gte={}&date_lte={}'.format(last_year, today), None),
+        ('accounts balances', 'get', reverse('accounts-balances'), None),
+        ('accounts totals', 'get', reverse('accounts-totals')
+         + '?currency=' + settings.DEFAULT_CURRENCY, None),
+        ('admin transactions', 'get',
+         reverse('admin:core_transaction_changelist'), None),
+        ('metrics', 'get', reverse('metrics'), None),
+    ]
+    if account is not None:
+        endpoints.append(('account detail', 'get',
+                          reverse('accounts-detail', args=(account.id,)),
+                          None))
+    if category is not None:
+        endpoints.append(('category detail', 'get', reverse(
+            'categories:transaction_category-detail', args=(category.id,)),
+            None))
+    if transaction is not None:
+        endpoints += [
+            ('transaction detail', 'get', reverse(
+                'transactions:transactions-detail', args=(transaction.id,)),
+             None),
+            ('transaction update', 'patch', reverse(
+                'transactions:transactions-detail', args=(transaction.id,)),
+             {'description': 'Updated by the benchmark'}),
+        ]
+    if recurring is not None:
+        endpoints.append(('recurring detail', 'get', reverse(
+            'recurring:recurring-detail', args=(recurring.id,)), None))
+    if account is not None and category is not None:
+        item = {'amount': '12.34', 'description': 'Benchmark',
+                'category': category.id, 'account': account.id}
+        endpoints += [
+            ('transaction create', 'post', transactions_url, item),
+            ('transactions bulk', 'post',
+             reverse('transactions:transactions-bulk'), [item] * 100),
+            ('recurring create', 'post', recurring_url, {
+                **item, 'rule': 'FREQ=MONTHLY', 'start_date': (
+                    today + datetime.timedelta(days=1)).isoformat()}),
+        ]
+    return endpoints
+
+
+def percentile(values, percent):
+    # Nearest rank percentile of the sorted values
+    index = max(int(math.ceil(len(values) * percent / 100)) - 1, 0)
+    return values[index]
+
+
+def measure(client, method, path, data, requests):
+    # Sends the request once to warm the caches, then measures it
+    timings, queries, sql_times, sizes, statuses = [], [], [], [], set()
+    for i in range(requests + 1):
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            start = time.perf_counter()
+            if data is None:
+                res = getattr(client, method)(path)
+            else:
+                res = getattr(client, method)(path, data, format='json')
+            content = (b''.join(res.streaming_content)
+                       if res.streaming else res.content)
+            elapsed = time.perf_counter() - start
+        if i == 0:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(timer.count)
+        sql_times.append(timer.seconds * 1000)
+        sizes.append(len(content))
+        statuses.add(res.status_code)
+    timings.sort()
+    return {
+        'method': method.upper(),
+        'path': path,
+        'status': sorted(statuses),
+        'requests': requests,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': max(queries),
+        'sql_ms': round(sum(sql_times) / len(sql_times), 3),
+        'bytes': max(sizes),
+    }
+
+
+def run_benchmarks(user, requests=20, only=None):
+    # Measures every endpoint as the given seeded user, who is made staff
+    # to reach the admin. Returns {name: results}
+    get_user_model().objects.filter(id=user.id).update(
+        is_staff=True, is_superuser=True)
+    user.refresh_from_db()
+    token = Token.objects.get_or_create(user=user)[0]
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    client.force_login(user)
+
+    results = {}
+    for name, method, path, data in get_endpoints(user):
+        if only and name not in only:
+            continue
+        results[name] = measure(client, method, path, data, requests)
+    return results
@@ -0,0 +1,97 @@
+import calendar
+import datetime
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from core.currencies import MixedCurrenciesError, check_rates, convert
+from core.models import Budget, TransactionCategory, \
+    TransactionDailyRollup, CATEGORY_TYPES
+
+CENT = Decimal('0.01')
+
+
+def iter_months(start, end):
+    # Yields (first day, last day) of the part of each month in the range
+    month = start.replace(day=1)
+    while month <= end:
+        days = calendar.monthrange(month.year, month.month)[1]
+        yield (max(month, start),
+               min(month.replace(day=days), end))
+        month += datetime.timedelta(days=days)
+
+
+def get_budget_amount(budgets, start, end):
+    # Budget of a category from start to end, both included, given its
+    # budgets sorted by start month. Partial months get the share of their
+    # days, None when no budget applies to the range
+    total = None
+    for first, last in iter_months(start, end):
+        amount = None
+        for budget in budgets:
+            if budget.start_month > first:
+                break
+            amount = budget.amount
+        if amount is None:
+            continue
+        days = calendar.monthrange(first.year, first.month)[1]
+        total = (total or 0) + amount * ((last - first).days + 1) / days
+    return None if total is None else total.quantize(CENT)
+
+
+def get_actuals(user, start, end, currency=None):
+    # {category id: total} of the daily rollups of the user from start to
+    # end in a single grouped query, converted to the currency given if
+    # any. Raises MixedCurrenciesError when the accounts have several
+    # currencies and none is given. The rollups of the incomes are grouped
+    # too but not reported, cheaper than joining the categories to leave
+    # them out
+    rollups = TransactionDailyRollup.objects.filter(
+        user=user, day__gte=start, day__lte=end).order_by()
+    if currency is not None:
+        check_rates(rollups, 'account__currency', 'day', currency)
+        return dict(rollups.values('category_id').annotate(total=Sum(
+            convert('total', 'account__currency', 'day', currency))
+        ).values_list('category_id', 'total'))
+
+    actuals = {}
+    currencies = set()
+    for category_id, code, total in rollups.values(
+            'category_id', 'account__currency').annotate(
+            total=Sum('total')).values_list(
+            'category_id', 'account__currency', 'total'):
+        currencies.add(code)
+        actuals[category_id] = actuals.get(category_id, 0) + total
+    if len(currencies) > 1:
+        raise MixedCurrenciesError(currencies)
+    return actuals
+
+
+def get_budget_report(user, start, end, currency=None):
+    # Budget, actual spend and remaining amount of every expense category
+    # of the user from start to end, the budgets being in the currency
+    # given if any. Three queries whatever the number of categories: the
+    # categories, their budgets and the actuals summed by the database from
+    # the daily rollups, see get_actuals
+    actuals = get_actuals(user, start, end, currency)
+    categories = TransactionCategory.objects.filter(
+        user=user, category_type=CATEGORY_TYPES.EXPENSE.value
+    ).order_by('name', 'id').values_list('id', 'name')
+    budgets = {}
+    for budget in Budget.objects.filter(
+            user=user, start_month__lte=end).order_by('start_month'):
+        budgets.setdefault(budget.category_id, []).append(budget)
+
+    rows = []
+    for category_id, name in categories:
+        budget = get_budget_amount(budgets.get(category_id, ()), start, end)
+        # SQLite sums the decimals as floats
+        actual = Decimal(actuals.get(category_id, 0)).quantize(CENT)
+        rows.append({
+            'category': category_id,
+            'name': name,
+            'budget': budget,
+            'actual': actual,
+            'remaining': None if budget is None else budget - actual,
+        })
+    return rows
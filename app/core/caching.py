@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+
+from core.metrics import record_cache
+
+
+class LRUCache:
+    # Bounded in-process cache, the least recently used entry is evicted
+    # when full and entries expire ttl seconds after being set. Each worker
+    # process has its own copy, so the ttl bounds how long another process
+    # can keep serving an entry that was invalidated elsewhere. The lookups
+    # of a named cache are counted in core.metrics
+    missing = object()
+
+    def __init__(self, max_size, ttl, name=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = name
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key, self.missing)
+            if entry is not self.missing and entry[1] < time.monotonic():
+                del self.entries[key]
+                entry = self.missing
+            if entry is not self.missing:
+                self.entries.move_to_end(key)
+        if self.name is not None:
+            record_cache(self.name, entry is not self.missing)
+        return default if entry is self.missing else entry[0]
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,264 @@
+import csv
+import datetime
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Max, Min, OuterRef, \
+    Subquery, When
+
+from core.models import ExchangeRate, validate_currency
+
+RATE_CHUNK_SIZE = 1000
+RATE_FIELD = DecimalField(max_digits=18, decimal_places=8)
+AMOUNT_FIELD = DecimalField(max_digits=17, decimal_places=2)
+ONE_DAY = datetime.timedelta(days=1)
+
+
+class MissingRateError(ValueError):
+    def __init__(self, currency, date):
+        self.currency = currency
+        self.date = date
+        super().__init__('No exchange rate of {} on {}'.format(
+            currency, date.isoformat()))
+
+
+class MixedCurrenciesError(ValueError):
+    # Amounts in several currencies added up without a currency to
+    # convert them to
+    def __init__(self, currencies):
+        self.currencies = sorted(currencies)
+        super().__init__('The amounts are in several currencies ({}), '
+                         'choose the currency to convert them to'.format(
+                             ', '.join(self.currencies)))
+
+
+def get_rate(currency, date):
+    # Rate of a currency on a date, each of them either a value or an
+    # expression such as OuterRef
+    return Subquery(ExchangeRate.objects.filter(
+        currency=currency, date=date).values('rate')[:1],
+        output_field=RATE_FIELD)
+
+
+def convert(amount, currency, date, to_currency):
+    # Expression of the amount field of each row in to_currency, with the
+    # rates of its currency field on its date field, or on a given date.
+    # The database joins the rates by their unique index, so aggregates
+    # convert the rows while they add them up. NULL when a rate is
+    # missing, see check_rates
+    if not isinstance(date, datetime.date):
+        date = OuterRef(date)
+    return Case(
+        When(**{currency: to_currency}, then=F(amount)),
+        default=F(amount) * get_rate(to_currency, date)
+        / get_rate(OuterRef(currency), date),
+        output_field=AMOUNT_FIELD)
+
+
+def check_rates(queryset, currency, date, to_currency):
+    # Raises MissingRateError unless convert has the rates of every row of
+    # the queryset, with two grouped queries. As the rates are stored for
+    # every day from the first to the last one loaded, comparing the
+    # ranges of dates is enough
+    rows = queryset.order_by().exclude(**{currency: to_currency})
+    if isinstance(date, datetime.date):
+        ranges = [(code, date, date) for code in rows.values_list(
+            currency, flat=True).distinct()]
+    else:
+        ranges = list(rows.values(currency).annotate(
+            first=Min(date), last=Max(date)
+        ).values_list(currency, 'first', 'last'))
+    if not ranges:
+        return
+    loaded = {
+        code: (first, last) for code, first, last in
+        ExchangeRate.objects.filter(
+            currency__in={to_currency, *(row[0] for row in ranges)}
+        ).values('currency').annotate(
+            first=Min('date'), last=Max('date')
+        ).values_list('currency', 'first', 'last')
+    }
+    for code, first, last in ranges:
+        for rate_currency in (code, to_currency):
+            if rate_currency not in loaded:
+                raise MissingRateError(rate_currency, first)
+            loaded_first, loaded_last = loaded[rate_currency]
+            if first < loaded_first:
+                raise MissingRateError(rate_currency, first)
+            if last > loaded_last:
+                raise MissingRateError(rate_currency, last)
+
+
+class LatestRates(dict):
+    # {currency: factor} to convert amounts with the rates of a date,
+    # reading a currency without rates raises MissingRateError
+    def __init__(self, date, factors):
+        super().__init__(factors)
+        self.date = date
+
+    def __missing__(self, currency):
+        raise MissingRateError(currency, self.date)
+
+
+def get_latest_rates(to_currency, date=None):
+    # LatestRates converting each currency to to_currency on the last day
+    # up to date with rates of to_currency, for the amounts without rates
+    # of their own such as projected ones
+    if date is None:
+        date = datetime.date.today()
+    latest = ExchangeRate.objects.filter(
+        currency=to_currency, date__lte=date).aggregate(
+        date=Max('date'))['date']
+    if latest is None:
+        raise MissingRateError(to_currency, date)
+    rates = dict(ExchangeRate.objects.filter(date=latest).values_list(
+        'currency', 'rate'))
+    return LatestRates(latest, {
+        currency: rates[to_currency] / rate
+        for currency, rate in rates.items()
+    })
+
+
+def get_factors(currencies, dates, to_currency):
+    # Returns {(currency, date): factor} converting each currency to
+    # to_currency on each of the dates, with one query over the range of
+    # the dates. Raises MissingRateError when a rate is missing
+    codes = set(currencies) | {to_currency}
+    rates = {}
+    if len(codes) > 1:
+        rates = {
+            (currency, date): rate for currency, date, rate in
+            ExchangeRate.objects.filter(
+                currency__in=codes, date__gte=min(dates),
+                date__lte=max(dates)
+            ).values_list('currency', 'date', 'rate')
+        }
+    factors = {}
+    for currency in currencies:
+        for date in dates:
+            if currency == to_currency:
+                factors[currency, date] = Decimal(1)
+                continue
+            for code in (currency, to_currency):
+                if (code, date) not in rates:
+                    raise MissingRateError(code, date)
+            factors[currency, date] = (rates[to_currency, date]
+                                       / rates[currency, date])
+    return factors
+
+
+def read_rates(lines):
+    # Yields (currency, date, rate) from a CSV with either date, currency
+    # and rate columns, or a date column and one column per currency such
+    # as the historical rates published by the ECB. Empty and N/A values
+    # are skipped, raises ValueError on the first invalid row
+    reader = csv.reader(lines)
+    header = [name.strip() for name in next(reader, [])]
+    names = [name.lower() for name in header]
+    if 'date' not in names:
+        raise ValueError('Expected a date column')
+    date_index = names.index('date')
+    if 'currency' in names and 'rate' in names:
+        columns = [(names.index('rate'), None, names.index('currency'))]
+    else:
+        columns = [(index, name.upper(), None)
+                   for index, name in enumerate(header)
+                   if name and index != date_index]
+
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            yield from read_row(row, date_index, columns)
+        except (IndexError, ValueError) as exc:
+            raise ValueError('Line {}: {}'.format(reader.line_num, exc))
+
+
+def read_row(row, date_index, columns):
+    # Rates of a row, columns are (rate index, currency, currency index)
+    # with the currency given either by the header or by another column
+    try:
+        date = datetime.date.fromisoformat(row[date_index].strip())
+    except ValueError:
+        raise ValueError('Invalid date "{}"'.format(row[date_index]))
+    for rate_index, currency, currency_index in columns:
+        if currency is None:
+            currency = row[currency_index].strip().upper()
+        value = row[rate_index].strip() if rate_index < len(row) else ''
+        if not value or value.upper() == 'N/A':
+            continue
+        try:
+            validate_currency(currency)
+        except ValidationError:
+            raise ValueError('Invalid currency "{}"'.format(currency))
+        try:
+            rate = Decimal(value)
+        except InvalidOperation:
+            rate = None
+        if rate is None or not rate.is_finite() or rate <= 0:
+            raise ValueError('Invalid rate "{}"'.format(value))
+        yield currency, date, rate
+
+
+@db_transaction.atomic
+def load_rates(rates, fill_until=None):
+    # Stores the rates (currency, date, rate) in place of the stored ones.
+    # The days without a rate, such as the weekends, get the rate of the
+    # day before, up to fill_until after the last one, and the base
+    # currency gets the rate 1 on every loaded day. Returns the number of
+    # rates stored per currency
+    loaded = defaultdict(dict)
+    for currency, date, rate in rates:
+        loaded[currency][date] = rate
+    if not loaded:
+        return {}
+    dates = set().union(*loaded.values())
+    loaded[settings.EXCHANGE_RATE_BASE] = dict.fromkeys(dates, Decimal(1))
+
+    stored = {}
+    for currency, currency_rates in sorted(loaded.items()):
+        first, last = min(currency_rates), max(currency_rates)
+        # Continues from the stored rate before the loaded ones
+        previous = ExchangeRate.objects.filter(
+            currency=currency, date__lt=first).order_by('-date').first()
+        start = first if previous is None else previous.date + ONE_DAY
+        rate = None if previous is None else previous.rate
+        days = fill_days(currency_rates, start, last, rate)
+        if fill_until is not None:
+            # Fills up to fill_until after the last rate, loaded or stored
+            latest = ExchangeRate.objects.filter(
+                currency=currency, date__gt=last).order_by('-date').first()
+            if latest is None:
+                days += fill_days({}, last + ONE_DAY, fill_until,
+                                  currency_rates[last])
+            else:
+                days += fill_days({}, latest.date + ONE_DAY, fill_until,
+                                  latest.rate)
+
+        ExchangeRate.objects.filter(
+            currency=currency, date__gte=start, date__lte=last).delete()
+        objects = (ExchangeRate(currency=currency, date=date, rate=rate)
+                   for date, rate in days)
+        while True:
+            chunk = list(islice(objects, RATE_CHUNK_SIZE))
+            if not chunk:
+                break
+            ExchangeRate.objects.bulk_create(chunk)
+        stored[currency] = len(days)
+    return stored
+
+
+def fill_days(rates, start, end, rate=None):
+    # (date, rate) of every day from start to end, the days without a rate
+    # get the one of the day before
+    days = []
+    date = start
+    while date <= end:
+        rate = rates.get(date, rate)
+        days.append((date, rate))
+        date += ONE_DAY
+    return days
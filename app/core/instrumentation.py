@@ -0,0 +1,38 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Timings of the request being handled, see core.middleware
+current_timings = ContextVar('current_timings', default=None)
+
+
+class QueryTimer:
+    # Database execute wrapper counting the queries and the time spent
+    # executing them, with more resolution than connection.queries. The
+    # time to fetch the rows afterwards isn't included
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+@contextmanager
+def measure(name):
+    # Adds the time of the block to the timing of this name of the current
+    # request, does nothing outside of a request
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0) + time.perf_counter() - start
@@ -0,0 +1,51 @@
+from collections import namedtuple
+
+from django.db import transaction as db_transaction
+
+from core.models import TransactionCategory
+from core.balances import apply_balance_entries
+from core.rollups import apply_rollup_entries
+from core.versions import bump_data_version
+from core.metrics import record_transaction_changes
+
+# What the derived tables (balances and daily rollups) need to know about
+# a transaction to add it or take it out of them
+TransactionEntry = namedtuple('TransactionEntry', (
+    'user_id', 'account_id', 'category_id', 'category_type', 'paid',
+    'transaction_date', 'amount'))
+
+
+def get_transaction_entry(transaction):
+    return TransactionEntry(
+        transaction.user_id, transaction.account_id, transaction.category_id,
+        transaction.category.category_type, transaction.paid,
+        transaction.transaction_date, transaction.amount)
+
+
+def get_transaction_entries(transactions, category_types=None):
+    # Builds the entries of many transactions, the types of their
+    # categories are read with a single query when not given
+    if category_types is None:
+        category_types = dict(TransactionCategory.objects.filter(
+            id__in={t.category_id for t in transactions}
+        ).values_list('id', 'category_type'))
+    return [
+        TransactionEntry(
+            t.user_id, t.account_id, t.category_id,
+            category_types[t.category_id], t.paid, t.transaction_date,
+            t.amount)
+        for t in transactions
+    ]
+
+
+@db_transaction.atomic
+def record_transactions(added=(), removed=()):
+    # Single entry point of the transaction write paths to keep the
+    # derived tables and the data version of the users in sync, an edit
+    # passes the old entry as removed and the new one as added
+    apply_balance_entries(added=added, removed=removed)
+    apply_rollup_entries(added=added, removed=removed)
+    bump_data_version(*{entry.user_id for entry in (*added, *removed)})
+    # Edits add and remove the same number of entries
+    record_transaction_changes(created=max(len(added) - len(removed), 0),
+                               deleted=max(len(removed) - len(added), 0))
@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from core.benchmarks import seed_dataset, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Seeds a dataset and measures the latency, SQL queries and '
+            'response size of every API endpoint. Runs on the configured '
+            'database inside a transaction that is rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--accounts', type=int, default=3,
+                            help='Accounts of each user')
+        parser.add_argument('--categories', type=int, default=10,
+                            help='Categories of each user')
+        parser.add_argument('--transactions', type=int, default=1000,
+                            help='Transactions of each user')
+        parser.add_argument('--recurring', type=int, default=5,
+                            help='Recurring transactions of each user')
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Measured requests per endpoint')
+        parser.add_argument('--only', action='append',
+                            help='Name of an endpoint to measure, repeatable')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Path of the JSON results')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('At least one user is needed')
+        with db_transaction.atomic():
+            users = seed_dataset(
+                users=options['users'], accounts=options['accounts'],
+                categories=options['categories'],
+                transactions=options['transactions'],
+                recurring=options['recurring'], seed=options['seed'])
+            endpoints = run_benchmarks(
+                users[0], requests=options['requests'],
+                only=options['only'])
+            db_transaction.set_rollback(True)
+
+        results = {
+            'date': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'dataset': {name: options[name] for name in (
+                'users', 'accounts', 'categories', 'transactions',
+                'recurring', 'seed')},
+            'endpoints': endpoints,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+
+        self.stdout.write('%-28s %6s %9s %9s %9s %7s %9s %10s' % (
+            'endpoint', 'status', 'p50 ms', 'p95 ms', 'p99 ms', 'queries',
+            'sql ms', 'bytes'))
+        for name, result in endpoints.items():
+            self.stdout.write('%-28s %6s %9.2f %9.2f %9.2f %7d %9.2f %10d' % (
+                name, ','.join(str(code) for code in result['status']),
+                result['p50_ms'], result['p95_ms'], result['p99_ms'],
+                result['queries'], result['sql_ms'], result['bytes']))
@@ -0,0 +1,31 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.currencies import load_rates, read_rates
+
+
+class Command(BaseCommand):
+    help = ('Loads exchange rates against {} from a CSV file with date, '
+            'currency and rate columns, or with a date column and one '
+            'column per currency').format(settings.EXCHANGE_RATE_BASE)
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path of the CSV file')
+        parser.add_argument('--fill-until', type=datetime.date.fromisoformat,
+                            default=datetime.date.today(),
+                            help='Repeat the last rates up to this date, '
+                                 'YYYY-MM-DD, today by default')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['file'], newline='') as lines:
+                stored = load_rates(read_rates(lines), options['fill_until'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        for currency, count in sorted(stored.items()):
+            self.stdout.write('%s: %s days' % (currency, count))
+        self.stdout.write(self.style.SUCCESS(
+            'Loaded the rates of %s currencies' % len(stored)))
@@ -0,0 +1,42 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import RecurringTransaction
+from core.recurring import RECURRING_BATCH_SIZE, materialize_due
+
+
+class Command(BaseCommand):
+    help = ('Creates the transactions of the recurring rules due up to '
+            'today, meant to run daily. Running it again creates nothing')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=datetime.date.fromisoformat,
+                            help='Create the occurrences up to this date '
+                                 'instead of today, YYYY-MM-DD')
+        parser.add_argument('--user', type=int,
+                            help='Only the rules of this user id')
+        parser.add_argument('--batch-size', type=int,
+                            default=RECURRING_BATCH_SIZE,
+                            help='Rules processed per database transaction')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        rules = RecurringTransaction.objects.all()
+        if options['user']:
+            rules = rules.filter(user_id=options['user'])
+
+        start = time.monotonic()
+        total_rules = total_transactions = 0
+        for rules_count, created in materialize_due(
+                options['date'], rules, options['batch_size']):
+            total_rules += rules_count
+            total_transactions += created
+            self.stdout.write('%s rules, %s transactions, %.0f rules/s' % (
+                total_rules, total_transactions,
+                total_rules / (time.monotonic() - start)))
+        self.stdout.write(self.style.SUCCESS(
+            'Processed %s rules and created %s transactions' % (
+                total_rules, total_transactions)))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Account
+from core.balances import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored account balances from their transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report the wrong balances')
+        parser.add_argument('--user', type=int,
+                            help='Only the accounts of this user id')
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.all()
+        if options['user']:
+            accounts = accounts.filter(user_id=options['user'])
+
+        mismatches = rebuild_balances(accounts, fix=not options['check'])
+        for account_id, stored, computed in mismatches:
+            self.stdout.write(
+                'Account %s: stored %s / %s, computed %s / %s'
+                % (account_id, *stored, *computed))
+
+        if options['check'] and mismatches:
+            raise CommandError('%s wrong balances' % len(mismatches))
+        self.stdout.write(self.style.SUCCESS(
+            '%s balances %s' % (len(mismatches),
+                                'wrong' if options['check'] else 'fixed')))
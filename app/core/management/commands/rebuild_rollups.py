@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.rollups import check_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily transaction rollups from the transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report the wrong rollups')
+        parser.add_argument('--user', type=int,
+                            help='Only the rollups of this user id')
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('id')
+        if options['user']:
+            users = users.filter(id=options['user'])
+
+        wrong_users = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            mismatches = check_rollups(user_id)
+            for key, stored, computed in mismatches:
+                self.stdout.write('Rollup %s: stored %s, computed %s'
+                                  % (key, stored, computed))
+            if mismatches:
+                wrong_users += 1
+                if not options['check']:
+                    rebuild_rollups(user_id)
+
+        if options['check'] and wrong_users:
+            raise CommandError('%s users with wrong rollups' % wrong_users)
+        self.stdout.write(self.style.SUCCESS(
+            '%s users with rollups %s' % (
+                wrong_users, 'wrong' if options['check'] else 'rebuilt')))
@@ -0,0 +1,160 @@
+import datetime
+import multiprocessing
+import time
+from itertools import chain, islice
+
+import django
+import factory.random
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction as db_transaction
+
+from core.balances import rebuild_balances
+from core.models import Account, AccountType, Transaction, \
+    TransactionCategory
+from core.models_fakers import UserFactory, AccountFactory, \
+    fake_categories, fake_transactions, get_rng
+from core.rollups import rebuild_rollups
+
+ACCOUNT_TYPES = ('Cash', 'Bank account', 'Credit card', 'Savings')
+
+
+def bulk_create(model, objects, chunk_size):
+    # Saves the objects in chunks, returns how many were saved
+    objects = iter(objects)
+    count = 0
+    while True:
+        chunk = list(islice(objects, chunk_size))
+        if not chunk:
+            return count
+        model.objects.bulk_create(chunk)
+        count += len(chunk)
+
+
+def seed_batch(task):
+    # Creates the users of the indexes with all their data, in one
+    # transaction. Returns (users, transactions) created
+    options, indexes = task
+    User = get_user_model()
+    account_types = list(AccountType.objects.filter(name__in=ACCOUNT_TYPES))
+    emails = ['seed%d-%d@example.com' % (options['seed'], index)
+              for index in indexes]
+
+    with db_transaction.atomic():
+        users = []
+        for index, email in zip(indexes, emails):
+            factory.random.reseed_random(get_rng(options['seed'], index)
+                                         .random())
+            users.append(UserFactory.build(
+                email=email, id_google='seed%d-%d' % (options['seed'], index)))
+        User.objects.bulk_create(users)
+        # The ids are read back, SQLite doesn't return them on bulk_create
+        users = {user.email: user for user in User.objects.filter(
+            email__in=emails)}
+        users = [users[email] for email in emails]
+
+        Account.objects.bulk_create(chain.from_iterable(
+            (AccountFactory.build(
+                user=user, account_type=account_types[i % len(account_types)])
+             for i in range(options['accounts'])) for user in users))
+        TransactionCategory.objects.bulk_create(chain.from_iterable(
+            fake_categories(user, options['income_categories'],
+                            options['expense_categories'])
+            for user in users))
+        accounts, categories = {}, {}
+        for account in Account.objects.filter(user__in=users).order_by('id'):
+            accounts.setdefault(account.user_id, []).append(account)
+        for category in TransactionCategory.objects.filter(
+                user__in=users).order_by('id'):
+            categories.setdefault(category.user_id, []).append(category)
+
+        transactions = chain.from_iterable(
+            fake_transactions(
+                get_rng(options['seed'], index), accounts[user.id],
+                categories[user.id], options['start'], options['months'],
+                options['daily_expenses'])
+            for index, user in zip(indexes, users) if user.id in accounts)
+        count = bulk_create(Transaction, transactions, options['chunk_size'])
+
+        rebuild_balances(Account.objects.filter(user__in=users))
+        for user in users:
+            rebuild_rollups(user)
+    return len(users), count
+
+
+def init_worker():
+    # Each worker opens its own database connection
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Generates users with accounts, categories and realistic '
+            'transactions (salaries, power law spend per category and '
+            'seasonality) to test the queries and indexes at scale')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--accounts', type=int, default=3,
+                            help='Accounts of each user')
+        parser.add_argument('--income-categories', type=int, default=2)
+        parser.add_argument('--expense-categories', type=int, default=10)
+        parser.add_argument('--months', type=int, default=24,
+                            help='Months of transactions of each user')
+        parser.add_argument('--daily-expenses', type=float, default=3,
+                            help='Average expenses of each user per day')
+        parser.add_argument('--start', type=datetime.date.fromisoformat,
+                            help='First month, by default --months ago')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='The same seed generates the same data')
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Rows of each bulk_create')
+        parser.add_argument('--batch-users', type=int, default=50,
+                            help='Users created in each transaction')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes creating the batches')
+
+    def handle(self, *args, **options):
+        if options['accounts'] < 1:
+            raise CommandError('Each user needs at least one account')
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            raise CommandError('SQLite doesn\'t allow concurrent writers, '
+                               'use a single worker')
+        if options['start'] is None:
+            options['start'] = datetime.date.today() - datetime.timedelta(
+                days=options['months'] * 365 // 12)
+        if get_user_model().objects.filter(
+                email__startswith='seed%d-' % options['seed']).exists():
+            raise CommandError('The data of seed %d already exists'
+                               % options['seed'])
+        for name in ACCOUNT_TYPES:
+            AccountType.objects.get_or_create(name=name)
+
+        task_options = {name: options[name] for name in (
+            'seed', 'accounts', 'income_categories', 'expense_categories',
+            'months', 'daily_expenses', 'start', 'chunk_size')}
+        batch = options['batch_users']
+        tasks = [(task_options, range(first, min(first + batch,
+                                                 options['users'])))
+                 for first in range(0, options['users'], batch)]
+
+        start = time.perf_counter()
+        if options['workers'] > 1:
+            # The workers can't share the connection of this process
+            connections.close_all()
+            with multiprocessing.Pool(options['workers'],
+                                      initializer=init_worker) as pool:
+                self.report(pool.imap_unordered(seed_batch, tasks), start)
+        else:
+            self.report(map(seed_batch, tasks), start)
+
+    def report(self, results, start):
+        users = transactions = 0
+        for batch_users, batch_transactions in results:
+            users += batch_users
+            transactions += batch_transactions
+            elapsed = time.perf_counter() - start
+            self.stdout.write('%d users, %d transactions, %.0f rows/s' % (
+                users, transactions, transactions / elapsed))
+        self.stdout.write(self.style.SUCCESS(
+            'Created %d users and %d transactions' % (users, transactions)))
@@ -0,0 +1,313 @@
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Every process writes its metrics to its own file of this directory and
+# /metrics adds up the files of all of them, so the totals are right with
+# several workers. The files of the processes that exited are folded into
+# ARCHIVE_NAME. Empty it when deploying, like any Prometheus target whose
+# counters restart
+METRICS_DIR = getattr(settings, 'METRICS_DIR', os.path.join(
+    tempfile.gettempdir(), 'app-metrics'))
+# Seconds between the writes of the file of a process
+METRICS_FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1)
+
+ARCHIVE_NAME = 'archive.json'
+LOCK_NAME = '.lock'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Requests by route, method and status', None),
+    'http_request_errors_total': (
+        'counter', 'Requests answered with a 5xx status', None),
+    'http_request_duration_seconds': (
+        'histogram', 'Request latency by route and method', LATENCY_BUCKETS),
+    'db_queries_total': ('counter', 'SQL queries by route', None),
+    'db_query_seconds_total': (
+        'counter', 'Time executing SQL queries by route', None),
+    'cache_requests_total': (
+        'counter', 'Lookups of the in-process caches by result', None),
+    'transactions_created_total': (
+        'counter', 'Transactions created, rate()*60 gives them per minute',
+        None),
+    'transactions_deleted_total': ('counter', 'Transactions deleted', None),
+}
+
+
+class MetricsRegistry:
+    # Counters and histograms of this process, kept in dicts so recording
+    # is a few dict operations, and written to its file at most every
+    # flush_interval seconds
+
+    def __init__(self, directory=METRICS_DIR,
+                 flush_interval=METRICS_FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # Also called in a forked process, which must not write the values
+        # of its parent to its own file, nor wait for a flush of a thread of
+        # its parent
+        self.pid = os.getpid()
+        # Held while writing the file, one flush at a time
+        self.flush_lock = threading.Lock()
+        self.path = os.path.join(self.directory, '{}-{}.json'.format(
+            self.pid, uuid.uuid4().hex))
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.next_flush = 0
+
+    def inc(self, name, labels=(), value=1):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            self.counters[name, labels] += value
+        self.maybe_flush()
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                # A count per bucket, then +Inf, then the sum
+                histogram = self.histograms[name, labels] = \
+                    [0] * (len(buckets) + 2)
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        # Skipped while another thread flushes, its values are written by
+        # the next flush. A failed write is retried then too, the metrics
+        # never fail the request or the command recording them
+        if time.monotonic() < self.next_flush:
+            return
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() >= self.next_flush:
+                self.write()
+        except OSError:
+            logger.exception('Unable to write the metrics to %s', self.path)
+        finally:
+            self.flush_lock.release()
+
+    def flush(self):
+        with self.flush_lock:
+            self.write()
+
+    def write(self):
+        with self.lock:
+            self.next_flush = time.monotonic() + self.flush_interval
+            path = self.path
+            counters = dict(self.counters)
+            histograms = {key: list(values)
+                          for key, values in self.histograms.items()}
+        write_metrics(self.directory, path, counters, histograms)
+
+    def collect(self):
+        # Returns the counters and histograms added up over all the files
+        self.flush()
+        self.compact()
+        counters = defaultdict(float)
+        histograms = {}
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.json'):
+                add_metrics(counters, histograms, read_metrics(
+                    os.path.join(self.directory, filename)))
+        return counters, histograms
+
+    def compact(self):
+        # Folds the files of the processes that exited into the archive,
+        # so their number doesn't grow with every process ever started.
+        # Under a lock of the directory, the workers scrape concurrently
+        with open(os.path.join(self.directory, LOCK_NAME), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            exited = [filename for filename in os.listdir(self.directory)
+                      if filename.endswith('.json')
+                      and not is_running(filename)]
+            if not exited:
+                return
+            path = os.path.join(self.directory, ARCHIVE_NAME)
+            archive = read_metrics(path)
+            counters = defaultdict(float)
+            histograms = {}
+            add_metrics(counters, histograms, archive)
+            for filename in exited:
+                # Folded by a compaction that stopped before removing it
+                if filename not in archive['folded']:
+                    add_metrics(counters, histograms, read_metrics(
+                        os.path.join(self.directory, filename)))
+            write_metrics(self.directory, path, counters, histograms,
+                          folded=exited)
+            for filename in exited:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+
+
+def is_running(filename):
+    # Whether the process of the file, named {pid}-{uuid}.json, still
+    # runs. The archive and other files are kept
+    pid = filename.split('-', 1)[0]
+    if filename == ARCHIVE_NAME or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_metrics(path):
+    # Returns the data of a metrics file, empty if missing or unreadable
+    try:
+        with open(path) as data:
+            data = json.load(data)
+    except (OSError, ValueError):
+        data = {}
+    return {'counters': data.get('counters', []),
+            'histograms': data.get('histograms', []),
+            'folded': data.get('folded', [])}
+
+
+def add_metrics(counters, histograms, data):
+    for name, labels, value in data['counters']:
+        counters[name, to_labels(labels)] += value
+    for name, labels, values in data['histograms']:
+        key = name, to_labels(labels)
+        if key in histograms:
+            histograms[key] = [a + b for a, b in zip(
+                histograms[key], values)]
+        else:
+            histograms[key] = values
+
+
+def write_metrics(directory, path, counters, histograms, folded=()):
+    data = {
+        'counters': [[name, labels, value] for (name, labels), value
+                     in counters.items()],
+        'histograms': [[name, labels, values] for (name, labels), values
+                       in histograms.items()],
+        'folded': list(folded),
+    }
+    os.makedirs(directory, exist_ok=True)
+    # Written to a file of its own then replaced at once, the readers never
+    # see half a file
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w') as output:
+            json.dump(data, output)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def to_labels(labels):
+    return tuple(tuple(label) for label in labels)
+
+
+registry = MetricsRegistry()
+
+
+def record_request(route, method, status, seconds, queries, sql_seconds):
+    # Called by core.middleware.PerformanceMiddleware for every request
+    labels = (('route', route), ('method', method))
+    registry.inc('http_requests_total',
+                 labels + (('status', str(status)),))
+    if status >= 500:
+        registry.inc('http_request_errors_total', labels)
+    registry.observe('http_request_duration_seconds', labels, seconds)
+    route_labels = (('route', route),)
+    registry.inc('db_queries_total', route_labels, queries)
+    registry.inc('db_query_seconds_total', route_labels, sql_seconds)
+
+
+def record_cache(cache, hit):
+    registry.inc('cache_requests_total', (
+        ('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+
+def record_transaction_changes(created=0, deleted=0):
+    if created:
+        registry.inc('transactions_created_total', (), created)
+    if deleted:
+        registry.inc('transactions_deleted_total', (), deleted)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(
+        name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')) for name, value in labels) + '}'
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_metrics():
+    # Returns all the metrics in the Prometheus text format
+    counters, histograms = registry.collect()
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        lines += ['# HELP {} {}'.format(name, help_text),
+                  '# TYPE {} {}'.format(name, metric_type)]
+        if metric_type == 'counter':
+            lines += ['{}{} {}'.format(name, format_labels(labels),
+                                       format_value(value))
+                      for (metric, labels), value in sorted(counters.items())
+                      if metric == name]
+            continue
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), values):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    name, format_labels(labels + (('le', bound),)),
+                    format_value(cumulative)))
+            lines += [
+                '{}_sum{} {}'.format(name, format_labels(labels),
+                                     format_value(values[-1])),
+                '{}_count{} {}'.format(name, format_labels(labels),
+                                       format_value(cumulative)),
+            ]
+
+    # Hit ratio of each cache since the processes started
+    lookups = defaultdict(lambda: [0, 0])
+    for (metric, labels), value in counters.items():
+        if metric == 'cache_requests_total':
+            labels = dict(labels)
+            lookups[labels['cache']][labels['result'] == 'hit'] += value
+    lines += ['# HELP cache_hit_ratio Share of the cache lookups that hit',
+              '# TYPE cache_hit_ratio gauge']
+    lines += ['cache_hit_ratio{} {}'.format(
+        format_labels((('cache', cache),)),
+        format_value(hits / (misses + hits)))
+        for cache, (misses, hits) in sorted(lookups.items())]
+    return '\n'.join(lines) + '\n'
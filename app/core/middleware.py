@@ -0,0 +1,115 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from core.instrumentation import QueryTimer, current_timings
+from core.metrics import record_request
+
+logger = logging.getLogger('core.performance')
+
+# Share of the requests profiled with cProfile, 0 disables the sampling
+PERFORMANCE_PROFILE_RATE = getattr(settings, 'PERFORMANCE_PROFILE_RATE', 0)
+# Profiles every request and keeps the dumps of the ones slower than this
+# number of milliseconds, only for short investigations as profiling slows
+# down every request. None disables it
+PERFORMANCE_PROFILE_SLOW_MS = getattr(
+    settings, 'PERFORMANCE_PROFILE_SLOW_MS', None)
+PERFORMANCE_PROFILE_DIR = getattr(
+    settings, 'PERFORMANCE_PROFILE_DIR', '/tmp/profiles')
+
+
+def get_view_name(view_func):
+    # Returns (view, action) of a Django or DRF view function
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return view_func.__module__ + '.' + view_func.__name__, None
+    return view_class.__name__, getattr(view_func, 'actions', None)
+
+
+class PerformanceMiddleware:
+    # Measures each request: view and action, wall time, number and time of
+    # the SQL queries, serializer time (see core.serializers.
+    # TimedSerializerMixin) and response size. They are sent in the
+    # Server-Timing header, logged as a JSON line at INFO on
+    # core.performance and added to core.metrics. Sampled or slow requests
+    # also get a cProfile dump
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = {}
+        token = current_timings.set(timings)
+        query_timer = QueryTimer()
+        profiler = None
+        if (PERFORMANCE_PROFILE_SLOW_MS is not None
+                or random.random() < PERFORMANCE_PROFILE_RATE):
+            profiler = cProfile.Profile()
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(query_timer):
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            current_timings.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': getattr(request, 'performance_view', None),
+            'action': getattr(request, 'performance_action', None),
+            'total_ms': round(total_ms, 3),
+            'queries': query_timer.count,
+            'sql_ms': round(query_timer.seconds * 1000, 3),
+            'serializer_ms': round(timings.get('serializer', 0) * 1000, 3),
+            'bytes': (None if response.streaming
+                      else len(response.content)),
+        }
+        if profiler is not None and (
+                PERFORMANCE_PROFILE_SLOW_MS is None
+                or total_ms >= PERFORMANCE_PROFILE_SLOW_MS):
+            record['profile'] = self.dump_profile(profiler, record)
+
+        response['Server-Timing'] = (
+            'db;dur={sql_ms};desc="{queries} queries", '
+            'serializer;dur={serializer_ms}, total;dur={total_ms}'.format(
+                **record))
+        logger.info(json.dumps(record))
+        match = request.resolver_match
+        try:
+            record_request(match.view_name if match else 'unmatched',
+                           request.method, response.status_code,
+                           total_ms / 1000, query_timer.count,
+                           query_timer.seconds)
+        except Exception:
+            # The metrics never turn an answered request into a 500
+            logger.exception('Unable to record the metrics of %s',
+                             request.path)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view, actions = get_view_name(view_func)
+        request.performance_view = view
+        if actions:
+            request.performance_action = actions.get(request.method.lower())
+
+    def dump_profile(self, profiler, record):
+        os.makedirs(PERFORMANCE_PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PERFORMANCE_PROFILE_DIR, '{}-{}-{}.prof'.format(
+            int(time.time() * 1000), record['view'] or 'none',
+            record['action'] or record['method'].lower()))
+        profiler.dump_stats(path)
+        return path
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_transaction_user(apps, schema_editor):
+    Transaction = apps.get_model('core', 'Transaction')
+    TransactionCategory = apps.get_model('core', 'TransactionCategory')
+    category_user = TransactionCategory.objects.filter(
+        id=OuterRef('category_id')).values('user_id')[:1]
+    Transaction.objects.filter(user__isnull=True).update(
+        user_id=Subquery(category_user))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0014_auto_20261018_1017'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_transaction_user, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # Kept apart from the backfill so the NOT NULL change runs in its own
+    # transaction, after the deferred foreign key checks have fired
+
+    dependencies = [
+        ('core', '0015_transaction_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_date_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-transaction_date', '-id'], name='transaction_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'account'], name='transaction_user_account_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.0.14 on 2026-10-18 10:21
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def compute_account_balances(apps, schema_editor):
+    Account = apps.get_model('core', 'Account')
+    Transaction = apps.get_model('core', 'Transaction')
+    balances = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    totals = Transaction.objects.order_by().values(
+        'account_id', 'paid', 'category__category_type'
+    ).annotate(total=Sum('amount'))
+    for row in totals:
+        amount = row['total']
+        if row['category__category_type'] != 'IN':
+            amount = -amount
+        balances[row['account_id']][0 if row['paid'] else 1] += amount
+    for account_id, (balance, pending_balance) in balances.items():
+        Account.objects.filter(id=account_id).update(
+            balance=balance, pending_balance=pending_balance)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_transaction_user_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='pending_balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.RunPython(compute_account_balances, migrations.RunPython.noop),
+    ]
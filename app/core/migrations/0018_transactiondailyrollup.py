@@ -0,0 +1,55 @@
+# Generated by Django 3.0.14 on 2026-10-18 10:24
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def fill_rollups(apps, schema_editor):
+    Transaction = apps.get_model('core', 'Transaction')
+    TransactionDailyRollup = apps.get_model('core', 'TransactionDailyRollup')
+    rows = Transaction.objects.order_by().values(
+        'user_id', 'account_id', 'category_id', 'transaction_date'
+    ).annotate(total=Sum('amount'), count=Count('id'))
+    rollups = (
+        TransactionDailyRollup(
+            user_id=row['user_id'], account_id=row['account_id'],
+            category_id=row['category_id'], day=row['transaction_date'],
+            total=row['total'], count=row['count'])
+        for row in rows.iterator()
+    )
+    while True:
+        chunk = list(islice(rollups, 1000))
+        if not chunk:
+            break
+        TransactionDailyRollup.objects.bulk_create(chunk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_account_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionDailyRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('count', models.IntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Account')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.TransactionCategory')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='transactiondailyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'day', 'account', 'category'), name='transaction_rollup_unique_key'),
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
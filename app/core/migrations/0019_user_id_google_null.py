@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def clear_blank_and_duplicated_ids(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    User.objects.filter(id_google='').update(id_google=None)
+    # An id shared by several users is kept only by the oldest of them
+    duplicated = User.objects.exclude(id_google=None).values(
+        'id_google').annotate(count=Count('id'), first=Min('id')).filter(
+        count__gt=1)
+    for row in duplicated:
+        User.objects.filter(id_google=row['id_google']).exclude(
+            id=row['first']).update(id_google=None)
+
+
+def restore_blank_ids(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    User.objects.filter(id_google=None).update(id_google='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_transactiondailyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='id_google',
+            field=models.CharField(blank=True, max_length=300, null=True),
+        ),
+        migrations.RunPython(clear_blank_and_duplicated_ids, restore_blank_ids),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_user_id_google_null'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='id_google',
+            field=models.CharField(blank=True, max_length=300, null=True, unique=True),
+        ),
+    ]
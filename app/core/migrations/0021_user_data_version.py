@@ -0,0 +1,23 @@
+# Generated by Django 3.0.14 on 2026-10-18 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_user_id_google_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='data_modified',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.14 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_user_data_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-transaction_date', '-id'], name='transaction_date_id_idx'),
+        ),
+    ]
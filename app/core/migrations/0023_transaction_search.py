@@ -0,0 +1,63 @@
+from django.db import migrations
+
+POSTGRES_CREATE = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS transaction_description_trgm_idx '
+    'ON core_transaction USING gin (description gin_trgm_ops)',
+]
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS transaction_description_trgm_idx',
+]
+
+# External content FTS5 table, the triggers keep it in sync with the
+# descriptions. SQLite drops the triggers when a migration remakes the
+# core_transaction table, such migrations must create them again
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_transaction_fts USING fts5("
+    "description, content='core_transaction', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS core_transaction_fts_insert "
+    "AFTER INSERT ON core_transaction BEGIN "
+    "INSERT INTO core_transaction_fts(rowid, description) "
+    "VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS core_transaction_fts_delete "
+    "AFTER DELETE ON core_transaction BEGIN "
+    "INSERT INTO core_transaction_fts(core_transaction_fts, rowid, "
+    "description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS core_transaction_fts_update "
+    "AFTER UPDATE OF description ON core_transaction BEGIN "
+    "INSERT INTO core_transaction_fts(core_transaction_fts, rowid, "
+    "description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO core_transaction_fts(rowid, description) "
+    "VALUES (new.id, new.description); END",
+    "INSERT INTO core_transaction_fts(core_transaction_fts) "
+    "VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS core_transaction_fts_insert',
+    'DROP TRIGGER IF EXISTS core_transaction_fts_delete',
+    'DROP TRIGGER IF EXISTS core_transaction_fts_update',
+    'DROP TABLE IF EXISTS core_transaction_fts',
+]
+
+
+def run_vendor_sql(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_transaction_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_vendor_sql({'postgresql': POSTGRES_CREATE,
+                            'sqlite': SQLITE_CREATE}),
+            run_vendor_sql({'postgresql': POSTGRES_DROP,
+                            'sqlite': SQLITE_DROP})),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 3.0.14 on 2026-10-18 10:54
+
+import datetime
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+search = import_module('core.migrations.0023_transaction_search')
+
+# SQLite remakes core_transaction to add the field and the constraint, and
+# again to remove them when reverting, which drops the triggers of the full
+# text search. The index itself is kept as the rows and their ids don't
+# change
+SQLITE_TRIGGERS = [statement for statement in search.SQLITE_CREATE
+                   if statement.startswith('CREATE TRIGGER')]
+create_triggers = search.run_vendor_sql({'sqlite': SQLITE_TRIGGERS})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_transaction_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_triggers),
+        migrations.CreateModel(
+            name='RecurringTransaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('description', models.CharField(max_length=250)),
+                ('paid', models.BooleanField(default=True)),
+                ('rule', models.CharField(max_length=500)),
+                ('start_date', models.DateField(default=datetime.date.today)),
+                ('materialized_until', models.DateField(blank=True, null=True)),
+                ('next_date', models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Account'),
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.TransactionCategory'),
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurring',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='core.RecurringTransaction'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('recurring', 'transaction_date'), name='transaction_recurring_date_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringtransaction',
+            index=models.Index(fields=['next_date', 'id'], name='recurring_next_date_idx'),
+        ),
+        migrations.RunPython(create_triggers, migrations.RunPython.noop),
+    ]
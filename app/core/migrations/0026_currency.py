@@ -0,0 +1,46 @@
+# Generated by Django 3.0.14 on 2026-10-18 11:37
+
+from importlib import import_module
+
+import django.core.validators
+from django.db import migrations, models
+
+recurring = import_module('core.migrations.0024_recurring_transaction')
+
+# Adding the currency remakes core_transaction on SQLite, see 0024
+create_triggers = recurring.create_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_budget'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_triggers),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Enter a currency code such as USD.')])),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='currency',
+            field=models.CharField(default='USD', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Enter a currency code such as USD.')]),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default='USD', max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Enter a currency code such as USD.')]),
+        ),
+        migrations.AddConstraint(
+            model_name='exchangerate',
+            constraint=models.UniqueConstraint(fields=('currency', 'date'), name='exchange_rate_currency_date_unique'),
+        ),
+        migrations.RunPython(create_triggers, migrations.RunPython.noop),
+    ]
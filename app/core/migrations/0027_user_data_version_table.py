@@ -0,0 +1,50 @@
+# Generated by Django 3.0.14 on 2026-10-18 11:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_versions(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    UserDataVersion = apps.get_model('core', 'UserDataVersion')
+    UserDataVersion.objects.bulk_create((
+        UserDataVersion(user_id=user_id, version=version, modified=modified)
+        for user_id, version, modified in User.objects.values_list(
+            'id', 'data_version', 'data_modified').iterator()
+    ), batch_size=1000)
+
+
+def restore_versions(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    UserDataVersion = apps.get_model('core', 'UserDataVersion')
+    for row in UserDataVersion.objects.iterator():
+        User.objects.filter(id=row.user_id).update(
+            data_version=row.version, data_modified=row.modified)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_currency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDataVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='data_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('modified', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(copy_versions, restore_versions),
+        migrations.RemoveField(
+            model_name='user',
+            name='data_modified',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='data_version',
+        ),
+    ]
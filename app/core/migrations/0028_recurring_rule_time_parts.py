@@ -0,0 +1,28 @@
+import re
+
+from django.db import migrations
+
+# BYHOUR, BYMINUTE and BYSECOND parts of a rule with their values
+TIME_PART_RE = re.compile(r'(?i)(^|;)BY(?:HOUR|MINUTE|SECOND)=[^;]*')
+
+
+def remove_time_parts(apps, schema_editor):
+    # The rules are dates, the times of the day created the same occurrence
+    # several times and are now rejected by core.recurring.parse_rule
+    RecurringTransaction = apps.get_model('core', 'RecurringTransaction')
+    for recurring in RecurringTransaction.objects.filter(
+            rule__iregex=r'BY(HOUR|MINUTE|SECOND)='):
+        rule = TIME_PART_RE.sub(r'\1', recurring.rule)
+        recurring.rule = ';'.join(part for part in rule.split(';') if part)
+        recurring.save(update_fields=['rule'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_user_data_version_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_time_parts, migrations.RunPython.noop),
+    ]
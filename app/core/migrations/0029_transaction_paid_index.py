@@ -0,0 +1,17 @@
+# Generated by Django 3.0.14 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_recurring_rule_time_parts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['paid', '-transaction_date', '-id'], name='transaction_paid_date_idx'),
+        ),
+    ]
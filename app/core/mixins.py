@@ -0,0 +1,306 @@
+import hashlib
+import math
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.core.exceptions import FieldDoesNotExist, \
+    ValidationError as DjangoValidationError
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.currencies import MissingRateError, MixedCurrenciesError
+from core.instrumentation import measure
+from core.models import validate_currency
+from core.serializers import ValuesSerializer
+from core.reference import REFERENCE_MAX_AGE, get_reference_payload, \
+    get_reference_version
+from core.versions import get_data_version
+
+
+def strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+class UserDataVersionMixin:
+    # Conditional GET for the list and detail actions of viewsets scoped to
+    # the request user. The ETag is derived from the data version of the
+    # user, so a 304 is answered without running the queryset or the
+    # serializer. Writes must call core.versions.bump_data_version.
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_conditional_response(self, view, request, *args, **kwargs):
+        version, modified = get_data_version(request.user.id)
+        etag = self.get_etag(request, version)
+        last_modified = (math.floor(modified.timestamp())
+                         if modified is not None else None)
+
+        if self.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_etag(self, request, version):
+        # Different for each user, version, URL (filters and cursor) and
+        # accepted media type
+        value = '{}:{}:{}:{}'.format(
+            request.user.id, version, request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''))
+        return 'W/"{}"'.format(hashlib.md5(value.encode()).hexdigest())
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            # Weak comparison, as the ETags are weak
+            etags = [strip_weak(tag) for tag in parse_etags(if_none_match)]
+            return '*' in etags or strip_weak(etag) in etags
+
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return (if_modified_since is not None and last_modified is not None
+                and last_modified <= if_modified_since)
+
+
+class CachedReferenceMixin:
+    # For viewsets of small global tables that are read on every app launch
+    # and rarely written. The serialized payload of list and retrieve is
+    # cached per version of the model, see core.reference, and clients get
+    # a long-lived Cache-Control with an ETag of that version. The model
+    # must be added to REFERENCE_MODELS in core.signals to be invalidated
+    reference_max_age = REFERENCE_MAX_AGE
+
+    def list(self, request, *args, **kwargs):
+        return self.get_reference_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_reference_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_reference_response(self, view, request, *args, **kwargs):
+        model = self.get_queryset().model
+        version = get_reference_version(model)
+        path = request.get_full_path()
+        value = '{}:{}:{}:{}'.format(
+            model._meta.label_lower, version, path,
+            request.META.get('HTTP_ACCEPT', ''))
+        etag = 'W/"{}"'.format(hashlib.md5(value.encode()).hexdigest())
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        etags = [strip_weak(tag) for tag in parse_etags(if_none_match or '')]
+        if '*' in etags or strip_weak(etag) in etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            responses = []
+
+            def compute():
+                responses.append(view(request, *args, **kwargs))
+                if responses[0].status_code != status.HTTP_200_OK:
+                    return None
+                return responses[0].data
+
+            payload = get_reference_payload(model, version, path, compute)
+            if payload is None:
+                return responses[0]
+            response = Response(payload)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age={}'.format(
+            self.reference_max_age)
+        return response
+
+
+class SparseFieldsMixin:
+    # Adds the ?fields= and ?exclude= query parameters (comma separated
+    # names) to the list and retrieve actions. The serializer must use
+    # core.serializers.SparseFieldsSerializerMixin, and the columns of the
+    # dropped fields are not loaded from the database. Fields read by the
+    # view itself, like the ordering of a cursor pagination, go in
+    # sparse_required_fields. Works with ExpandFieldsMixin, which must come
+    # after it
+    sparse_actions = ('list', 'retrieve')
+    sparse_required_fields = ()
+
+    def get_sparse_fields(self):
+        # Returns (fields, exclude) of the request, None when not given
+        if getattr(self, 'action', None) not in self.sparse_actions:
+            return None, None
+        if not hasattr(self, '_sparse_fields'):
+            names = set(self.get_serializer_class()().fields)
+            self._sparse_fields = tuple(
+                self.parse_sparse_param(param, names)
+                for param in ('fields', 'exclude'))
+        return self._sparse_fields
+
+    def parse_sparse_param(self, param, names):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        requested = [name.strip() for name in value.split(',')
+                     if name.strip()]
+        unknown = [name for name in requested if name not in names]
+        if unknown:
+            raise ValidationError({param: [
+                'Unknown field "{}".'.format(name) for name in unknown]})
+        return requested
+
+    def get_serializer(self, *args, **kwargs):
+        fields, exclude = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        if exclude is not None:
+            kwargs.setdefault('exclude', exclude)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, exclude = self.get_sparse_fields()
+        if fields is None and exclude is None:
+            return queryset
+
+        serializer_fields = self.get_serializer_class()().fields
+        # only() would defer the columns of the expanded relations
+        if fields is not None and not getattr(
+                self, 'get_expand', lambda: None)():
+            columns = self.get_sparse_columns(
+                queryset.model, [serializer_fields[name] for name in fields])
+            if columns is not None:
+                queryset = queryset.only(
+                    *columns, *self.sparse_required_fields)
+        if exclude:
+            columns = self.get_sparse_columns(
+                queryset.model, [serializer_fields[name] for name in exclude])
+            columns = set(columns or ()) - set(self.sparse_required_fields)
+            if columns:
+                queryset = queryset.defer(*columns)
+        return queryset
+
+    def get_sparse_columns(self, model, fields):
+        # Model fields behind the serializer fields, None when one of them
+        # isn't a plain model field and everything has to be loaded
+        columns = []
+        for field in fields:
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+            columns.append(model_field.name)
+        return columns
+
+
+class ExpandFieldsMixin:
+    # Adds the ?expand= query parameter (comma separated relations, see
+    # core.serializers.ExpandableFieldsSerializerMixin) to the list and
+    # retrieve actions. The expanded relations are fetched with
+    # select_related, so the number of queries doesn't depend on the rows
+    expand_actions = ('list', 'retrieve')
+
+    def get_expand(self):
+        if getattr(self, 'action', None) not in self.expand_actions:
+            return None
+        if not hasattr(self, '_expand'):
+            self._expand = self.parse_expand()
+        return self._expand
+
+    def parse_expand(self):
+        value = self.request.query_params.get('expand')
+        if value is None:
+            return None
+        expand = [path.strip() for path in value.split(',') if path.strip()]
+        paths = self.get_serializer_class().get_expandable_paths()
+        unknown = [path for path in expand if path not in paths]
+        if unknown:
+            raise ValidationError({'expand': [
+                'Unknown relation "{}".'.format(path) for path in unknown]})
+
+        # The relations dropped by a sparse fieldset are not expanded
+        fields, exclude = getattr(
+            self, 'get_sparse_fields', lambda: (None, None))()
+        return [path for path in expand
+                if (fields is None or path.split('.')[0] in fields)
+                and path.split('.')[0] not in (exclude or ())]
+
+    def get_serializer(self, *args, **kwargs):
+        expand = self.get_expand()
+        if expand:
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        expand = self.get_expand()
+        if expand:
+            queryset = queryset.select_related(
+                *[path.replace('.', '__') for path in expand])
+        return queryset
+
+
+class ValuesListMixin:
+    # Serves the list action from values_list() rows converted by a
+    # core.serializers.ValuesSerializer compiled from the serializer of the
+    # request, with the same output. Falls back to the serializer when one
+    # of its fields isn't supported. Other actions, and all the writes, use
+    # the serializer
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = ValuesSerializer.compile(self.get_serializer())
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        # The pagination reads the ordering fields from the rows
+        queryset = self.filter_queryset(self.get_queryset())
+        get_ordering = getattr(self.paginator, 'get_ordering', None)
+        columns = list(values_serializer.columns)
+        for name in get_ordering(request, queryset, self) if get_ordering \
+                else ():
+            name = name.lstrip('-')
+            if name not in columns:
+                columns.append(name)
+        rows = queryset.values_list(*columns, named=True)
+
+        page = self.paginate_queryset(rows)
+        with measure('serializer'):
+            data = values_serializer.to_representation(
+                rows if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class ReportingCurrencyMixin:
+    # For the actions that convert their totals to the currency given in
+    # the currency query parameter, see core.currencies. A missing rate, or
+    # amounts in several currencies without one given, is answered with a
+    # 400, even when found while rendering
+
+    def get_reporting_currency(self):
+        # The requested currency, None to keep each amount in its own
+        currency = self.request.query_params.get('currency')
+        if currency is None:
+            return None
+        currency = currency.upper()
+        try:
+            validate_currency(currency)
+        except DjangoValidationError as exc:
+            raise ValidationError({'currency': exc.messages})
+        return currency
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (MissingRateError, MixedCurrenciesError)):
+            exc = ValidationError({'currency': [str(exc)]})
+        return super().handle_exception(exc)
@@ -2,10 +2,15 @@ from django.db import models
 from enum import Enum
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
+from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 import datetime
 
+# ISO 4217 code of the currency of an amount
+validate_currency = RegexValidator(
+    r'^[A-Z]{3}\Z', _('Enter a currency code such as USD.'))
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -28,7 +33,10 @@ class UserManager(BaseUserManager):
 class User(AbstractBaseUser, PermissionsMixin):
     # Custom user model that supports using email instead of username
     email = models.EmailField(max_length=255, unique=True)
-    id_google = models.CharField(max_length=300, blank=True)
+    # NULL when the user doesn't sign in with Google, so the unique index
+    # only applies to the actual ids
+    id_google = models.CharField(max_length=300, blank=True, null=True,
+                                 unique=True)
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=True)
@@ -36,6 +44,26 @@ class User(AbstractBaseUser, PermissionsMixin):
     objects = UserManager()
     USERNAME_FIELD = "email"
 
+    def save(self, *args, **kwargs):
+        if not self.id_google:
+            self.id_google = None
+        super().save(*args, **kwargs)
+
+
+class UserDataVersion(models.Model):
+    # Bumped on every write to the accounts, categories or transactions of
+    # the user, used for conditional GETs, see core.versions. Kept apart
+    # from the user row, which is saved whole from copies that may be
+    # stale, such as the cached users of core.authentication
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='data_version'
+    )
+    version = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(null=True, blank=True)
+
 
 class AccountType(models.Model):
     # Model for defining the Transactions Account Type e.g Wallet, Savings
@@ -58,6 +86,17 @@ class Account(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    # Sum of the paid and not yet paid transactions of the account, incomes
+    # minus expenses. Kept up to date by the transactions API, see
+    # core.balances
+    balance = models.DecimalField(max_digits=15, decimal_places=2,
+                                  default=0)
+    pending_balance = models.DecimalField(max_digits=15, decimal_places=2,
+                                          default=0)
+    # Currency of the balances and of the transactions of the account
+    currency = models.CharField(max_length=3,
+                                default=settings.DEFAULT_CURRENCY,
+                                validators=[validate_currency])
 
     def __str__(self):
         return self.name
@@ -87,13 +126,17 @@ class TransactionCategory(models.Model):
     )
 
     def __str__(self):
-        return self.name + '_' + str(self.user.id)
+        return self.name + '_' + str(self.user_id)
 
 
 class Transaction(models.Model):
     # Model for creating a transaction
-    # TODO: Define currency field
     amount = models.DecimalField(max_digits=15, decimal_places=2)
+    # Currency of the amount, denormalized from the account so the
+    # conversions of core.currencies don't need to join the accounts table
+    currency = models.CharField(max_length=3,
+                                default=settings.DEFAULT_CURRENCY,
+                                validators=[validate_currency])
     description = models.CharField(max_length=250)
     paid = models.BooleanField(default=True)
     transaction_date = models.DateField(default=datetime.date.today)
@@ -105,3 +148,160 @@ class Transaction(models.Model):
         Account,
         on_delete=models.CASCADE
     )
+    # Owner of the transaction, denormalized from the category so the
+    # queries scoped to a user don't need to join the categories table
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    # Rule the transaction was created from, if any
+    recurring = models.ForeignKey(
+        'RecurringTransaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transactions'
+    )
+
+    class Meta:
+        constraints = [
+            # A rule creates at most one transaction per date, so creating
+            # the occurrences is idempotent, see core.recurring
+            models.UniqueConstraint(
+                fields=['recurring', 'transaction_date'],
+                name='transaction_recurring_date_unique'),
+        ]
+        indexes = [
+            # Serves the user scoped date filters and the keyset ordering
+            # used to paginate transactions
+            models.Index(fields=['user', '-transaction_date', '-id'],
+                         name='transaction_user_date_idx'),
+            models.Index(fields=['user', 'account'],
+                         name='transaction_user_account_idx'),
+            # Serves the ordering and the date hierarchy of the admin, which
+            # lists the transactions of every user
+            models.Index(fields=['-transaction_date', '-id'],
+                         name='transaction_date_id_idx'),
+            # Serves the paid list filter of the admin in the same order
+            models.Index(fields=['paid', '-transaction_date', '-id'],
+                         name='transaction_paid_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.user_id is None and self.category_id is not None:
+            self.user_id = self.category.user_id
+        if Transaction.account.is_cached(self):
+            self.currency = self.account.currency
+        super().save(*args, **kwargs)
+
+
+class RecurringTransaction(models.Model):
+    # Transaction repeated on the dates of an RFC 5545 RRULE such as
+    # FREQ=MONTHLY;BYMONTHDAY=1 from start_date on. The occurrences become
+    # transactions once due, the future ones are only projected when read,
+    # see core.recurring
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    description = models.CharField(max_length=250)
+    paid = models.BooleanField(default=True)
+    rule = models.CharField(max_length=500)
+    start_date = models.DateField(default=datetime.date.today)
+    category = models.ForeignKey(
+        TransactionCategory,
+        on_delete=models.CASCADE
+    )
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    # The occurrences up to this date are transactions already
+    materialized_until = models.DateField(null=True, blank=True)
+    # First occurrence after materialized_until, NULL when the rule has no
+    # more of them
+    next_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Finds the rules with due occurrences
+            models.Index(fields=['next_date', 'id'],
+                         name='recurring_next_date_idx'),
+        ]
+
+    def __str__(self):
+        return self.description
+
+
+class Budget(models.Model):
+    # Amount planned to spend each month in an expense category, from
+    # start_month on until the next budget of the category, see
+    # core.budgets
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    # First day of the month
+    start_month = models.DateField()
+    category = models.ForeignKey(
+        TransactionCategory,
+        on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['category', 'start_month'],
+                name='budget_category_month_unique'),
+        ]
+
+
+class ExchangeRate(models.Model):
+    # Units of the currency worth one unit of settings.EXCHANGE_RATE_BASE
+    # on a date. The load_exchange_rates command stores a rate for every
+    # day between the first and the last one loaded, so converting is an
+    # equality lookup, see core.currencies
+    currency = models.CharField(max_length=3,
+                                validators=[validate_currency])
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['currency', 'date'],
+                name='exchange_rate_currency_date_unique'),
+        ]
+
+    def __str__(self):
+        return '%s %s' % (self.currency, self.date)
+
+
+class TransactionDailyRollup(models.Model):
+    # Sum and number of the transactions of a user per account, category
+    # and day, kept up to date by the transactions API so the reports read
+    # at most one row per day and category, see core.rollups
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE
+    )
+    category = models.ForeignKey(
+        TransactionCategory,
+        on_delete=models.CASCADE
+    )
+    day = models.DateField()
+    total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'day', 'account', 'category'],
+                name='transaction_rollup_unique_key'),
+        ]
@@ -1,4 +1,10 @@
-from .models import AccountType
+import calendar
+import datetime
+import random
+from decimal import Decimal
+
+from .models import AccountType, Account, User, TransactionCategory, \
+    Transaction, CATEGORY_TYPES
 import factory
 
 
@@ -7,3 +13,147 @@ class AccountTypeFactory(factory.Factory):
         model = AccountType
     name = factory.Faker('name')
     icon_name = factory.Faker('color_name')
+
+
+# The factories below build unsaved objects, to be saved in chunks with
+# bulk_create, see the seed_data command
+
+class UserFactory(factory.Factory):
+    class Meta:
+        model = User
+    email = factory.Sequence(lambda n: 'user%d@example.com' % n)
+    name = factory.Faker('name')
+    id_google = factory.Sequence(lambda n: 'google-%d' % n)
+    password = '!'
+
+
+class AccountFactory(factory.Factory):
+    class Meta:
+        model = Account
+    name = factory.Faker('credit_card_provider')
+    description = factory.Faker('sentence', nb_words=4)
+    account_type = factory.SubFactory(AccountTypeFactory)
+    user = factory.SubFactory(UserFactory)
+
+
+class TransactionCategoryFactory(factory.Factory):
+    class Meta:
+        model = TransactionCategory
+    name = factory.Faker('word')
+    icon_name = factory.Faker('word')
+    color = factory.Faker('color_name')
+    category_type = CATEGORY_TYPES.EXPENSE.value
+    user = factory.SubFactory(UserFactory)
+
+
+class TransactionFactory(factory.Factory):
+    class Meta:
+        model = Transaction
+    amount = factory.Faker('pydecimal', left_digits=3, right_digits=2,
+                           positive=True)
+    description = factory.Faker('sentence', nb_words=4)
+    paid = True
+    transaction_date = factory.Faker('date_this_year')
+    category = factory.SubFactory(TransactionCategoryFactory)
+    account = factory.SubFactory(AccountFactory)
+    user = factory.SelfAttribute('category.user')
+
+
+# Spending multiplier of each month, higher in the holidays and summer
+SEASONALITY = {1: 0.85, 2: 0.85, 3: 0.95, 4: 1.0, 5: 1.0, 6: 1.1, 7: 1.2,
+               8: 1.15, 9: 0.95, 10: 1.0, 11: 1.1, 12: 1.45}
+WEEKEND_MULTIPLIER = 1.3
+# Merchants of the expense descriptions, each category gets a few
+MERCHANTS = (
+    'Amazon Marketplace', 'Amazon Prime', 'Uber Trip', 'Uber Eats',
+    'Starbucks', 'Walmart', 'Target', 'Costco', 'Netflix', 'Spotify',
+    'Apple Store', 'Google Play', 'Shell Gas Station', 'Chevron',
+    'Whole Foods Market', 'Trader Joes', 'Home Depot', 'IKEA',
+    'Airbnb', 'Booking.com', 'Delta Air Lines', 'Lyft Ride', 'McDonalds',
+    'Chipotle', 'CVS Pharmacy', 'Walgreens', 'Best Buy', 'Etsy',
+    'PayPal Transfer', 'Steam Games', 'Disney Plus', 'Hulu', 'Zara',
+    'H&M', 'Nike Store', 'Sephora', 'Petco', 'Verizon Wireless',
+    'Comcast Xfinity', 'City Parking',
+)
+# Exponent of the power law of the spend per category, the n-th category
+# gets a share proportional to 1 / n ** SPEND_EXPONENT
+SPEND_EXPONENT = 1.2
+
+
+def fake_categories(user, income=2, expense=10):
+    # Salary first, then the expense categories by decreasing spend
+    categories = [TransactionCategoryFactory.build(
+        user=user, name='Salary' if i == 0 else 'Income %d' % i,
+        category_type=CATEGORY_TYPES.INCOME.value) for i in range(income)]
+    categories += [TransactionCategoryFactory.build(
+        user=user, name='Expense %d' % i) for i in range(expense)]
+    return categories
+
+
+def fake_transactions(rng, accounts, categories, start, months,
+                      daily_expenses=3):
+    # Yields the transactions of a user from the start date during the
+    # given months: a salary on the same day of each month, growing a bit
+    # every year, occasional extra incomes, and expenses spread over the
+    # categories with a power law, more on weekends and seasonal months
+    incomes = [c for c in categories
+               if c.category_type == CATEGORY_TYPES.INCOME.value]
+    expenses = [c for c in categories
+                if c.category_type == CATEGORY_TYPES.EXPENSE.value]
+    main_account = accounts[0]
+    salary = to_amount(rng.lognormvariate(8, 0.5))
+    pay_day = rng.randint(1, 28)
+    weights = [1 / (n + 1) ** SPEND_EXPONENT for n in range(len(expenses))]
+    # Typical amount of each expense, the categories with most spend also
+    # have larger amounts
+    scales = [rng.lognormvariate(3, 0.6) * (1 + 2 * weight)
+              for weight in weights]
+    merchants = [rng.sample(MERCHANTS, 4) for category in expenses]
+
+    day = start.replace(day=1)
+    for month in range(months):
+        days = calendar.monthrange(day.year, day.month)[1]
+        if incomes:
+            yield TransactionFactory.build(
+                amount=salary, description='Salary',
+                transaction_date=day.replace(day=pay_day),
+                category=incomes[0], account=main_account,
+                user=main_account.user)
+            if len(incomes) > 1 and rng.random() < 0.2:
+                yield TransactionFactory.build(
+                    amount=to_amount(float(salary) * rng.random()),
+                    description='Extra income',
+                    transaction_date=day.replace(day=rng.randint(1, days)),
+                    category=rng.choice(incomes[1:]), account=main_account,
+                    user=main_account.user)
+        for day_of_month in range(1, days + 1):
+            date = day.replace(day=day_of_month)
+            rate = daily_expenses * SEASONALITY[date.month]
+            if date.weekday() >= 5:
+                rate *= WEEKEND_MULTIPLIER
+            count = int(rate) + (rng.random() < rate - int(rate))
+            for i in range(count if expenses else 0):
+                n = rng.choices(range(len(expenses)), weights)[0]
+                amount = rng.lognormvariate(0, 0.75) * scales[n]
+                # Most of the rows, built without the factory as resolving
+                # its declarations takes longer than inserting them
+                yield Transaction(
+                    amount=to_amount(max(amount, 0.01)),
+                    description='%s %04d' % (rng.choice(merchants[n]),
+                                             rng.randrange(10000)),
+                    paid=rng.random() < 0.95,
+                    transaction_date=date, category=expenses[n],
+                    account=rng.choice(accounts), user=main_account.user)
+        day += datetime.timedelta(days=days)
+        if month % 12 == 11:
+            salary = to_amount(float(salary) * rng.uniform(1, 1.08))
+
+
+def to_amount(value):
+    return Decimal('%.2f' % value)
+
+
+def get_rng(seed, index):
+    # Random generator of the index-th user, independent of the others so
+    # the data doesn't depend on the order or process it is generated in
+    return random.Random(seed * 1000003 + index)
@@ -0,0 +1,162 @@
+import datetime
+import heapq
+import re
+from collections import defaultdict
+from operator import attrgetter
+
+from dateutil.rrule import rrule, rrulestr
+from django.db import transaction as db_transaction
+
+from core.ledger import get_transaction_entries, record_transactions
+from core.models import RecurringTransaction, Transaction
+
+# Rules processed per batch, each batch takes a fixed number of queries
+RECURRING_BATCH_SIZE = 1000
+# Occurrences are dates, so the rules repeat at most daily
+RULE_FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+FREQUENCY_RE = re.compile(r'(?:^|;)FREQ=(\w+)')
+# Times of the day would repeat the same date within a day
+TIME_PARTS_RE = re.compile(r'(?:^|;)(BYHOUR|BYMINUTE|BYSECOND)=')
+
+
+def parse_rule(rule, start_date):
+    # Returns the dateutil rrule of an RRULE string starting on start_date,
+    # raises ValueError if the string isn't a single daily or less
+    # frequent RRULE without its own DTSTART or times of the day
+    text = rule.strip().upper()
+    if text.startswith('RRULE:'):
+        text = text[len('RRULE:'):]
+    match = FREQUENCY_RE.search(text)
+    if 'DTSTART' in text or '\n' in text or match is None:
+        raise ValueError('Expected a single RRULE such as '
+                         'FREQ=MONTHLY;BYMONTHDAY=1')
+    if match.group(1) not in RULE_FREQUENCIES:
+        raise ValueError('FREQ must be one of: {}'.format(
+            ', '.join(RULE_FREQUENCIES)))
+    time_part = TIME_PARTS_RE.search(text)
+    if time_part is not None:
+        raise ValueError('{} is not supported, the occurrences are '
+                         'dates'.format(time_part.group(1)))
+    parsed = rrulestr(text, dtstart=to_datetime(start_date))
+    if not isinstance(parsed, rrule):
+        raise ValueError('Expected a single RRULE')
+    return parsed
+
+
+def to_datetime(date):
+    return datetime.datetime.combine(date, datetime.time())
+
+
+def iter_occurrences(recurring, start, end=None):
+    # Yields the dates of the occurrences of the rule from start to end,
+    # both included, lazily as the rules may have no end
+    parsed = parse_rule(recurring.rule, recurring.start_date)
+    for occurrence in parsed.xafter(to_datetime(start), inc=True):
+        date = occurrence.date()
+        if end is not None and date > end:
+            return
+        yield date
+
+
+def get_next_date(recurring, after=None):
+    # First occurrence after the given date, or from the start of the rule
+    parsed = parse_rule(recurring.rule, recurring.start_date)
+    if after is None:
+        occurrence = parsed.after(
+            to_datetime(recurring.start_date), inc=True)
+    else:
+        occurrence = parsed.after(to_datetime(after))
+    return occurrence.date() if occurrence else None
+
+
+def reschedule(recurring):
+    # Sets the next date of a new or edited rule, the occurrences already
+    # created stay as they are
+    recurring.next_date = get_next_date(
+        recurring, recurring.materialized_until)
+
+
+def build_occurrence(recurring, date):
+    return Transaction(
+        amount=recurring.amount, currency=recurring.account.currency,
+        description=recurring.description, paid=recurring.paid,
+        transaction_date=date,
+        category_id=recurring.category_id, account_id=recurring.account_id,
+        user_id=recurring.user_id, recurring=recurring)
+
+
+def project_occurrences(rules, end, start=None):
+    # Yields the occurrences of the rules not created yet up to the end
+    # date as unsaved transactions, merged by date. Nothing is stored and
+    # they are only computed as far as they are read
+    def occurrences(recurring):
+        first = recurring.next_date
+        if start is not None and start > first:
+            first = start
+        for date in iter_occurrences(recurring, first, end):
+            yield build_occurrence(recurring, date)
+
+    return heapq.merge(*(occurrences(recurring) for recurring in rules
+                         if recurring.next_date is not None),
+                       key=attrgetter('transaction_date'))
+
+
+@db_transaction.atomic
+def materialize_rules(rules, today):
+    # Creates the transactions of the occurrences of the rules due up to
+    # today and moves the rules to their next occurrence, with one query
+    # to skip the occurrences created already, one bulk insert, the ledger
+    # updates and one UPDATE of the rules per next date. Returns the
+    # number of transactions created
+    rules = [recurring for recurring in rules
+             if recurring.next_date is not None
+             and recurring.next_date <= today]
+    if not rules:
+        return 0
+
+    existing = set(Transaction.objects.filter(
+        recurring__in=rules,
+        transaction_date__gte=min(r.next_date for r in rules),
+    ).values_list('recurring_id', 'transaction_date'))
+    transactions = []
+    next_dates = defaultdict(list)
+    for recurring in rules:
+        for date in iter_occurrences(recurring, recurring.next_date, today):
+            if (recurring.id, date) not in existing:
+                transactions.append(build_occurrence(recurring, date))
+        recurring.materialized_until = today
+        recurring.next_date = get_next_date(recurring, today)
+        next_dates[recurring.next_date].append(recurring.id)
+
+    Transaction.objects.bulk_create(transactions)
+    record_transactions(added=get_transaction_entries(transactions, {
+        recurring.category_id: recurring.category.category_type
+        for recurring in rules}))
+    # The rules of a batch share few next dates, cheaper than bulk_update
+    for next_date, ids in next_dates.items():
+        RecurringTransaction.objects.filter(id__in=ids).update(
+            materialized_until=today, next_date=next_date)
+    return len(transactions)
+
+
+def materialize_due(today=None, rules=None, batch_size=RECURRING_BATCH_SIZE):
+    # Creates the due occurrences of every rule, or of the given queryset
+    # of rules, in batches locked while they are processed so concurrent
+    # runs skip them. Yields (rules, transactions) after each batch
+    if today is None:
+        today = datetime.date.today()
+    if rules is None:
+        rules = RecurringTransaction.objects.all()
+    due = rules.filter(next_date__lte=today).select_related(
+        'category', 'account').order_by('id')
+    last_id = 0
+    while True:
+        with db_transaction.atomic():
+            batch = list(due.select_for_update(
+                skip_locked=True, of=('self',)
+            ).filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return
+            created = materialize_rules(batch, today)
+        last_id = batch[-1].id
+        yield len(batch), created
@@ -0,0 +1,64 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.caching import LRUCache
+
+REFERENCE_CACHE = getattr(settings, 'REFERENCE_CACHE', 'default')
+REFERENCE_CACHE_TTL = getattr(settings, 'REFERENCE_CACHE_TTL', 60)
+REFERENCE_VERSION_TTL = getattr(settings, 'REFERENCE_VERSION_TTL', 60)
+REFERENCE_CACHE_SHARED_TTL = getattr(
+    settings, 'REFERENCE_CACHE_SHARED_TTL', 24 * 60 * 60)
+REFERENCE_MAX_AGE = getattr(settings, 'REFERENCE_MAX_AGE', 60 * 60)
+
+reference_cache = LRUCache(1000, REFERENCE_CACHE_TTL, 'reference')
+
+
+def get_version_key(model):
+    return 'reference_version:' + model._meta.label_lower
+
+
+def get_reference_version(model):
+    # Returns the version of the rows of a reference model, a digest of
+    # their values, so every worker finds the same version, and the same
+    # ETag, for the same rows. It is kept REFERENCE_VERSION_TTL seconds,
+    # which bounds how long a worker whose cache isn't shared with the one
+    # that changed the rows keeps serving the old ones
+    cache = caches[REFERENCE_CACHE]
+    key = get_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        rows = model._default_manager.order_by('pk').values_list()
+        version = hashlib.md5(repr(list(rows)).encode()).hexdigest()
+        cache.set(key, version, REFERENCE_VERSION_TTL)
+    return version
+
+
+def invalidate_reference(model):
+    # Called from the post_save and post_delete signals of the model, see
+    # core.signals. The next read computes the version of the new rows, the
+    # payloads of the old version are left to expire
+    caches[REFERENCE_CACHE].delete(get_version_key(model))
+    reference_cache.clear()
+
+
+def get_reference_payload(model, version, path, compute):
+    # Returns the payload of the path for this version of the model from
+    # the process cache, then the shared cache, computing it on a miss.
+    # compute returns None when there is nothing to cache
+    key = 'reference:{}:{}:{}'.format(
+        model._meta.label_lower, version, path)
+    payload = reference_cache.get(key)
+    if payload is not None:
+        return payload
+
+    cache = caches[REFERENCE_CACHE]
+    payload = cache.get(key)
+    if payload is None:
+        payload = compute()
+        if payload is None:
+            return None
+        cache.set(key, payload, REFERENCE_CACHE_SHARED_TTL)
+    reference_cache.set(key, payload)
+    return payload
@@ -0,0 +1,132 @@
+from collections import defaultdict
+from decimal import Decimal
+from itertools import islice
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, Q, Sum
+
+from core.models import Transaction, TransactionDailyRollup
+
+ROLLUP_KEY = ('user_id', 'account_id', 'category_id', 'day')
+ROLLUP_CHUNK_SIZE = 1000
+# Keys per locking SELECT, bounds the size of its query
+ROLLUP_LOCK_CHUNK_SIZE = 200
+CENT = Decimal('0.01')
+
+
+def apply_rollup_entries(added=(), removed=()):
+    # Adds and removes the entries (see core.ledger) from the daily
+    # rollups of their (user, account, category, day)
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for sign, entries in ((1, added), (-1, removed)):
+        for entry in entries:
+            key = (entry.user_id, entry.account_id, entry.category_id,
+                   entry.transaction_date)
+            deltas[key][0] += sign * Decimal(entry.amount)
+            deltas[key][1] += sign
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    try:
+        with db_transaction.atomic():
+            apply_rollup_deltas(deltas)
+    except IntegrityError:
+        # A concurrent request created one of the new rollups, this time it
+        # is locked and updated instead
+        apply_rollup_deltas(deltas)
+
+
+def apply_rollup_deltas(deltas):
+    # Locks the touched rollups with one SELECT per ROLLUP_LOCK_CHUNK_SIZE
+    # keys and writes them back with one bulk UPDATE, INSERT and DELETE
+    existing = {}
+    keys = sorted(deltas)
+    for start in range(0, len(keys), ROLLUP_LOCK_CHUNK_SIZE):
+        # The columns of the keys of each user. Listing them for all the
+        # users at once makes the lookups of the unique index the cross
+        # product of every user, day, account and category
+        columns = defaultdict(lambda: (set(), set(), set()))
+        for user_id, account_id, category_id, day in keys[
+                start:start + ROLLUP_LOCK_CHUNK_SIZE]:
+            days, accounts, categories = columns[user_id]
+            days.add(day)
+            accounts.add(account_id)
+            categories.add(category_id)
+        condition = Q()
+        for user_id, (days, accounts, categories) in columns.items():
+            condition |= Q(user_id=user_id, day__in=days,
+                           account_id__in=accounts,
+                           category_id__in=categories)
+        rollups = TransactionDailyRollup.objects.select_for_update().filter(
+            condition)
+        for rollup in rollups:
+            key = tuple(getattr(rollup, name) for name in ROLLUP_KEY)
+            if key in deltas:
+                existing[key] = rollup
+
+    to_update, to_create, to_delete = [], [], []
+    for key, (total, count) in deltas.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            to_create.append(TransactionDailyRollup(
+                total=total, count=count, **dict(zip(ROLLUP_KEY, key))))
+            continue
+        rollup.total += total
+        rollup.count += count
+        if rollup.count > 0:
+            to_update.append(rollup)
+        else:
+            # Drop the days left without transactions
+            to_delete.append(rollup.id)
+
+    if to_update:
+        TransactionDailyRollup.objects.bulk_update(
+            to_update, ['total', 'count'])
+    if to_create:
+        TransactionDailyRollup.objects.bulk_create(to_create)
+    if to_delete:
+        TransactionDailyRollup.objects.filter(id__in=to_delete).delete()
+
+
+def compute_rollups(transactions):
+    # Yields the rollups of the given transactions computed from scratch
+    rows = transactions.order_by().values(
+        'user_id', 'account_id', 'category_id', 'transaction_date'
+    ).annotate(total=Sum('amount'), count=Count('id'))
+    for row in rows.iterator():
+        yield TransactionDailyRollup(
+            user_id=row['user_id'], account_id=row['account_id'],
+            category_id=row['category_id'], day=row['transaction_date'],
+            # SQLite sums the decimals as floats
+            total=row['total'].quantize(CENT), count=row['count'])
+
+
+def check_rollups(user):
+    # Returns the keys whose stored rollup doesn't match the transactions
+    # of the user as (key, stored (total, count), computed (total, count))
+    stored = {
+        tuple(row[:4]): row[4:] for row in
+        TransactionDailyRollup.objects.filter(user=user).values_list(
+            *ROLLUP_KEY, 'total', 'count')
+    }
+    mismatches = []
+    for rollup in compute_rollups(Transaction.objects.filter(user=user)):
+        key = tuple(getattr(rollup, name) for name in ROLLUP_KEY)
+        computed = (rollup.total, rollup.count)
+        stored_value = stored.pop(key, None)
+        if stored_value != computed:
+            mismatches.append((key, stored_value, computed))
+    mismatches += [(key, value, None) for key, value in stored.items()]
+    return mismatches
+
+
+@db_transaction.atomic
+def rebuild_rollups(user):
+    # Replaces the rollups of the user with the ones computed from scratch
+    TransactionDailyRollup.objects.filter(user=user).delete()
+    rollups = compute_rollups(Transaction.objects.filter(user=user))
+    while True:
+        chunk = list(islice(rollups, ROLLUP_CHUNK_SIZE))
+        if not chunk:
+            break
+        TransactionDailyRollup.objects.bulk_create(chunk)
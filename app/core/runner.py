@@ -0,0 +1,22 @@
+import tempfile
+
+from django.test.runner import DiscoverRunner
+
+from core import metrics
+
+
+class TestRunner(DiscoverRunner):
+    # Records the metrics of the test run in a directory of its own,
+    # removed at the end, instead of adding them to the METRICS_DIR of the
+    # workers
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.metrics_registry = metrics.registry
+        metrics.registry = metrics.MetricsRegistry(self.metrics_dir.name)
+
+    def teardown_test_environment(self, **kwargs):
+        metrics.registry = self.metrics_registry
+        self.metrics_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
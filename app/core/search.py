@@ -0,0 +1,109 @@
+import re
+
+from django.db import connections
+from django.db.models import CharField, FloatField, Q, Value
+from django.db.models.functions import Cast, Length, Lower, Replace
+from django.db.models.lookups import IContains
+
+# Annotation with the relevance of each result, higher is better
+SEARCH_RANK = 'search_rank'
+WORD_RE = re.compile(r'\w+')
+
+# FTS5 table of the descriptions kept in sync by triggers, see the
+# 0023_transaction_search migration. It is joined instead of queried in a
+# subquery per row, which computes the bm25 statistics of the whole match
+# again for every row: 290ms instead of 30ms for a common word over 500k
+# transactions
+SQLITE_FTS_TABLE = 'core_transaction_fts'
+SQLITE_WHERE = [
+    'core_transaction_fts.rowid = core_transaction.id',
+    'core_transaction_fts MATCH %s',
+]
+SQLITE_RANK_SQL = '-core_transaction_fts.rank'
+
+
+@CharField.register_lookup
+class TrigramContains(IContains):
+    # icontains compiled by Postgres as description ILIKE '%word%', the
+    # expression the gin_trgm_ops index of the 0023_transaction_search
+    # migration serves. Django's icontains compiles to UPPER(description::
+    # text) LIKE UPPER(...), which the index can't serve. Over 2M
+    # transactions a rare word takes 3ms instead of 400ms, 3ms instead of
+    # 75ms within the 200k of a user, and a word in 3% of them 56ms instead
+    # of 90ms, most of it ranking every match
+    lookup_name = 'trigram_contains'
+
+    def as_sql(self, compiler, connection):
+        return IContains(self.lhs, self.rhs).as_sql(compiler, connection)
+
+    def as_postgresql(self, compiler, connection):
+        # The plain column, without the cast and UPPER of process_lhs
+        lhs_sql, params = compiler.compile(self.lhs)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        params.extend(rhs_params)
+        return '{} ILIKE {}'.format(lhs_sql, rhs_sql), params
+
+
+def search_transactions(queryset, text):
+    # Keeps the transactions whose description has all the words of the
+    # text, annotated with their SEARCH_RANK. Postgres filters with ILIKE,
+    # served by the trigram index, and ranks by the occurrences of the
+    # words, then by trigram similarity. SQLite
+    # uses its FTS5 index with prefix matching and bm25
+    words = WORD_RE.findall(text)
+    if not words:
+        return queryset
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+        condition = Q()
+        rank = TrigramSimilarity('description', ' '.join(words))
+        for word in words:
+            condition &= Q(description__trigram_contains=word)
+            rank += get_occurrences('description', word)
+        # As a double, whose text round-trips, so the cursors of the
+        # ranked pages compare equal, see filter_rank_position
+        return queryset.filter(condition).annotate(**{
+            SEARCH_RANK: Cast(rank, FloatField())})
+
+    if vendor == 'sqlite':
+        match = ' '.join('"{}"*'.format(word) for word in words)
+        return queryset.extra(
+            tables=[SQLITE_FTS_TABLE], where=SQLITE_WHERE, params=[match],
+            select={SEARCH_RANK: SQLITE_RANK_SQL})
+
+    condition = Q()
+    for word in words:
+        condition &= Q(description__icontains=word)
+    return queryset.filter(condition).annotate(**{
+        SEARCH_RANK: Value(0, output_field=FloatField())})
+
+
+def get_occurrences(field, word):
+    # Times the word appears in the field, ignoring the case
+    text = Lower(field)
+    return (Length(text) - Length(Replace(text, Value(word.lower())))) \
+        / len(word)
+
+
+def is_ranked(queryset):
+    # Whether the queryset comes from search_transactions
+    query = queryset.query
+    return SEARCH_RANK in query.annotations or SEARCH_RANK in query.extra
+
+
+def filter_rank_position(queryset, rank, pk, lookup):
+    # Keeps the results of search_transactions after the position (rank,
+    # id), lookup is 'lt' for the descending order and 'gt' for the
+    # ascending one. The SQLite rank is an extra select, compared in SQL
+    if SEARCH_RANK in queryset.query.extra:
+        operator = '<' if lookup == 'lt' else '>'
+        return queryset.extra(where=[
+            '({rank} {op} %s OR ({rank} = %s AND '
+            'core_transaction.id {op} %s))'.format(
+                rank=SQLITE_RANK_SQL, op=operator)],
+            params=[rank, rank, pk])
+    return queryset.filter(
+        Q(**{'{}__{}'.format(SEARCH_RANK, lookup): rank}) |
+        Q(**{SEARCH_RANK: rank, 'id__{}'.format(lookup): pk}))
@@ -1,4 +1,11 @@
-from rest_framework import serializers
+import datetime
+import decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from core.instrumentation import measure
 
 
 class FilteredListSerializerByUser(serializers.ListSerializer):
@@ -6,3 +13,184 @@ class FilteredListSerializerByUser(serializers.ListSerializer):
     def to_representation(self, data):
         data = data.filter(user=self.context.get('request').user)
         return super(FilteredListSerializerByUser, self).to_representation(data)
+
+
+class UserOwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    # Only accepts objects owned by the user of the request
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            user=self.context['request'].user)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with measure('serializer'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    # Adds the time taken by the data of the serializer, or of its list
+    # with many=True, to the serializer timing of core.middleware
+    @property
+    def data(self):
+        with measure('serializer'):
+            return super().data
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_serializer = super().many_init(*args, **kwargs)
+        if type(list_serializer) is serializers.ListSerializer:
+            list_serializer.__class__ = TimedListSerializer
+        return list_serializer
+
+
+class SparseFieldsSerializerMixin:
+    # Takes the names of the fields to keep in `fields` or to drop in
+    # `exclude`, see core.mixins.SparseFieldsMixin
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in exclude or ():
+            self.fields.pop(name, None)
+
+
+class ExpandableFieldsSerializerMixin:
+    # Replaces the primary keys of the relations named in `expand` with the
+    # nested serializer declared for them in expandable_fields. Nested
+    # relations are named with dots, like account.account_type, and need
+    # the nested serializer to be expandable too
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+        nested = {}
+        for path in expand or ():
+            name, _, rest = path.partition('.')
+            nested.setdefault(name, [])
+            if rest:
+                nested[name].append(rest)
+        for name, paths in nested.items():
+            serializer_class = self.expandable_fields[name]
+            if paths:
+                self.fields[name] = serializer_class(
+                    read_only=True, expand=paths)
+            else:
+                self.fields[name] = serializer_class(read_only=True)
+
+    @classmethod
+    def get_expandable_paths(cls):
+        paths = []
+        for name, serializer_class in cls.expandable_fields.items():
+            paths.append(name)
+            paths += [name + '.' + path for path in getattr(
+                serializer_class, 'get_expandable_paths', list)()]
+        return paths
+
+
+class ValuesSerializer:
+    # Read only counterpart of a ModelSerializer for large lists. Rows come
+    # from values_list() and each value goes through a converter compiled
+    # once from the serializer field, giving the same data as the
+    # serializer without building model instances and field calls per
+    # value. Use compile(), which returns None for unsupported serializers
+
+    def __init__(self, columns, fields):
+        # columns: model columns to fetch, fields: (name, column index,
+        # converter or None) in the order of the serializer
+        self.columns = columns
+        self.fields = fields
+
+    @classmethod
+    def compile(cls, serializer):
+        model = serializer.Meta.model
+        columns, fields = [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            column, converter = cls.compile_field(model, field)
+            if column is None:
+                return None
+            if column not in columns:
+                columns.append(column)
+            fields.append((name, columns.index(column), converter))
+        return cls(columns, fields)
+
+    @staticmethod
+    def compile_field(model, field):
+        # Returns (column, converter) of a serializer field, column is None
+        # when the field can't be served from a single column
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None, None
+        if not model_field.concrete or model_field.many_to_many:
+            return None, None
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None or not model_field.many_to_one:
+                return None, None
+            return model_field.attname, None
+        if model_field.is_relation:
+            return None, None
+
+        if isinstance(field, serializers.DecimalField):
+            if field.localize or field.decimal_places is None:
+                return None, None
+            return model_field.attname, compile_decimal(field)
+        if isinstance(field, serializers.DateTimeField):
+            return None, None
+        if isinstance(field, serializers.DateField):
+            return model_field.attname, compile_date(field)
+        if isinstance(field, serializers.BooleanField):
+            return model_field.attname, bool
+        if isinstance(field, serializers.IntegerField):
+            return model_field.attname, int
+        if isinstance(field, serializers.CharField):
+            return model_field.attname, str
+        return None, None
+
+    def to_representation(self, rows):
+        fields = self.fields
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, converter in fields:
+                value = row[index]
+                if value is not None and converter is not None:
+                    value = converter(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+
+def compile_decimal(field):
+    # Same output as DecimalField.to_representation
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+    if getattr(field, 'coerce_to_string',
+               api_settings.COERCE_DECIMAL_TO_STRING):
+        return lambda value: '{:f}'.format(decimal.Decimal(value).quantize(
+            exponent, rounding=rounding, context=context))
+    return lambda value: decimal.Decimal(value).quantize(
+        exponent, rounding=rounding, context=context)
+
+
+def compile_date(field):
+    # Same output as DateField.to_representation
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() == ISO_8601:
+        return datetime.date.isoformat
+    return lambda value: value.strftime(output_format)
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token
+from core.models import AccountType, UserDataVersion
+from core.reference import invalidate_reference
+
+# Models served by viewsets with core.mixins.CachedReferenceMixin
+REFERENCE_MODELS = (AccountType,)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def create_data_version(sender, instance, created, raw=False, **kwargs):
+    # The version is only updated afterwards, see core.versions
+    if created and not raw:
+        UserDataVersion.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    # A cached user must not outlive a deactivation or an edit of its data
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+            'key', flat=True):
+        invalidate_token(key)
+
+
+def invalidate_reference_model(sender, **kwargs):
+    invalidate_reference(sender)
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(invalidate_reference_model, sender=model)
+    post_delete.connect(invalidate_reference_model, sender=model)
@@ -1,7 +1,12 @@
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 
+from core import models
+from core.admin import EstimatedCountPaginator
+
 
 class AdminSiteTests(TestCase):
 
@@ -36,3 +41,125 @@ class AdminSiteTests(TestCase):
         url = reverse('admin:core_user_add')
         res = self.client.get(url)
         self.assertEqual(res.status_code, 200)
+
+    def test_transactions_changelist_constant_queries(self):
+        # Test the number of queries doesn't grow with the listed rows
+        account = models.Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=models.AccountType.objects.create(name='Wallet'))
+        url = reverse('admin:core_transaction_changelist')
+
+        query_counts = []
+        for i in range(2):
+            category = models.TransactionCategory.objects.create(
+                name='Food %d' % i, user=self.user,
+                category_type=models.CATEGORY_TYPES.EXPENSE.value)
+            for j in range(5):
+                models.Transaction.objects.create(
+                    amount=10, description='Lunch %d' % j,
+                    category=category, account=account)
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            query_counts.append(len(queries))
+
+        self.assertContains(res, 'Food 1_%d' % self.user.id)
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_transactions_filtered_by_paid(self):
+        # Test the changelist filters on the indexed paid column
+        account = models.Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=models.AccountType.objects.create(name='Wallet'))
+        category = models.TransactionCategory.objects.create(
+            name='Food', user=self.user,
+            category_type=models.CATEGORY_TYPES.EXPENSE.value)
+        for description, paid in (('Lunch', True), ('Dinner', False)):
+            models.Transaction.objects.create(
+                amount=10, description=description, paid=paid,
+                category=category, account=account)
+
+        res = self.client.get(
+            reverse('admin:core_transaction_changelist') + '?paid__exact=0')
+        self.assertContains(res, 'Dinner')
+        self.assertNotContains(res, 'Lunch')
+        self.assertIn('transaction_paid_date_idx', [
+            index.name for index in models.Transaction._meta.indexes])
+
+    def test_categories_changelist(self):
+        # Test the categories changelist shows their owner
+        models.TransactionCategory.objects.create(
+            name='Rent', user=self.user,
+            category_type=models.CATEGORY_TYPES.EXPENSE.value)
+        res = self.client.get(
+            reverse('admin:core_transactioncategory_changelist'))
+        self.assertContains(res, 'testuser@normal.com')
+
+    def test_transaction_add_page(self):
+        # Test the transaction form doesn't list every category
+        res = self.client.get(reverse('admin:core_transaction_add'))
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'admin-autocomplete')
+
+    def test_transaction_writes_update_balances(self):
+        # Test the admin edits and deletes go through the ledger
+        account = models.Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=models.AccountType.objects.create(name='Wallet'))
+        category = models.TransactionCategory.objects.create(
+            name='Food', user=self.user,
+            category_type=models.CATEGORY_TYPES.EXPENSE.value)
+        payload = {
+            'amount': '10.00', 'description': 'Lunch', 'paid': 'on',
+            'transaction_date': '2026-03-02', 'category': category.id,
+            'account': account.id, 'user': self.user.id,
+        }
+
+        self.client.post(reverse('admin:core_transaction_add'), payload)
+        transaction = models.Transaction.objects.get()
+        self.client.post(
+            reverse('admin:core_transaction_change', args=[transaction.id]),
+            {**payload, 'amount': '25.00'})
+
+        account.refresh_from_db()
+        self.assertEqual(str(account.balance), '-25.00')
+        self.assertEqual(models.TransactionDailyRollup.objects.get().total,
+                         25)
+
+        self.client.post(reverse('admin:core_transaction_changelist'), {
+            'action': 'delete_selected', 'post': 'yes',
+            '_selected_action': [transaction.id]})
+
+        account.refresh_from_db()
+        self.assertFalse(models.Transaction.objects.exists())
+        self.assertEqual(account.balance, 0)
+        self.assertFalse(models.TransactionDailyRollup.objects.exists())
+
+    def test_account_balances_read_only(self):
+        # Test the balances of an account can't be edited in the admin
+        account = models.Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=models.AccountType.objects.create(name='Wallet'))
+
+        self.client.post(
+            reverse('admin:core_account_change', args=[account.id]), {
+                'name': 'Wallet', 'description': 'Cash',
+                'account_type': account.account_type_id,
+                'currency': 'USD', 'user': self.user.id,
+                'balance': '100.00', 'pending_balance': '5.00'})
+
+        account.refresh_from_db()
+        self.assertEqual(account.name, 'Wallet')
+        self.assertEqual(account.balance, 0)
+        self.assertEqual(account.pending_balance, 0)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+
+    def test_exact_count_without_estimate(self):
+        # Test SQLite, or a filtered list, is counted exactly
+        get_user_model().objects.create_user(
+            email='user@domain.com', password='Test1234')
+        paginator = EstimatedCountPaginator(
+            get_user_model().objects.order_by('id'), 10)
+        self.assertEqual(paginator.count, 1)
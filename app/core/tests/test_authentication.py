@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.authentication import token_cache
+from core.caching import LRUCache
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    # Test the users of the auth tokens are cached and invalidated
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234', name='User')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_cached_token_skips_query(self):
+        # Test the second request is authenticated without queries
+        self.client.get(ME_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(len(queries), 0)
+
+    def test_deleted_token_invalidated(self):
+        # Test a deleted token stops authenticating
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        # Test the token of a deactivated user stops authenticating
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_not_stale(self):
+        # Test the cached user is refreshed after an edit
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'New name'})
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['name'], 'New name')
+
+    def test_revoked_in_other_workers(self):
+        # Test a worker stops using its cached user once the token is
+        # deleted or the user deactivated through another worker
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch('core.authentication.TOKEN_CACHE_SHARED',
+                             'default')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client.get(ME_URL)
+        entries = token_cache.entries.copy()
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 0)
+
+        # The invalidation only clears the cache of the worker saving
+        self.user.is_active = False
+        self.user.save()
+        token_cache.entries.update(entries)
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+        self.client.get(ME_URL)
+        entries = token_cache.entries.copy()
+        self.token.delete()
+        token_cache.entries.update(entries)
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def test_least_recently_used_evicted(self):
+        # Test the oldest entry is dropped when the cache is full
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    def test_expired_entry_missing(self):
+        # Test an entry isn't returned after its ttl
+        cache = LRUCache(max_size=2, ttl=-1)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
@@ -0,0 +1,237 @@
+import datetime
+import io
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.currencies import load_rates
+from core.models import Transaction, Account, AccountType, \
+    TransactionCategory, CATEGORY_TYPES
+
+TRANSACTIONS_URL = reverse('transactions:transactions-list')
+ACCOUNTS_BALANCES_URL = reverse('accounts-balances')
+
+
+def get_detail_transactions_url(transaction):
+    return reverse('transactions:transactions-detail', args=(transaction.id,))
+
+
+def get_detail_category_url(category):
+    return reverse('categories:transaction_category-detail',
+                   args=(category.id,))
+
+
+class AccountBalanceTests(APITestCase):
+    # Test the account balances follow the writes of transactions
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        account_type = AccountType.objects.create(name='Wallet')
+        self.account = Account.objects.create(
+            name='Wallet', description='Cash', account_type=account_type,
+            user=self.user)
+        self.another_account = Account.objects.create(
+            name='Bank', description='Bank', account_type=account_type,
+            user=self.user)
+        self.income = TransactionCategory.objects.create(
+            name='Salary', category_type=CATEGORY_TYPES.INCOME.value,
+            user=self.user)
+        self.expense = TransactionCategory.objects.create(
+            name='Food', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def create_transaction(self, amount, category, paid=True, account=None):
+        res = self.client.post(TRANSACTIONS_URL, {
+            'amount': amount,
+            'description': 'Transaction',
+            'paid': paid,
+            'category': category.id,
+            'account': (account or self.account).id,
+        })
+        return Transaction.objects.get(id=res.data['id'])
+
+    def assertBalance(self, account, balance, pending_balance):
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal(balance))
+        self.assertEqual(account.pending_balance, Decimal(pending_balance))
+
+    def test_create_transactions_update_balance(self):
+        # Test incomes add and expenses subtract, split by payment state
+        self.create_transaction('1000.00', self.income)
+        self.create_transaction('150.50', self.expense)
+        self.create_transaction('20.00', self.expense, paid=False)
+
+        self.assertBalance(self.account, '849.50', '-20.00')
+
+    def test_update_transaction_moves_balance(self):
+        # Test editing the amount, category and account of a transaction
+        transaction = self.create_transaction('100.00', self.income)
+
+        self.client.patch(get_detail_transactions_url(transaction), {
+            'amount': '30.00',
+            'category': self.expense.id,
+            'account': self.another_account.id,
+            'paid': False,
+        })
+
+        self.assertBalance(self.account, '0.00', '0.00')
+        self.assertBalance(self.another_account, '0.00', '-30.00')
+
+    def test_delete_transaction_updates_balance(self):
+        # Test deleting a transaction removes its amount
+        self.create_transaction('100.00', self.income)
+        transaction = self.create_transaction('40.00', self.expense)
+
+        self.client.delete(get_detail_transactions_url(transaction))
+
+        self.assertBalance(self.account, '100.00', '0.00')
+
+    def test_change_category_type_updates_balance(self):
+        # Test turning an expense category into an income one
+        self.create_transaction('40.00', self.expense)
+
+        self.client.patch(get_detail_category_url(self.expense),
+                          {'category_type': CATEGORY_TYPES.INCOME.value})
+
+        self.assertBalance(self.account, '40.00', '0.00')
+
+    def test_delete_category_updates_balance(self):
+        # Test deleting a category removes its transactions from balances
+        self.create_transaction('100.00', self.income)
+        self.create_transaction('40.00', self.expense)
+
+        self.client.delete(get_detail_category_url(self.expense))
+
+        self.assertBalance(self.account, '100.00', '0.00')
+
+    def test_balance_exposed_in_accounts_api(self):
+        # Test the accounts list shows the balances
+        self.create_transaction('10.00', self.income, paid=False)
+
+        res = self.client.get(reverse('accounts-detail',
+                                      args=(self.account.id,)))
+
+        self.assertEqual(res.data['balance'], '0.00')
+        self.assertEqual(res.data['pending_balance'], '10.00')
+
+    def test_rebuild_balances_command(self):
+        # Test checking and fixing balances that drifted
+        self.create_transaction('10.00', self.income)
+        Account.objects.filter(id=self.account.id).update(balance=99)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_balances', check=True, stdout=io.StringIO())
+        call_command('rebuild_balances', stdout=io.StringIO())
+
+        self.assertBalance(self.account, '10.00', '0.00')
+        call_command('rebuild_balances', check=True, stdout=io.StringIO())
+
+
+class BalanceSeriesTests(APITestCase):
+    # Test the balance series are rebuilt from the stored balances
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        account_type = AccountType.objects.create(name='Wallet')
+        self.account = Account.objects.create(
+            name='Wallet', description='Cash', account_type=account_type,
+            user=self.user)
+        self.another_account = Account.objects.create(
+            name='Bank', description='Bank', account_type=account_type,
+            user=self.user)
+        self.income = TransactionCategory.objects.create(
+            name='Salary', category_type=CATEGORY_TYPES.INCOME.value,
+            user=self.user)
+        self.expense = TransactionCategory.objects.create(
+            name='Food', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.client.force_authenticate(self.user)
+        for amount, category, date, paid, account in (
+                ('1000.00', self.income, '2026-01-31', True, self.account),
+                ('200.00', self.expense, '2026-02-02', True, self.account),
+                ('50.00', self.expense, '2026-02-02', False, self.account),
+                ('300.00', self.income, '2026-02-10', True,
+                 self.another_account),
+                ('100.00', self.expense, '2026-03-01', True, self.account)):
+            self.client.post(TRANSACTIONS_URL, {
+                'amount': amount, 'description': 'Transaction',
+                'paid': paid, 'transaction_date': date,
+                'category': category.id, 'account': account.id})
+
+    def get_series(self, **params):
+        return self.client.get(ACCOUNTS_BALANCES_URL + '?' + urlencode(
+            params))
+
+    def test_daily_balance_series(self):
+        # Test the balance at the end of each day of the range
+        res = self.get_series(date_gte='2026-01-30', date_lte='2026-02-02',
+                              account=self.account.id)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['dates'], [
+            '2026-01-30', '2026-01-31', '2026-02-01', '2026-02-02'])
+        self.assertEqual(res.data['accounts'], [{
+            'account': self.account.id, 'currency': 'USD',
+            'balances': ['0.00', '1000.00', '1000.00', '750.00']}])
+        self.assertEqual(res.data['net_worth'], res.data['accounts'][0][
+            'balances'])
+
+    def test_monthly_net_worth(self):
+        # Test the periods end on the last day of each month or of the
+        # range, with the paid transactions only
+        with self.assertNumQueries(3):
+            res = self.get_series(date_gte='2026-01-15',
+                                  date_lte='2026-02-20',
+                                  interval='month', paid=True)
+
+        self.assertEqual(res.data['dates'], ['2026-01-31', '2026-02-20'])
+        self.assertEqual(res.data['currency'], 'USD')
+        self.assertEqual(res.data['net_worth'], ['1000.00', '1100.00'])
+        res = self.get_series(date_gte='2026-02-16', date_lte='2026-03-04',
+                              interval='week')
+        self.assertEqual(res.data['dates'], [
+            '2026-02-22', '2026-03-01', '2026-03-04'])
+        self.assertEqual(res.data['net_worth'], [
+            '1050.00', '950.00', '950.00'])
+
+    def test_net_worth_several_currencies(self):
+        # Test the accounts in another currency are converted with the
+        # rates of each date, and only when a currency is given
+        Account.objects.filter(id=self.another_account.id).update(
+            currency='EUR')
+        Transaction.objects.filter(account=self.another_account).update(
+            currency='EUR')
+        load_rates([('USD', datetime.date(2026, 2, 1), Decimal('1.25'))],
+                   fill_until=datetime.date(2026, 3, 31))
+
+        res = self.get_series(date_gte='2026-02-01', date_lte='2026-03-31',
+                              interval='month')
+        self.assertIsNone(res.data['net_worth'])
+
+        res = self.get_series(date_gte='2026-02-01', date_lte='2026-03-31',
+                              interval='month', currency='USD')
+        self.assertEqual(res.data['net_worth'], ['1125.00', '1025.00'])
+        res = self.get_series(date_gte='2026-01-01', date_lte='2026-03-31',
+                              interval='month', currency='USD')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_balance_series_invalid_query(self):
+        # Test the range, interval and account are validated
+        another_user = get_user_model().objects.create_user(
+            email='another@domain.com', password='Test1234')
+        another_account = Account.objects.create(
+            name='Wallet', description='Cash', user=another_user,
+            account_type=self.account.account_type)
+        for params in ({'date_gte': '2026-02-01', 'date_lte': '2026-01-01'},
+                       {'date_gte': '2000-01-01', 'date_lte': '2026-01-01'},
+                       {'interval': 'year'},
+                       {'account': another_account.id}):
+            res = self.get_series(**params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,69 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.benchmarks import percentile, seed_dataset, run_benchmarks
+from core.models import Account, RecurringTransaction, Transaction, \
+    TransactionDailyRollup
+
+
+class BenchmarkTests(TestCase):
+    # Test the benchmark harness on a tiny dataset
+
+    def test_seed_dataset(self):
+        # Test the users get their accounts, categories and transactions
+        users = seed_dataset(users=2, accounts=2, categories=3,
+                             transactions=20)
+
+        self.assertEqual(len(users), 2)
+        self.assertEqual(Account.objects.filter(user=users[1]).count(), 2)
+        self.assertEqual(Transaction.objects.filter(user=users[1]).count(),
+                         20)
+        self.assertTrue(TransactionDailyRollup.objects.filter(
+            user=users[1]).exists())
+        self.assertEqual(RecurringTransaction.objects.filter(
+            user=users[1]).count(), 5)
+
+    def test_run_benchmarks(self):
+        # Test every endpoint answers and is measured
+        user = seed_dataset(users=1, accounts=2, categories=3,
+                            transactions=20)[0]
+        results = run_benchmarks(user, requests=2)
+
+        self.assertIn('transactions list', results)
+        self.assertIn('admin transactions', results)
+        for name in ('transactions projected', 'recurring detail',
+                     'budgets report', 'accounts totals'):
+            self.assertIn(name, results)
+        for name, result in results.items():
+            self.assertTrue(all(200 <= code < 300
+                                for code in result['status']), name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['bytes'], 0)
+        self.assertGreater(results['transactions list']['queries'], 0)
+
+    def test_command_writes_json(self):
+        # Test the results are written as JSON
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command('benchmark_api', users=1, transactions=10,
+                         requests=1, only=['transactions list'],
+                         output=path, stdout=io.StringIO())
+            with open(path) as output:
+                results = json.load(output)
+
+        self.assertEqual(list(results['endpoints']), ['transactions list'])
+        self.assertEqual(results['dataset']['transactions'], 10)
+        # The dataset is rolled back
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_percentile(self):
+        # Test the nearest rank percentiles
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
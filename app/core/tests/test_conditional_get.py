@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.models import Transaction, Account, AccountType, \
+    TransactionCategory, CATEGORY_TYPES
+
+TRANSACTIONS_URL = reverse('transactions:transactions-list')
+CATEGORIES_URL = reverse('categories:transaction_category-list')
+ACCOUNTS_URL = reverse('accounts-list')
+ME_URL = reverse('user:me')
+
+
+class ConditionalGetTests(APITestCase):
+    # Test the lists and details answer 304 while the user data is unchanged
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        self.another_user = get_user_model().objects.create_user(
+            email='another@domain.com', password='Test1234')
+        self.account = Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=AccountType.objects.create(name='Wallet'))
+        self.category = TransactionCategory.objects.create(
+            name='Food', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.transaction = Transaction.objects.create(
+            amount=10, description='Lunch', category=self.category,
+            account=self.account)
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_list_not_modified(self):
+        # Test the ETag of an unchanged list gives a 304 with a single query
+        res = self.client.get(TRANSACTIONS_URL)
+        self.assertIn('ETag', res)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TRANSACTIONS_URL,
+                                  HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(res.content)
+
+    def test_unchanged_detail_not_modified(self):
+        # Test the conditional GET of a transaction detail
+        url = reverse('transactions:transactions-detail',
+                      args=(self.transaction.id,))
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_depends_on_query(self):
+        # Test the filtered lists have their own ETag
+        etag = self.client.get(TRANSACTIONS_URL)['ETag']
+
+        res = self.client.get(TRANSACTIONS_URL + '?paid=true',
+                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_write_changes_etag(self):
+        # Test the writes of transactions, categories and accounts
+        writes = [
+            lambda: self.client.post(TRANSACTIONS_URL, {
+                'amount': 5, 'description': 'Coffee',
+                'category': self.category.id, 'account': self.account.id}),
+            lambda: self.client.post(CATEGORIES_URL, {
+                'name': 'Rent', 'category_type': 'EX'}),
+            lambda: self.client.patch(
+                reverse('accounts-detail', args=(self.account.id,)),
+                {'name': 'Cash'}),
+        ]
+        for write in writes:
+            etag = self.client.get(CATEGORIES_URL)['ETag']
+            write()
+            res = self.client.get(CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_stale_user_save_keeps_version(self):
+        # Test saving a stale copy of the user, such as a cached one, doesn't
+        # bring back an older data version
+        stale_user = get_user_model().objects.get(id=self.user.id)
+        self.client.post(CATEGORIES_URL, {'name': 'Rent',
+                                          'category_type': 'EX'})
+        etag = self.client.get(CATEGORIES_URL)['ETag']
+
+        self.client.force_authenticate(stale_user)
+        self.client.patch(ME_URL, {'name': 'New name'})
+        self.client.force_authenticate(self.user)
+        self.client.post(CATEGORIES_URL, {'name': 'Salary',
+                                          'category_type': 'IN'})
+
+        res = self.client.get(CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 3)
+
+    def test_other_user_write_keeps_etag(self):
+        # Test the writes of other users don't invalidate the lists
+        etag = self.client.get(ACCOUNTS_URL)['ETag']
+        self.client.force_authenticate(self.another_user)
+        self.client.post(CATEGORIES_URL, {'name': 'Rent',
+                                          'category_type': 'EX'})
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(ACCOUNTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        # Test the Last-Modified date can be used instead of the ETag
+        self.client.post(CATEGORIES_URL, {'name': 'Rent',
+                                          'category_type': 'EX'})
+        last_modified = self.client.get(CATEGORIES_URL)['Last-Modified']
+
+        res = self.client.get(CATEGORIES_URL,
+                              HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,212 @@
+import csv
+import datetime
+import io
+import os
+import tempfile
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.currencies import MissingRateError, check_rates, load_rates, \
+    read_rates
+from core.models import Account, AccountType, ExchangeRate, Transaction, \
+    TransactionCategory, CATEGORY_TYPES
+from core.rollups import rebuild_rollups
+
+TRANSACTIONS_BULK_URL = reverse('transactions:transactions-bulk')
+TRANSACTIONS_EXPORT_URL = reverse('transactions:transactions-export')
+TRANSACTIONS_SUMMARY_URL = reverse('transactions:transactions-summary')
+ACCOUNTS_TOTALS_URL = reverse('accounts-totals')
+
+RATES_CSV = '''Date,USD,GBP,JPY,
+2026-03-03,1.20,0.86,N/A,
+2026-03-02,1.10,0.85,160.5,
+'''
+
+
+def url_with_querystring(path, **kwargs):
+    return path + '?' + urlencode(kwargs)
+
+
+class ExchangeRateTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        account_type = AccountType.objects.create(name='Wallet')
+        self.dollars = Account.objects.create(
+            name='Checking', description='Bank', account_type=account_type,
+            user=self.user)
+        self.euros = Account.objects.create(
+            name='Savings', description='Bank', account_type=account_type,
+            currency='EUR', user=self.user)
+        self.category = TransactionCategory.objects.create(
+            name='Food', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def load_rates(self, fill_until=None):
+        return load_rates(read_rates(io.StringIO(RATES_CSV)), fill_until)
+
+    def create_transaction(self, account, amount, date):
+        return Transaction.objects.create(
+            amount=amount, description='Transaction', transaction_date=date,
+            category=self.category, account=account, user=self.user)
+
+    def create_transactions(self):
+        self.create_transaction(self.euros, '100.00', '2026-03-02')
+        self.create_transaction(self.euros, '10.00', '2026-03-03')
+        self.create_transaction(self.dollars, '50.00', '2026-03-03')
+        rebuild_rollups(self.user)
+
+    def test_read_rates(self):
+        # Test both the long and the wide CSV layouts are read
+        self.assertEqual(list(read_rates(io.StringIO(
+            'date,currency,rate\n2026-03-02,usd,1.1\n'))), [
+            ('USD', datetime.date(2026, 3, 2), Decimal('1.1'))])
+        rates = list(read_rates(io.StringIO(RATES_CSV)))
+        self.assertEqual(len(rates), 5)
+        self.assertIn(('JPY', datetime.date(2026, 3, 2), Decimal('160.5')),
+                      rates)
+
+        for content in ('date,currency,rate\n2026-03-02,usd,-1\n',
+                        'date,USD\n2026-03-02,1.1\n02/03/2026,1.2\n',
+                        'date,US\n2026-03-02,1.1\n', 'currency,rate\n'):
+            with self.assertRaises(ValueError):
+                list(read_rates(io.StringIO(content)))
+
+    def test_load_rates_fills_days(self):
+        # Test every day gets the rate of the day before when it has none
+        RATES_FRIDAY = 'date,currency,rate\n2026-03-06,USD,1.3\n'
+        self.load_rates()
+        stored = load_rates(read_rates(io.StringIO(RATES_FRIDAY)),
+                            fill_until=datetime.date(2026, 3, 8))
+
+        self.assertEqual(stored, {'EUR': 5, 'USD': 5})
+        self.assertEqual(list(ExchangeRate.objects.filter(
+            currency='USD').order_by('date').values_list('date', 'rate')), [
+            (datetime.date(2026, 3, day), Decimal(rate)) for day, rate in (
+                (2, '1.1'), (3, '1.2'), (4, '1.2'), (5, '1.2'), (6, '1.3'),
+                (7, '1.3'), (8, '1.3'))])
+        self.assertEqual(set(ExchangeRate.objects.filter(
+            currency='EUR').values_list('rate', flat=True)), {1})
+
+    def test_load_exchange_rates_command(self):
+        # Test the command loads a file and rejects invalid ones
+        with tempfile.NamedTemporaryFile('w', suffix='.csv',
+                                         delete=False) as rates_file:
+            rates_file.write(RATES_CSV)
+        self.addCleanup(os.remove, rates_file.name)
+        out = io.StringIO()
+
+        call_command('load_exchange_rates', rates_file.name,
+                     fill_until=datetime.date(2026, 3, 4), stdout=out)
+
+        self.assertIn('Loaded the rates of 4 currencies', out.getvalue())
+        self.assertEqual(ExchangeRate.objects.filter(
+            date=datetime.date(2026, 3, 4)).count(), 4)
+        with self.assertRaises(CommandError):
+            call_command('load_exchange_rates', rates_file.name + '.missing',
+                         stdout=io.StringIO())
+
+    def test_check_rates(self):
+        # Test the rates are checked for every currency and day converted
+        self.load_rates()
+        self.create_transactions()
+        transactions = Transaction.objects.filter(user=self.user)
+
+        check_rates(transactions, 'currency', 'transaction_date', 'USD')
+        check_rates(transactions, 'currency', 'transaction_date', 'EUR')
+        self.create_transaction(self.dollars, '1.00', '2026-03-04')
+        with self.assertRaises(MissingRateError) as context:
+            check_rates(transactions, 'currency', 'transaction_date', 'EUR')
+        self.assertEqual(context.exception.date, datetime.date(2026, 3, 4))
+        with self.assertRaises(MissingRateError):
+            check_rates(transactions, 'currency', 'transaction_date', 'CHF')
+
+    def test_transaction_currency_follows_account(self):
+        # Test the transactions take the currency of their account
+        transaction = self.create_transaction(self.dollars, '1.00',
+                                              '2026-03-02')
+        self.assertEqual(transaction.currency, 'USD')
+
+        res = self.client.post(TRANSACTIONS_BULK_URL, [{
+            'amount': '5.00', 'description': 'Bulk', 'paid': True,
+            'transaction_date': '2026-03-02', 'category': self.category.id,
+            'account': self.euros.id}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.get(
+            description='Bulk').currency, 'EUR')
+        res = self.client.patch(
+            reverse('accounts-detail', args=(self.euros.id,)),
+            {'currency': 'GBP'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_summary_converted(self):
+        # Test the totals are converted with the rates of each day, from
+        # the rollups and from the transactions
+        self.load_rates()
+        self.create_transactions()
+
+        for params in ({}, {'paid': True}):
+            res = self.client.get(url_with_querystring(
+                TRANSACTIONS_SUMMARY_URL, group_by='account',
+                currency='usd', **params))
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data, [
+                {'account': self.dollars.id, 'total': '50.00', 'count': 1},
+                {'account': self.euros.id, 'total': '122.00', 'count': 2},
+            ])
+
+    def test_summary_missing_rate(self):
+        # Test converting without the rates of a day is rejected
+        self.load_rates()
+        self.create_transactions()
+        self.create_transaction(self.euros, '1.00', '2026-03-10')
+        rebuild_rollups(self.user)
+
+        for currency in ('USD', 'CHF', 'DOLLAR'):
+            res = self.client.get(url_with_querystring(
+                TRANSACTIONS_SUMMARY_URL, currency=currency))
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('currency', res.data)
+
+    def test_export_converted(self):
+        # Test the export adds the currency and the converted amount
+        self.load_rates()
+        self.create_transactions()
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_EXPORT_URL, currency='GBP'))
+
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([(row['amount'], row['currency'],
+                           row['converted_amount']) for row in rows], [
+            ('100.00', 'EUR', '85.00'), ('10.00', 'EUR', '8.60'),
+            ('50.00', 'USD', '35.83')])
+
+    def test_account_totals(self):
+        # Test the balances of the accounts are added with the last rates
+        self.load_rates(fill_until=datetime.date.today())
+        Account.objects.filter(id=self.euros.id).update(balance='100.00',
+                                                        pending_balance='-5')
+        Account.objects.filter(id=self.dollars.id).update(balance='60.00')
+
+        res = self.client.get(url_with_querystring(ACCOUNTS_TOTALS_URL,
+                                                   currency='EUR'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'currency': 'EUR', 'date': datetime.date.today().isoformat(),
+            'balance': '150.00', 'pending_balance': '-5.00'})
+        res = self.client.get(ACCOUNTS_TOTALS_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
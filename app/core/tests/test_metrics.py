@@ -0,0 +1,183 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from core import metrics
+from core.models import Account, AccountType, TransactionCategory, \
+    CATEGORY_TYPES
+
+TRANSACTIONS_URL = reverse('transactions:transactions-list')
+METRICS_URL = reverse('metrics')
+
+
+class MetricsTestMixin:
+    # Records the metrics in a registry of its own
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        patcher = mock.patch.object(metrics, 'registry',
+                                    metrics.MetricsRegistry(self.directory))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class MetricsApiTests(MetricsTestMixin, APITestCase):
+    # Test the metrics of the requests in /metrics
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        self.account = Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=AccountType.objects.create(name='Wallet'))
+        self.category = TransactionCategory.objects.create(
+            name='Food', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_request_metrics(self):
+        # Test the requests are counted and timed by route
+        self.client.get(TRANSACTIONS_URL)
+        self.client.get(TRANSACTIONS_URL)
+        self.client.get('/api/unknown/')
+
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        content = res.content.decode()
+        self.assertIn('http_requests_total{route="transactions:'
+                      'transactions-list",method="GET",status="200"} 2',
+                      content)
+        self.assertIn('http_request_duration_seconds_count{route="'
+                      'transactions:transactions-list",method="GET"} 2',
+                      content)
+        self.assertIn('http_request_duration_seconds_bucket{route="'
+                      'transactions:transactions-list",method="GET",'
+                      'le="+Inf"} 2', content)
+        self.assertIn('db_queries_total{route="transactions:'
+                      'transactions-list"} 4', content)
+        self.assertIn('http_requests_total{route="unmatched",method="GET",'
+                      'status="404"} 1', content)
+
+    def test_created_transactions(self):
+        # Test the business counters
+        self.client.post(TRANSACTIONS_URL, {
+            'amount': 5, 'description': 'Coffee',
+            'category': self.category.id, 'account': self.account.id})
+        self.client.post(reverse('transactions:transactions-bulk'), [{
+            'amount': 5, 'description': 'Coffee',
+            'category': self.category.id, 'account': self.account.id,
+        }] * 3, format='json')
+
+        content = self.client.get(METRICS_URL).content.decode()
+        self.assertIn('transactions_created_total 4\n', content)
+
+    def test_failed_recording_answers(self):
+        # Test a request is answered when its metrics can't be written
+        with mock.patch('core.middleware.record_request',
+                        side_effect=OSError('No space left on device')), \
+                self.assertLogs('core.performance', 'ERROR'):
+            res = self.client.get(TRANSACTIONS_URL)
+        self.assertEqual(res.status_code, 200)
+
+
+class MetricsRegistryTests(MetricsTestMixin, SimpleTestCase):
+
+    def test_workers_added_up(self):
+        # Test the files of the other workers are added to this one
+        other = os.path.join(self.directory, '1-other.json')
+        with open(other, 'w') as output:
+            json.dump({
+                'counters': [['cache_requests_total',
+                              [['cache', 'token'], ['result', 'hit']], 3]],
+                'histograms': [['http_request_duration_seconds',
+                                [['route', 'r'], ['method', 'GET']],
+                                [1] + [0] * 11 + [0.001]]],
+            }, output)
+
+        metrics.record_cache('token', hit=True)
+        metrics.record_cache('token', hit=False)
+        metrics.registry.observe('http_request_duration_seconds',
+                                 (('route', 'r'), ('method', 'GET')), 20)
+
+        content = metrics.render_metrics()
+        self.assertIn('cache_requests_total{cache="token",result="hit"} 4',
+                      content)
+        self.assertIn('cache_hit_ratio{cache="token"} 0.8', content)
+        self.assertIn('http_request_duration_seconds_bucket{route="r",'
+                      'method="GET",le="0.005"} 1', content)
+        self.assertIn('http_request_duration_seconds_bucket{route="r",'
+                      'method="GET",le="10"} 1', content)
+        self.assertIn('http_request_duration_seconds_bucket{route="r",'
+                      'method="GET",le="+Inf"} 2', content)
+        self.assertIn('http_request_duration_seconds_sum{route="r",'
+                      'method="GET"} 20.001', content)
+
+    def test_forked_process_starts_empty(self):
+        # Test a child process doesn't report the values of its parent
+        metrics.registry.inc('transactions_created_total')
+        with mock.patch('os.getpid', return_value=-1):
+            metrics.registry.inc('transactions_created_total')
+            self.assertEqual(dict(metrics.registry.counters), {
+                ('transactions_created_total', ()): 1})
+
+    def test_concurrent_flushes(self):
+        # Test the threads of a worker flush without racing on the file
+        registry = metrics.MetricsRegistry(self.directory, flush_interval=0)
+        errors = []
+
+        def record():
+            try:
+                for i in range(200):
+                    registry.inc('transactions_created_total')
+                    if i % 50 == 0:
+                        registry.collect()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=record) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        counters, histograms = registry.collect()
+        self.assertEqual(counters['transactions_created_total', ()], 1600)
+        self.assertEqual(
+            [name for name in os.listdir(self.directory)
+             if not name.startswith('.')], [os.path.basename(registry.path)])
+
+    def test_exited_processes_folded(self):
+        # Test the files of the processes that exited are folded into the
+        # archive, without counting them twice
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        for name in ('{}-first.json', '{}-second.json'):
+            with open(os.path.join(self.directory,
+                                   name.format(process.pid)), 'w') as output:
+                json.dump({'counters': [
+                    ['transactions_created_total', [], 2]],
+                    'histograms': []}, output)
+            metrics.record_transaction_changes(created=1)
+            content = metrics.render_metrics()
+
+        self.assertIn('transactions_created_total 6\n', content)
+        self.assertIn('transactions_created_total 6\n',
+                      metrics.render_metrics())
+        self.assertEqual(sorted(
+            name for name in os.listdir(self.directory)
+            if not name.startswith('.')), sorted([
+                metrics.ARCHIVE_NAME,
+                os.path.basename(metrics.registry.path)]))
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from core.models import Transaction, Account, AccountType, \
+    TransactionCategory, CATEGORY_TYPES
+
+TRANSACTIONS_URL = reverse('transactions:transactions-list')
+
+
+class PerformanceMiddlewareTests(APITestCase):
+    # Test the measures of each request
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        account = Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=AccountType.objects.create(name='Wallet'))
+        category = TransactionCategory.objects.create(
+            name='Food', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        Transaction.objects.create(amount=10, description='Lunch',
+                                   category=category, account=account)
+        self.client.force_authenticate(self.user)
+
+    def get_logged(self, url):
+        with self.assertLogs('core.performance', 'INFO') as logs:
+            res = self.client.get(url)
+        return res, json.loads(logs.records[-1].getMessage())
+
+    def test_server_timing_and_log(self):
+        # Test the list of transactions is measured
+        res, record = self.get_logged(TRANSACTIONS_URL)
+
+        self.assertIn('db;dur=', res['Server-Timing'])
+        self.assertIn('serializer;dur=', res['Server-Timing'])
+        self.assertEqual(record['view'], 'TransactionViewSet')
+        self.assertEqual(record['action'], 'list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 2)
+        self.assertEqual(record['bytes'], len(res.content))
+        self.assertGreater(record['serializer_ms'], 0)
+        self.assertNotIn('profile', record)
+
+    def test_serializer_time_of_detail(self):
+        # Test the time of the serializers is measured outside of lists
+        res, record = self.get_logged(reverse('user:me'))
+        self.assertEqual(record['view'], 'ManageUserView')
+        self.assertIsNone(record['action'])
+
+        res, record = self.get_logged(
+            reverse('categories:transaction_category-list'))
+        self.assertGreater(record['serializer_ms'], 0)
+
+    def test_profile_slow_requests(self):
+        # Test the requests over the threshold get a cProfile dump
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch('core.middleware.PERFORMANCE_PROFILE_DIR',
+                           directory), \
+                mock.patch('core.middleware.PERFORMANCE_PROFILE_SLOW_MS', 0):
+            res, record = self.get_logged(TRANSACTIONS_URL)
+            self.assertTrue(os.path.exists(record['profile']))
+            self.assertTrue(record['profile'].startswith(directory))
+
+        with mock.patch('core.middleware.PERFORMANCE_PROFILE_SLOW_MS',
+                        60 * 1000):
+            res, record = self.get_logged(TRANSACTIONS_URL)
+        self.assertNotIn('profile', record)
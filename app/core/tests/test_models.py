@@ -116,3 +116,7 @@ class ModelTests(TestCase):
                          self.payloadTransaction['category'])
         self.assertEqual(self.transaction.account,
                          self.payloadTransaction['account'])
+
+    def test_create_transaction_owner_from_category(self):
+        # Test the transaction owner defaults to the category owner
+        self.assertEqual(self.transaction.user, self.category.user)
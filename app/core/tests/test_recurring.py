@@ -0,0 +1,158 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.balances import rebuild_balances
+from core.models import Account, AccountType, RecurringTransaction, \
+    Transaction, TransactionCategory, CATEGORY_TYPES
+from core.recurring import materialize_due, materialize_rules, \
+    parse_rule, project_occurrences, reschedule
+from core.rollups import check_rollups
+
+
+class RecurringTransactionTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        self.account = Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=AccountType.objects.create(name='Wallet'))
+        self.category = TransactionCategory.objects.create(
+            name='Rent', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+
+    def create_rule(self, rule='FREQ=MONTHLY;BYMONTHDAY=1',
+                    start_date=datetime.date(2026, 1, 1), amount='100.00'):
+        recurring = RecurringTransaction(
+            amount=Decimal(amount), description='Rent', rule=rule,
+            start_date=start_date, category=self.category,
+            account=self.account, user=self.user)
+        reschedule(recurring)
+        recurring.save()
+        return recurring
+
+    def materialize(self, today):
+        return list(materialize_due(today))
+
+    def test_parse_rule(self):
+        # Test only single rules repeated at most daily are accepted
+        start = datetime.date(2026, 1, 1)
+        self.assertEqual(
+            parse_rule('RRULE:FREQ=WEEKLY;BYDAY=MO', start)[0],
+            datetime.datetime(2026, 1, 5))
+        for rule in ('FREQ=HOURLY', 'DTSTART:20260101\nRRULE:FREQ=DAILY',
+                     'BYDAY=MO', 'FREQ=MONTHLY;BYDAY=XX', '',
+                     'FREQ=DAILY;BYHOUR=1,2', 'FREQ=WEEKLY;BYMINUTE=0,30',
+                     'FREQ=DAILY;BYSECOND=5'):
+            with self.assertRaises(ValueError):
+                parse_rule(rule, start)
+
+    def test_materialize_due_occurrences(self):
+        # Test the due occurrences become transactions with their balances
+        # and rollups, and the rule moves to the next one
+        recurring = self.create_rule()
+        self.assertEqual(recurring.next_date, datetime.date(2026, 1, 1))
+
+        self.assertEqual(self.materialize(datetime.date(2026, 3, 15)),
+                         [(1, 3)])
+
+        self.assertEqual(list(Transaction.objects.filter(
+            recurring=recurring).order_by('transaction_date').values_list(
+                'transaction_date', flat=True)), [
+            datetime.date(2026, 1, 1), datetime.date(2026, 2, 1),
+            datetime.date(2026, 3, 1)])
+        recurring.refresh_from_db()
+        self.assertEqual(recurring.materialized_until,
+                         datetime.date(2026, 3, 15))
+        self.assertEqual(recurring.next_date, datetime.date(2026, 4, 1))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('-300.00'))
+        self.assertEqual(rebuild_balances(fix=False), [])
+        self.assertEqual(check_rollups(self.user), [])
+
+    def test_materialize_is_idempotent(self):
+        # Test running again or after a concurrent run creates nothing
+        recurring = self.create_rule()
+        Transaction.objects.create(
+            amount=recurring.amount, description='Rent',
+            transaction_date=datetime.date(2026, 2, 1),
+            category=self.category, account=self.account, user=self.user,
+            recurring=recurring)
+
+        self.materialize(datetime.date(2026, 2, 10))
+        self.assertEqual(self.materialize(datetime.date(2026, 2, 10)), [])
+        self.assertEqual(materialize_rules(
+            [recurring], datetime.date(2026, 2, 10)), 0)
+
+        self.assertEqual(Transaction.objects.filter(
+            recurring=recurring).count(), 2)
+
+    def test_materialize_finished_rule(self):
+        # Test a rule is left without next date after its last occurrence
+        recurring = self.create_rule(rule='FREQ=MONTHLY;COUNT=2')
+
+        self.materialize(datetime.date(2026, 6, 1))
+
+        recurring.refresh_from_db()
+        self.assertIsNone(recurring.next_date)
+        self.assertEqual(Transaction.objects.filter(
+            recurring=recurring).count(), 2)
+
+    def test_materialize_queries_per_batch(self):
+        # Test a batch of rules takes the same queries whatever its size
+        self.create_rule()
+        with CaptureQueriesContext(connection) as one_rule:
+            self.materialize(datetime.date(2026, 1, 1))
+        for i in range(20):
+            self.create_rule(start_date=datetime.date(2026, 2, 1))
+        with CaptureQueriesContext(connection) as many_rules:
+            self.materialize(datetime.date(2026, 2, 1))
+
+        self.assertEqual(Transaction.objects.count(), 22)
+        self.assertEqual(len(many_rules), len(one_rule))
+
+    def test_project_occurrences(self):
+        # Test the occurrences not created yet are merged by date and not
+        # stored
+        monthly = self.create_rule()
+        weekly = self.create_rule(rule='FREQ=WEEKLY;BYDAY=MO',
+                                  amount='20.00')
+        self.materialize(datetime.date(2026, 1, 31))
+        monthly.refresh_from_db()
+        weekly.refresh_from_db()
+
+        projected = list(project_occurrences(
+            [monthly, weekly], datetime.date(2026, 2, 28)))
+
+        self.assertEqual([(t.transaction_date, t.recurring_id)
+                          for t in projected], [
+            (datetime.date(2026, 2, 1), monthly.id),
+            (datetime.date(2026, 2, 2), weekly.id),
+            (datetime.date(2026, 2, 9), weekly.id),
+            (datetime.date(2026, 2, 16), weekly.id),
+            (datetime.date(2026, 2, 23), weekly.id),
+        ])
+        self.assertTrue(all(t.id is None for t in projected))
+        self.assertEqual([t.transaction_date for t in project_occurrences(
+            [monthly, weekly], datetime.date(2026, 2, 10),
+            start=datetime.date(2026, 2, 5))], [datetime.date(2026, 2, 9)])
+
+    def test_materialize_recurring_command(self):
+        # Test the command processes the rules in batches
+        for i in range(3):
+            self.create_rule()
+        out = io.StringIO()
+
+        call_command('materialize_recurring', date=datetime.date(2026, 2, 1),
+                     batch_size=2, stdout=out)
+
+        self.assertIn('2 rules, 4 transactions', out.getvalue())
+        self.assertIn('Processed 3 rules and created 6 transactions',
+                      out.getvalue())
@@ -0,0 +1,72 @@
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.models import AccountType
+from core.reference import REFERENCE_CACHE, get_version_key, \
+    invalidate_reference
+
+ACCOUNT_TYPE_URL = reverse('accounttype-list')
+
+
+class ReferenceCacheTests(APITestCase):
+    # Test the account types are served from the reference cache
+    def setUp(self):
+        # The rollback of the previous test doesn't send signals
+        invalidate_reference(AccountType)
+        self.account_type = AccountType.objects.create(
+            name='Wallet', icon_name='wallet')
+
+    def test_cached_list(self):
+        # Test the second request doesn't query the database
+        res = self.client.get(ACCOUNT_TYPE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('max-age', res['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(ACCOUNT_TYPE_URL)
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(cached['ETag'], res['ETag'])
+
+    def test_etag_not_modified(self):
+        # Test the conditional GET of an unchanged catalogue
+        etag = self.client.get(ACCOUNT_TYPE_URL)['ETag']
+
+        res = self.client.get(ACCOUNT_TYPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_save_invalidates(self):
+        # Test creating, updating and deleting account types
+        res = self.client.get(ACCOUNT_TYPE_URL)
+        AccountType.objects.create(name='Bank', icon_name='bank')
+        self.account_type.name = 'Cash'
+        self.account_type.save()
+
+        updated = self.client.get(ACCOUNT_TYPE_URL,
+                                  HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(updated.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(row['name'] for row in updated.data),
+                         ['Bank', 'Cash'])
+
+        self.account_type.delete()
+        res = self.client.get(ACCOUNT_TYPE_URL)
+        self.assertEqual([row['name'] for row in res.data], ['Bank'])
+
+    def test_version_shared_by_workers(self):
+        # Test the workers find the same ETag for the same rows, and a
+        # change made through another worker once the version expires
+        etag = self.client.get(ACCOUNT_TYPE_URL)['ETag']
+        version_key = get_version_key(AccountType)
+        caches[REFERENCE_CACHE].delete(version_key)
+
+        res = self.client.get(ACCOUNT_TYPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Saved without signals, as by a worker with its own cache
+        AccountType.objects.filter(id=self.account_type.id).update(
+            name='Cash')
+        caches[REFERENCE_CACHE].delete(version_key)
+        res = self.client.get(ACCOUNT_TYPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['name'] for row in res.data], ['Cash'])
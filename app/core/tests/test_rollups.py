@@ -0,0 +1,105 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from core.models import Transaction, Account, AccountType, \
+    TransactionCategory, TransactionDailyRollup, CATEGORY_TYPES
+
+TRANSACTIONS_URL = reverse('transactions:transactions-list')
+TRANSACTIONS_BULK_URL = reverse('transactions:transactions-bulk')
+
+
+def get_detail_transactions_url(transaction):
+    return reverse('transactions:transactions-detail', args=(transaction.id,))
+
+
+class TransactionRollupTests(APITestCase):
+    # Test the daily rollups follow the writes of transactions
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        self.account = Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=AccountType.objects.create(name='Wallet'))
+        self.category = TransactionCategory.objects.create(
+            name='Food', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.another_category = TransactionCategory.objects.create(
+            name='Leisure', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def create_transaction(self, amount, date='2020-08-18', category=None):
+        res = self.client.post(TRANSACTIONS_URL, {
+            'amount': amount,
+            'description': 'Transaction',
+            'transaction_date': date,
+            'category': (category or self.category).id,
+            'account': self.account.id,
+        })
+        return Transaction.objects.get(id=res.data['id'])
+
+    def get_rollups(self):
+        return list(TransactionDailyRollup.objects.order_by(
+            'day', 'category_id').values_list(
+                'day', 'category_id', 'total', 'count'))
+
+    def test_create_transactions_add_to_rollup(self):
+        # Test the transactions of the same day share a rollup
+        self.create_transaction('10.00')
+        self.create_transaction('5.50')
+        self.client.post(TRANSACTIONS_BULK_URL, [{
+            'amount': '1.00', 'description': 'Bulk',
+            'transaction_date': '2020-08-19', 'category': self.category.id,
+            'account': self.account.id,
+        }], format='json')
+
+        self.assertEqual(self.get_rollups(), [
+            (datetime.date(2020, 8, 18), self.category.id, Decimal('15.50'), 2),
+            (datetime.date(2020, 8, 19), self.category.id, Decimal('1.00'), 1),
+        ])
+
+    def test_update_transaction_moves_rollup(self):
+        # Test changing the date, category and amount of a transaction
+        self.create_transaction('10.00')
+        transaction = self.create_transaction('4.00')
+
+        self.client.patch(get_detail_transactions_url(transaction), {
+            'amount': '6.00',
+            'transaction_date': '2020-08-20',
+            'category': self.another_category.id,
+        })
+
+        self.assertEqual(self.get_rollups(), [
+            (datetime.date(2020, 8, 18), self.category.id, Decimal('10.00'), 1),
+            (datetime.date(2020, 8, 20), self.another_category.id,
+             Decimal('6.00'), 1),
+        ])
+
+    def test_delete_last_transaction_of_day_drops_rollup(self):
+        # Test the rollup of a day without transactions is removed
+        transaction = self.create_transaction('10.00')
+
+        self.client.delete(get_detail_transactions_url(transaction))
+
+        self.assertEqual(self.get_rollups(), [])
+
+    def test_rebuild_rollups_command(self):
+        # Test checking and fixing rollups that drifted
+        self.create_transaction('10.00')
+        TransactionDailyRollup.objects.update(total=1)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', check=True, stdout=io.StringIO())
+        call_command('rebuild_rollups', stdout=io.StringIO())
+
+        self.assertEqual(self.get_rollups(), [
+            (datetime.date(2020, 8, 18), self.category.id, Decimal('10.00'), 1),
+        ])
+        call_command('rebuild_rollups', check=True, stdout=io.StringIO())
@@ -0,0 +1,62 @@
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from core.balances import rebuild_balances
+from core.models import Account, Transaction, TransactionCategory, \
+    CATEGORY_TYPES
+from core.models_fakers import fake_categories, fake_transactions, get_rng
+from core.rollups import check_rollups
+
+
+class SeedDataTests(TestCase):
+
+    def seed(self, **options):
+        call_command('seed_data', start=datetime.date(2026, 1, 1),
+                     stdout=io.StringIO(), **options)
+
+    def test_seed_data(self):
+        # Test the users get their data with consistent balances and rollups
+        self.seed(users=3, months=2, accounts=2, batch_users=2)
+
+        users = get_user_model().objects.filter(
+            email__startswith='seed0-')
+        self.assertEqual(users.count(), 3)
+        for user in users:
+            self.assertEqual(Account.objects.filter(user=user).count(), 2)
+            self.assertEqual(TransactionCategory.objects.filter(
+                user=user).count(), 12)
+            # A salary each month
+            self.assertEqual(Transaction.objects.filter(
+                user=user, description='Salary').count(), 2)
+            self.assertGreater(Transaction.objects.filter(
+                user=user, category__category_type=(
+                    CATEGORY_TYPES.EXPENSE.value)).count(), 100)
+            self.assertEqual(check_rollups(user), [])
+        self.assertEqual(rebuild_balances(fix=False), [])
+
+    def test_same_seed_same_data(self):
+        # Test the transactions only depend on the seed and the user
+        user = get_user_model()(id=1)
+        accounts = [Account(id=1, user=user), Account(id=2, user=user)]
+        categories = fake_categories(user)
+        for i, category in enumerate(categories):
+            category.id = i + 1
+
+        def amounts(seed):
+            return [(t.transaction_date, t.category.id, t.amount)
+                    for t in fake_transactions(
+                        get_rng(seed, 7), accounts, categories,
+                        datetime.date(2026, 1, 1), 3)]
+
+        self.assertEqual(amounts(0), amounts(0))
+        self.assertNotEqual(amounts(0), amounts(1))
+
+    def test_existing_seed_rejected(self):
+        # Test running twice with the same seed is refused
+        self.seed(users=1, months=1)
+        with self.assertRaises(CommandError):
+            self.seed(users=1, months=1)
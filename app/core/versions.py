@@ -0,0 +1,29 @@
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import UserDataVersion
+
+
+def bump_data_version(*user_ids):
+    # Marks the data of the users as changed, the ETags of their lists and
+    # details stop matching. A single UPDATE, the versions are created with
+    # the users, see core.signals
+    user_ids = set(user_ids)
+    now = timezone.now()
+    updated = UserDataVersion.objects.filter(user_id__in=user_ids).update(
+        version=F('version') + 1, modified=now)
+    if updated < len(user_ids):
+        existing = set(UserDataVersion.objects.filter(
+            user_id__in=user_ids).values_list('user_id', flat=True))
+        UserDataVersion.objects.bulk_create([
+            UserDataVersion(user_id=user_id, version=1, modified=now)
+            for user_id in user_ids - existing
+        ], ignore_conflicts=True)
+
+
+def get_data_version(user_id):
+    # Returns (version, last modification) of the data of the user, read
+    # from the database as the authenticated user may come from a cache
+    row = UserDataVersion.objects.filter(user_id=user_id).values_list(
+        'version', 'modified').first()
+    return row if row is not None else (0, None)
@@ -0,0 +1,11 @@
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from core.metrics import render_metrics
+
+
+@require_GET
+def metrics(request):
+    # Metrics of all the workers in the Prometheus text format
+    return HttpResponse(render_metrics(),
+                        content_type='text/plain; version=0.0.4')
@@ -1,16 +1,102 @@
+import datetime
+
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from core.models import AccountType, Account
+from core.balances import SERIES_INTERVALS
+from core.models import AccountType, Account, Transaction
+from core.serializers import ExpandableFieldsSerializerMixin, \
+    SparseFieldsSerializerMixin, TimedSerializerMixin, \
+    UserOwnedPrimaryKeyRelatedField, compile_decimal
 
 
-class AccountTypeSerializer(serializers.ModelSerializer):
+class AccountTypeSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
     class Meta:
         model = AccountType
         fields = ('id', 'name', 'icon_name')
         read_only_fields = ('id', )
 
 
-class AccountSerializer(serializers.ModelSerializer):
+class AccountSerializer(TimedSerializerMixin,
+                        SparseFieldsSerializerMixin,
+                        ExpandableFieldsSerializerMixin,
+                        serializers.ModelSerializer):
+    expandable_fields = {'account_type': AccountTypeSerializer}
+
     class Meta:
         model = Account
-        fields = ('id', 'name', 'description', 'account_type', 'user')
-        read_only_fields = ('id', 'user')
+        fields = ('id', 'name', 'description', 'account_type', 'user',
+                  'balance', 'pending_balance', 'currency')
+        read_only_fields = ('id', 'user', 'balance', 'pending_balance')
+
+    def validate_currency(self, value):
+        # The stored balances and amounts are in the currency of the account
+        if (self.instance is not None and value != self.instance.currency
+                and Transaction.objects.filter(
+                    account=self.instance).exists()):
+            raise serializers.ValidationError(_(
+                'The currency of an account with transactions can\'t be '
+                'changed.'))
+        return value
+
+
+class AccountTotalsSerializer(serializers.Serializer):
+    # Balances of all the accounts of a user in a single currency
+    currency = serializers.CharField()
+    date = serializers.DateField()
+    balance = serializers.DecimalField(max_digits=17, decimal_places=2)
+    pending_balance = serializers.DecimalField(max_digits=17,
+                                               decimal_places=2)
+
+
+class BalanceSeriesQuerySerializer(serializers.Serializer):
+    # Query parameters of the balance series, the last year by default
+    max_days = 3660
+    date_gte = serializers.DateField(required=False)
+    date_lte = serializers.DateField(required=False)
+    interval = serializers.ChoiceField(choices=SERIES_INTERVALS,
+                                       default='day')
+    account = UserOwnedPrimaryKeyRelatedField(
+        queryset=Account.objects.all(), required=False)
+    # Only the paid or the pending transactions, both by default
+    paid = serializers.NullBooleanField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('date_lte', datetime.date.today())
+        attrs.setdefault('date_gte', attrs['date_lte'].replace(
+            year=attrs['date_lte'].year - 1, day=1))
+        days = (attrs['date_lte'] - attrs['date_gte']).days
+        if days < 0:
+            raise serializers.ValidationError({'date_lte': [
+                _('Ensure this date is not before date_gte.')]})
+        if days >= self.max_days:
+            raise serializers.ValidationError({'date_lte': [
+                _('Ensure the range is less than {max_days} days.').format(
+                    max_days=self.max_days)]})
+        return attrs
+
+
+class DecimalSeriesField(serializers.ListField):
+    # List of amounts formatted with a converter compiled once, as the
+    # series are long
+    child = serializers.DecimalField(max_digits=17, decimal_places=2)
+
+    def to_representation(self, data):
+        return list(map(compile_decimal(self.child), data))
+
+
+class AccountBalanceSeriesSerializer(serializers.Serializer):
+    account = serializers.IntegerField()
+    currency = serializers.CharField()
+    balances = DecimalSeriesField()
+
+
+class BalanceSeriesSerializer(serializers.Serializer):
+    # Balances of each account at the end of each period, which ends on
+    # the date of the same index, and their sum when they are or are
+    # converted to a single currency
+    interval = serializers.CharField()
+    currency = serializers.CharField(allow_null=True)
+    dates = serializers.ListField(child=serializers.DateField())
+    net_worth = DecimalSeriesField(allow_null=True)
+    accounts = AccountBalanceSeriesSerializer(many=True)
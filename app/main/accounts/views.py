@@ -1,20 +1,33 @@
+from decimal import Decimal
+
 from rest_framework import viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
-from main.accounts.serializers import AccountTypeSerializer, AccountSerializer
+from main.accounts.serializers import AccountTypeSerializer, \
+    AccountSerializer, AccountTotalsSerializer, BalanceSeriesQuerySerializer, \
+    BalanceSeriesSerializer
 from core.models import AccountType, Account
-from rest_framework.authentication import TokenAuthentication
+from core.balances import convert_balances, get_balance_series, \
+    get_period_ends
+from core.currencies import get_factors, get_latest_rates
+from core.mixins import CachedReferenceMixin, ReportingCurrencyMixin, \
+    SparseFieldsMixin, UserDataVersionMixin
+from core.versions import bump_data_version
 from rest_framework.permissions import IsAuthenticated
 
 
-class AccountTypeViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
+class AccountTypeViewSet(CachedReferenceMixin, viewsets.GenericViewSet,
+                         mixins.ListModelMixin):
     queryset = AccountType.objects.all()
     serializer_class = AccountTypeSerializer
 
 
-class AccountViewSet(viewsets.ModelViewSet):
+class AccountViewSet(UserDataVersionMixin, SparseFieldsMixin,
+                     ReportingCurrencyMixin, viewsets.ModelViewSet):
     queryset = Account.objects.all()
     serializer_class = AccountSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
@@ -24,3 +37,83 @@ class AccountViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         # Adds the user logged into the Account
         serializer.save(user=self.request.user)
+        bump_data_version(self.request.user.id)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        bump_data_version(self.request.user.id)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_data_version(self.request.user.id)
+
+    @action(detail=False, methods=['get'])
+    def totals(self, request):
+        # Adds up the balances of the accounts in the currency given, with
+        # the latest exchange rates
+        currency = self.get_reporting_currency()
+        if currency is None:
+            raise ValidationError({'currency': ['This field is required.']})
+        rates = get_latest_rates(currency)
+        balance, pending_balance = convert_balances(
+            self.get_queryset(), rates)
+        serializer = AccountTotalsSerializer({
+            'currency': currency,
+            'date': rates.date,
+            'balance': balance,
+            'pending_balance': pending_balance,
+        })
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def balances(self, request):
+        # Balance of each account at the end of each day, week or month
+        # from date_gte to date_lte, and the net worth. It is added up in
+        # the currency given, with the rates of each date, or in the
+        # currency of the accounts when they share one
+        query = BalanceSeriesQuerySerializer(
+            data=request.query_params, context=self.get_serializer_context())
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        accounts = self.get_queryset()
+        if 'account' in data:
+            accounts = accounts.filter(id=data['account'].id)
+
+        currencies = dict(accounts.order_by('id').values_list(
+            'id', 'currency'))
+        series = get_balance_series(accounts, data['date_gte'],
+                                    data['date_lte'], data.get('paid'))
+        dates = get_period_ends(data['date_gte'], data['date_lte'],
+                                data['interval'])
+        indexes = [(date - data['date_gte']).days for date in dates]
+        balances = {
+            account_id: [series[account_id][index] for index in indexes]
+            for account_id in currencies
+        }
+
+        currency = self.get_reporting_currency()
+        if currency is None and len(set(currencies.values())) == 1:
+            currency = next(iter(currencies.values()))
+        net_worth = None
+        if currency is not None:
+            factors = get_factors(set(currencies.values()), dates, currency)
+            net_worth = [
+                sum((balances[account_id][index]
+                     * factors[account_currency, date]
+                     for account_id, account_currency in currencies.items()),
+                    Decimal(0))
+                for index, date in enumerate(dates)
+            ]
+
+        serializer = BalanceSeriesSerializer({
+            'interval': data['interval'],
+            'currency': currency,
+            'dates': dates,
+            'net_worth': net_worth,
+            'accounts': [
+                {'account': account_id, 'currency': account_currency,
+                 'balances': balances[account_id]}
+                for account_id, account_currency in currencies.items()
+            ],
+        })
+        return Response(serializer.data)
@@ -0,0 +1,79 @@
+import calendar
+import datetime
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from core.models import Budget, TransactionCategory, CATEGORY_TYPES
+from core.serializers import SparseFieldsSerializerMixin, \
+    TimedSerializerMixin, UserOwnedPrimaryKeyRelatedField
+
+
+class BudgetSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
+    category = UserOwnedPrimaryKeyRelatedField(
+        queryset=TransactionCategory.objects.filter(
+            category_type=CATEGORY_TYPES.EXPENSE.value))
+
+    class Meta:
+        model = Budget
+        fields = ('id', 'amount', 'start_month', 'category',)
+        read_only_fields = ('id',)
+
+    def validate_amount(self, value):
+        if value < 0:
+            raise serializers.ValidationError(
+                _('Ensure this value is greater than or equal to 0.'))
+        return value
+
+    def validate_start_month(self, value):
+        # Any day stands for its month
+        return value.replace(day=1)
+
+    def validate(self, attrs):
+        category = attrs.get('category', getattr(self.instance, 'category',
+                                                 None))
+        start_month = attrs.get('start_month',
+                                getattr(self.instance, 'start_month', None))
+        budgets = Budget.objects.filter(category=category,
+                                        start_month=start_month)
+        if self.instance is not None:
+            budgets = budgets.exclude(id=self.instance.id)
+        if budgets.exists():
+            raise serializers.ValidationError({'start_month': [
+                _('The category has a budget starting this month already.')
+            ]})
+        return attrs
+
+
+class BudgetReportQuerySerializer(serializers.Serializer):
+    # Date range of the budget report, the current month by default
+    max_days = 3660
+    date_gte = serializers.DateField(required=False)
+    date_lte = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        today = datetime.date.today()
+        attrs.setdefault('date_gte', today.replace(day=1))
+        attrs.setdefault('date_lte', today.replace(
+            day=calendar.monthrange(today.year, today.month)[1]))
+        days = (attrs['date_lte'] - attrs['date_gte']).days
+        if days < 0:
+            raise serializers.ValidationError({'date_lte': [
+                _('Ensure this date is not before date_gte.')]})
+        if days >= self.max_days:
+            raise serializers.ValidationError({'date_lte': [
+                _('Ensure the range is less than {max_days} days.').format(
+                    max_days=self.max_days)]})
+        return attrs
+
+
+class BudgetReportSerializer(serializers.Serializer):
+    # Row of the budget report, budget and remaining are null for the
+    # categories without budget
+    category = serializers.IntegerField()
+    name = serializers.CharField()
+    budget = serializers.DecimalField(max_digits=17, decimal_places=2,
+                                      allow_null=True)
+    actual = serializers.DecimalField(max_digits=17, decimal_places=2)
+    remaining = serializers.DecimalField(max_digits=17, decimal_places=2,
+                                         allow_null=True)
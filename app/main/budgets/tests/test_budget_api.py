@@ -0,0 +1,186 @@
+import datetime
+import io
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.budgets import get_budget_amount
+from core.currencies import load_rates, read_rates
+from core.models import Account, AccountType, Budget, Transaction, \
+    TransactionCategory, CATEGORY_TYPES
+from core.rollups import rebuild_rollups
+
+BUDGETS_URL = reverse('budgets:budgets-list')
+BUDGETS_REPORT_URL = reverse('budgets:budgets-report')
+
+
+def url_with_querystring(path, **kwargs):
+    return path + '?' + urlencode(kwargs)
+
+
+class PublicBudgetApiTests(APITestCase):
+
+    def test_retrieve_budgets_not_authenticated(self):
+        # Test authentication is required for the budgets
+        res = self.client.get(BUDGETS_REPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBudgetApiTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        self.account = Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=AccountType.objects.create(name='Wallet'))
+        self.food = self.create_category('Food')
+        self.rent = self.create_category('Rent')
+        self.salary = self.create_category('Salary',
+                                           CATEGORY_TYPES.INCOME.value)
+        self.client.force_authenticate(self.user)
+
+    def create_category(self, name,
+                        category_type=CATEGORY_TYPES.EXPENSE.value):
+        return TransactionCategory.objects.create(
+            name=name, category_type=category_type, user=self.user)
+
+    def create_transaction(self, category, amount, date):
+        Transaction.objects.create(
+            amount=amount, description='Transaction', transaction_date=date,
+            category=category, account=self.account, user=self.user)
+
+    def get_report(self, **params):
+        return self.client.get(url_with_querystring(
+            BUDGETS_REPORT_URL, **params))
+
+    def test_create_budget(self):
+        # Test any day of the start month stands for the month
+        res = self.client.post(BUDGETS_URL, {
+            'amount': '300.00', 'start_month': '2026-03-17',
+            'category': self.food.id})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        budget = Budget.objects.get(id=res.data['id'])
+        self.assertEqual(budget.start_month, datetime.date(2026, 3, 1))
+        self.assertEqual(budget.user, self.user)
+
+    def test_create_budget_invalid_category(self):
+        # Test budgets are only for the expense categories of the user
+        another_user = get_user_model().objects.create_user(
+            email='another@domain.com', password='Test1234')
+        another_category = TransactionCategory.objects.create(
+            name='Food', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=another_user)
+        for category in (self.salary, another_category):
+            res = self.client.post(BUDGETS_URL, {
+                'amount': '300.00', 'start_month': '2026-03-01',
+                'category': category.id})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('category', res.data)
+
+    def test_create_budget_same_month(self):
+        # Test a category has a single budget starting each month
+        payload = {'amount': '300.00', 'start_month': '2026-03-01',
+                   'category': self.food.id}
+        self.client.post(BUDGETS_URL, payload)
+
+        res = self.client.post(BUDGETS_URL, {**payload,
+                                             'start_month': '2026-03-20'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start_month', res.data)
+
+    def test_budget_amount_partial_months(self):
+        # Test the budget follows its changes and prorates partial months
+        budgets = [
+            Budget(amount=Decimal('310.00'),
+                   start_month=datetime.date(2026, 1, 1)),
+            Budget(amount=Decimal('280.00'),
+                   start_month=datetime.date(2026, 2, 1)),
+        ]
+        self.assertEqual(get_budget_amount(
+            budgets, datetime.date(2026, 1, 1), datetime.date(2026, 2, 28)),
+            Decimal('590.00'))
+        self.assertEqual(get_budget_amount(
+            budgets, datetime.date(2026, 1, 22), datetime.date(2026, 2, 7)),
+            Decimal('170.00'))
+        self.assertIsNone(get_budget_amount(
+            budgets, datetime.date(2025, 12, 1), datetime.date(2025, 12, 31)))
+
+    def test_budget_report(self):
+        # Test budget, actual and remaining of every expense category
+        Budget.objects.create(amount='300.00', user=self.user,
+                              category=self.food,
+                              start_month=datetime.date(2026, 3, 1))
+        self.create_transaction(self.food, '120.50', '2026-03-02')
+        self.create_transaction(self.food, '30.00', '2026-03-31')
+        self.create_transaction(self.food, '99.00', '2026-04-01')
+        self.create_transaction(self.rent, '800.00', '2026-03-05')
+        self.create_transaction(self.salary, '2000.00', '2026-03-05')
+        rebuild_rollups(self.user)
+
+        res = self.get_report(date_gte='2026-03-01', date_lte='2026-03-31')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'category': self.food.id, 'name': 'Food', 'budget': '300.00',
+             'actual': '150.50', 'remaining': '149.50'},
+            {'category': self.rent.id, 'name': 'Rent', 'budget': None,
+             'actual': '800.00', 'remaining': None},
+        ])
+
+    def test_budget_report_queries(self):
+        # Test the report takes the same queries for many categories
+        for i in range(60):
+            category = self.create_category('Category %d' % i)
+            Budget.objects.create(amount='100.00', user=self.user,
+                                  category=category,
+                                  start_month=datetime.date(2026, 1, 1))
+            self.create_transaction(category, '10.00', '2026-03-02')
+        rebuild_rollups(self.user)
+
+        # Categories, budgets and actuals
+        with self.assertNumQueries(3):
+            res = self.get_report(date_gte='2026-01-01',
+                                  date_lte='2026-03-31')
+
+        self.assertEqual(len(res.data), 62)
+        self.assertEqual(res.data[0]['remaining'], '290.00')
+
+    def test_budget_report_invalid_range(self):
+        # Test the end of the range can't be before its start
+        res = self.get_report(date_gte='2026-03-01', date_lte='2026-02-01')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date_lte', res.data)
+
+    def test_budget_report_converted(self):
+        # Test the actuals of accounts in several currencies are converted
+        # to the currency of the report, which is then required
+        euros = Account.objects.create(
+            name='Savings', description='Bank', user=self.user,
+            currency='EUR', account_type=self.account.account_type)
+        Transaction.objects.create(
+            amount='100.00', description='Transaction', account=euros,
+            transaction_date='2026-03-02', category=self.food, user=self.user)
+        self.create_transaction(self.food, '10.00', '2026-03-02')
+        rebuild_rollups(self.user)
+        load_rates(read_rates(io.StringIO(
+            'date,currency,rate\n2026-03-02,USD,1.10\n')))
+
+        res = self.get_report(date_gte='2026-03-01', date_lte='2026-03-31')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('currency', res.data)
+
+        res = self.get_report(date_gte='2026-03-01', date_lte='2026-03-31',
+                              currency='USD')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['actual'], '120.00')
+        res = self.get_report(date_gte='2026-03-01', date_lte='2026-03-31',
+                              currency='EUR')
+        self.assertEqual(res.data[0]['actual'], '109.09')
@@ -0,0 +1,10 @@
+from django.urls import path, include
+from main.budgets import views
+from rest_framework.routers import DefaultRouter
+
+router = DefaultRouter()
+router.register('', views.BudgetViewSet, basename="budgets")
+
+urlpatterns = [
+    path('', include((router.urls, 'budgets'))),
+]
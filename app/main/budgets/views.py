@@ -0,0 +1,50 @@
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from main.budgets.serializers import BudgetSerializer, \
+    BudgetReportQuerySerializer, BudgetReportSerializer
+from core.budgets import get_budget_report
+from core.models import Budget
+from core.mixins import ReportingCurrencyMixin, SparseFieldsMixin, \
+    UserDataVersionMixin
+from core.versions import bump_data_version
+from rest_framework.permissions import IsAuthenticated
+
+
+class BudgetViewSet(UserDataVersionMixin, SparseFieldsMixin,
+                    ReportingCurrencyMixin, viewsets.ModelViewSet):
+    queryset = Budget.objects.all()
+    serializer_class = BudgetSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        # Return objects for the current authenticated user only
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+        bump_data_version(self.request.user.id)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        bump_data_version(self.request.user.id)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_data_version(self.request.user.id)
+
+    @action(detail=False, methods=['get'])
+    def report(self, request):
+        # Budget, actual and remaining of every expense category between
+        # date_gte and date_lte, in a fixed number of queries. The actuals
+        # are converted to the currency given, required when the accounts
+        # have several currencies
+        query = BudgetReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        rows = get_budget_report(request.user,
+                                 query.validated_data['date_gte'],
+                                 query.validated_data['date_lte'],
+                                 self.get_reporting_currency())
+        serializer = BudgetReportSerializer(rows, many=True)
+        return Response(serializer.data)
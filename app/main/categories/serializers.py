@@ -1,9 +1,13 @@
 from rest_framework import serializers
 from core.models import TransactionCategory
+from core.serializers import SparseFieldsSerializerMixin, \
+    TimedSerializerMixin
 # from core.serializers import FilteredListSerializerByUser
 
 
-class TransactionCategorySerializer(serializers.ModelSerializer):
+class TransactionCategorySerializer(TimedSerializerMixin,
+                                    SparseFieldsSerializerMixin,
+                                    serializers.ModelSerializer):
     class Meta:
         model = TransactionCategory
         # TODO: Add filter by logged user
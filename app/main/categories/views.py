@@ -1,15 +1,19 @@
+from django.db import transaction as db_transaction
 from rest_framework import viewsets
 
 from main.categories.serializers import TransactionCategorySerializer
-from core.models import TransactionCategory
-from rest_framework.authentication import TokenAuthentication
+from core.models import TransactionCategory, Transaction
+from core.mixins import SparseFieldsMixin, UserDataVersionMixin
+from core.versions import bump_data_version
+from core.balances import compute_balances, subtract_balances, \
+    apply_balance_deltas
 from rest_framework.permissions import IsAuthenticated
 
 
-class TransactionCategoryViewSet(viewsets.ModelViewSet):
+class TransactionCategoryViewSet(UserDataVersionMixin, SparseFieldsMixin,
+                                 viewsets.ModelViewSet):
     queryset = TransactionCategory.objects.all()
     serializer_class = TransactionCategorySerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
@@ -19,3 +23,30 @@ class TransactionCategoryViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         # Adds the user logged in to the category
         serializer.save(user=self.request.user)
+        bump_data_version(self.request.user.id)
+
+    @db_transaction.atomic
+    def perform_update(self, serializer):
+        bump_data_version(self.request.user.id)
+        # Changing the type of a category flips the sign of its transactions
+        # in the balances of their accounts
+        category_type = serializer.instance.category_type
+        if serializer.validated_data.get(
+                'category_type', category_type) == category_type:
+            serializer.save()
+            return
+
+        transactions = Transaction.objects.filter(category=serializer.instance)
+        old_balances = compute_balances(transactions)
+        serializer.save()
+        apply_balance_deltas(subtract_balances(
+            compute_balances(transactions), old_balances))
+
+    @db_transaction.atomic
+    def perform_destroy(self, instance):
+        # Deleting a category deletes its transactions and their amounts
+        balances = compute_balances(
+            Transaction.objects.filter(category=instance))
+        instance.delete()
+        apply_balance_deltas(subtract_balances({}, balances))
+        bump_data_version(self.request.user.id)
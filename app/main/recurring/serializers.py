@@ -0,0 +1,32 @@
+import datetime
+
+from rest_framework import serializers
+from core.models import Account, RecurringTransaction, TransactionCategory
+from core.recurring import parse_rule
+from core.serializers import SparseFieldsSerializerMixin, \
+    TimedSerializerMixin, UserOwnedPrimaryKeyRelatedField
+
+
+class RecurringTransactionSerializer(TimedSerializerMixin,
+                                     SparseFieldsSerializerMixin,
+                                     serializers.ModelSerializer):
+    category = UserOwnedPrimaryKeyRelatedField(
+        queryset=TransactionCategory.objects.all())
+    account = UserOwnedPrimaryKeyRelatedField(queryset=Account.objects.all())
+
+    class Meta:
+        model = RecurringTransaction
+        fields = ('id', 'amount', 'description', 'paid', 'rule',
+                  'start_date', 'category', 'account', 'materialized_until',
+                  'next_date',)
+        read_only_fields = ('id', 'materialized_until', 'next_date',)
+
+    def validate(self, attrs):
+        rule = attrs.get('rule', getattr(self.instance, 'rule', None))
+        start_date = attrs.get('start_date',
+                               getattr(self.instance, 'start_date', None))
+        try:
+            parse_rule(rule, start_date or datetime.date.today())
+        except ValueError as exc:
+            raise serializers.ValidationError({'rule': [str(exc)]})
+        return attrs
@@ -0,0 +1,221 @@
+import datetime
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.models import Account, AccountType, RecurringTransaction, \
+    Transaction, TransactionCategory, CATEGORY_TYPES
+from core.recurring import reschedule
+
+RECURRING_URL = reverse('recurring:recurring-list')
+TRANSACTIONS_PROJECTED_URL = reverse('transactions:transactions-projected')
+TRANSACTIONS_SUMMARY_URL = reverse('transactions:transactions-summary')
+
+
+def url_with_querystring(path, **kwargs):
+    return path + '?' + urlencode(kwargs)
+
+
+def get_detail_recurring_url(recurring):
+    return reverse('recurring:recurring-detail', args=(recurring.id,))
+
+
+class PrivateRecurringApiTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        self.another_user = get_user_model().objects.create_user(
+            email='another@domain.com', password='Test1234')
+        self.account = Account.objects.create(
+            name='Wallet', description='Cash', user=self.user,
+            account_type=AccountType.objects.create(name='Wallet'))
+        self.category = TransactionCategory.objects.create(
+            name='Rent', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.today = datetime.date.today()
+        self.payload = {
+            'amount': '500.00',
+            'description': 'Rent',
+            'paid': True,
+            'rule': 'FREQ=WEEKLY',
+            'start_date': (self.today
+                           - datetime.timedelta(days=14)).isoformat(),
+            'category': self.category.id,
+            'account': self.account.id,
+        }
+        self.client.force_authenticate(self.user)
+
+    def create_rule(self, user=None, **fields):
+        recurring = RecurringTransaction(**{
+            'amount': '10.00', 'description': 'Subscription',
+            'rule': 'FREQ=DAILY', 'start_date': self.today,
+            'category': self.category, 'account': self.account,
+            'user': user or self.user, 'materialized_until': self.today,
+            **fields})
+        reschedule(recurring)
+        recurring.save()
+        return recurring
+
+    def test_create_recurring_materializes_due_occurrences(self):
+        # Test the occurrences up to today are created with the rule
+        res = self.client.post(RECURRING_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['materialized_until'],
+                         self.today.isoformat())
+        self.assertEqual(res.data['next_date'], (
+            self.today + datetime.timedelta(days=7)).isoformat())
+        self.assertEqual(Transaction.objects.filter(
+            recurring_id=res.data['id'], user=self.user).count(), 3)
+        self.account.refresh_from_db()
+        self.assertEqual(str(self.account.balance), '-1500.00')
+
+    def test_create_recurring_invalid_rule(self):
+        # Test rules that aren't a daily or less frequent RRULE are rejected
+        for rule in ('FREQ=HOURLY', 'every monday', 'FREQ=WEEKLY;BYDAY=XX',
+                     'FREQ=DAILY;BYHOUR=1,2'):
+            res = self.client.post(RECURRING_URL,
+                                   {**self.payload, 'rule': rule})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('rule', res.data)
+        self.assertFalse(RecurringTransaction.objects.exists())
+
+    def test_create_recurring_category_of_another_user(self):
+        # Test the category must belong to the user
+        category = TransactionCategory.objects.create(
+            name='Rent', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.another_user)
+
+        res = self.client.post(RECURRING_URL,
+                               {**self.payload, 'category': category.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', res.data)
+
+    def test_update_recurring_keeps_created_occurrences(self):
+        # Test editing a rule only changes the next occurrences
+        res = self.client.post(RECURRING_URL, self.payload)
+        recurring = RecurringTransaction.objects.get(id=res.data['id'])
+
+        res = self.client.patch(get_detail_recurring_url(recurring),
+                                {'rule': 'FREQ=MONTHLY', 'amount': '600.00'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Transaction.objects.filter(
+            recurring=recurring).values_list('amount', flat=True).distinct()
+        ), [500])
+        recurring.refresh_from_db()
+        self.assertGreater(recurring.next_date, self.today)
+
+    def test_delete_recurring_keeps_transactions(self):
+        # Test the transactions created by a deleted rule remain
+        res = self.client.post(RECURRING_URL, self.payload)
+
+        self.client.delete(get_detail_recurring_url(
+            RecurringTransaction.objects.get(id=res.data['id'])))
+
+        self.assertEqual(Transaction.objects.filter(
+            user=self.user, recurring=None).count(), 3)
+
+    def test_retrieve_recurring_list_limited_to_user(self):
+        # Test only the rules of the user are listed
+        recurring = self.create_rule()
+        self.create_rule(user=self.another_user)
+
+        res = self.client.get(RECURRING_URL)
+
+        self.assertEqual([rule['id'] for rule in res.data], [recurring.id])
+
+    def test_projected_transactions(self):
+        # Test the next occurrences are listed by date without storing them
+        daily = self.create_rule()
+        weekly = self.create_rule(rule='FREQ=WEEKLY', amount='50.00')
+        self.create_rule(user=self.another_user)
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_PROJECTED_URL, projected_until=(
+                self.today + datetime.timedelta(days=7)).isoformat()))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        dates = [item['transaction_date'] for item in res.data]
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual(len(res.data), 8)
+        self.assertEqual([item['recurring'] for item in res.data].count(
+            weekly.id), 1)
+        self.assertEqual(res.data[0]['id'], None)
+        self.assertEqual(res.data[0]['recurring'], daily.id)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_projected_transactions_filtered(self):
+        # Test the projection takes the limit, account and date filters
+        self.create_rule()
+        other_account = Account.objects.create(
+            name='Bank', description='Bank', user=self.user,
+            account_type=self.account.account_type)
+        self.create_rule(account=other_account)
+        until = self.today + datetime.timedelta(days=30)
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_PROJECTED_URL, projected_until=until.isoformat(),
+            limit=5, account=other_account.id))
+
+        self.assertEqual(len(res.data), 5)
+        self.assertEqual({item['account'] for item in res.data},
+                         {other_account.id})
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_PROJECTED_URL, projected_until=until.isoformat(),
+            account=other_account.id, date_gt=(
+                until - datetime.timedelta(days=2)).isoformat()))
+
+        self.assertEqual([item['transaction_date'] for item in res.data], [
+            (until - datetime.timedelta(days=1)).isoformat(),
+            until.isoformat()])
+
+    def test_projected_transactions_searched(self):
+        # Test the projection keeps the rules matching the search
+        self.create_rule()
+        netflix = self.create_rule(description='Netflix monthly plan',
+                                   rule='FREQ=MONTHLY')
+        until = self.today + datetime.timedelta(days=40)
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_PROJECTED_URL, projected_until=until.isoformat(),
+            search='netflix plan'))
+
+        self.assertEqual([item['recurring'] for item in res.data],
+                         [netflix.id])
+
+    def test_projected_transactions_invalid_until(self):
+        # Test the projection needs a date less than some years ahead
+        res = self.client.get(TRANSACTIONS_PROJECTED_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_PROJECTED_URL, projected_until=self.today.replace(
+                year=self.today.year + 10).isoformat()))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('projected_until', res.data)
+
+    def test_summary_with_projected_transactions(self):
+        # Test the projected occurrences are added to the summary totals
+        res = self.client.post(RECURRING_URL, self.payload)
+        until = self.today + datetime.timedelta(days=21)
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_SUMMARY_URL, group_by='category_type',
+            projected_until=until.isoformat()))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'category_type': 'EX', 'total': '3000.00', 'count': 6}])
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_SUMMARY_URL, group_by='category_type'))
+
+        self.assertEqual(res.data, [
+            {'category_type': 'EX', 'total': '1500.00', 'count': 3}])
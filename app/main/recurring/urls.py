@@ -0,0 +1,11 @@
+from django.urls import path, include
+from main.recurring import views
+from rest_framework.routers import DefaultRouter
+
+router = DefaultRouter()
+router.register('', views.RecurringTransactionViewSet,
+                basename="recurring")
+
+urlpatterns = [
+    path('', include((router.urls, 'recurring'))),
+]
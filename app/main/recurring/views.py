@@ -0,0 +1,46 @@
+import datetime
+
+from django.db import transaction as db_transaction
+from rest_framework import viewsets
+
+from main.recurring.serializers import RecurringTransactionSerializer
+from core.models import RecurringTransaction
+from core.mixins import SparseFieldsMixin, UserDataVersionMixin
+from core.recurring import materialize_rules, reschedule
+from core.versions import bump_data_version
+from rest_framework.permissions import IsAuthenticated
+
+
+class RecurringTransactionViewSet(UserDataVersionMixin, SparseFieldsMixin,
+                                  viewsets.ModelViewSet):
+    queryset = RecurringTransaction.objects.all()
+    serializer_class = RecurringTransactionSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        # Return objects for the current authenticated user only
+        return self.queryset.filter(user=self.request.user)
+
+    @db_transaction.atomic
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+        self.schedule(serializer.instance)
+
+    @db_transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+        self.schedule(serializer.instance)
+
+    def schedule(self, recurring):
+        # Moves the rule to its next occurrence and creates the ones due
+        # already, the later ones are created by the materialize_recurring
+        # command
+        reschedule(recurring)
+        recurring.save(update_fields=['next_date'])
+        materialize_rules([recurring], datetime.date.today())
+        bump_data_version(self.request.user.id)
+
+    def perform_destroy(self, instance):
+        # The transactions created by the rule are kept
+        instance.delete()
+        bump_data_version(self.request.user.id)
@@ -0,0 +1,65 @@
+import csv
+import json
+
+from core.currencies import convert
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_FIELDS = ('id', 'amount', 'description', 'paid',
+                 'transaction_date', 'category', 'account')
+# Added when the amounts are converted to a reporting currency
+CONVERTED_EXPORT_FIELDS = EXPORT_FIELDS + ('currency', 'converted_amount')
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    # Pseudo buffer for csv.writer that returns the written line instead
+    # of keeping it
+    def write(self, value):
+        return value
+
+
+def get_export_rows(queryset, currency=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # Reads the transactions as tuples of EXPORT_FIELDS through a server
+    # side cursor, so only one chunk of rows is held in memory at a time.
+    # With a currency, the rows have the CONVERTED_EXPORT_FIELDS, converted
+    # by the query
+    columns = ['id', 'amount', 'description', 'paid', 'transaction_date',
+               'category_id', 'account_id']
+    if currency is not None:
+        queryset = queryset.annotate(converted_amount=convert(
+            'amount', 'currency', 'transaction_date', currency))
+        columns += ['currency', 'converted_amount']
+    return queryset.order_by('transaction_date', 'id').values_list(
+        *columns).iterator(chunk_size=chunk_size)
+
+
+def format_row(row):
+    # Matches the representation given by TransactionSerializer
+    (id, amount, description, paid, transaction_date, category,
+     account, *converted) = row
+    if converted:
+        currency, converted_amount = converted
+        converted = (currency, '{:.2f}'.format(converted_amount))
+    return (id, '{:.2f}'.format(amount), description, paid,
+            transaction_date.isoformat(), category, account, *converted)
+
+
+def export_csv(rows, fields=EXPORT_FIELDS):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(format_row(row))
+
+
+def export_ndjson(rows, fields=EXPORT_FIELDS):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, format_row(row)))) + '\n'
+
+
+EXPORTERS = {
+    'csv': export_csv,
+    'ndjson': export_ndjson,
+}
@@ -1,5 +1,10 @@
-from django_filters import FilterSet, DateRangeFilter, DateFilter
-from core.models import Transaction
+import datetime
+
+from django_filters import FilterSet, DateRangeFilter, DateFilter, \
+    CharFilter
+from core.models import RecurringTransaction, Transaction, \
+    TransactionDailyRollup
+from core.search import WORD_RE, search_transactions
 
 
 class CustomTransactionFilter(FilterSet):
@@ -10,6 +15,8 @@ class CustomTransactionFilter(FilterSet):
     date_lte = DateFilter(
         field_name='transaction_date', lookup_expr=('lte'))
     date_range = DateRangeFilter(field_name='transaction_date')
+    # Ranked full text search of the descriptions, see core.search
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Transaction
@@ -18,3 +25,65 @@ class CustomTransactionFilter(FilterSet):
             'category': ['exact'],
             'account': ['exact'],
         }
+
+    def filter_search(self, queryset, name, value):
+        return search_transactions(queryset, value)
+
+
+class TransactionRollupFilter(FilterSet):
+    # Same date, category and account filters as CustomTransactionFilter,
+    # applied to the daily rollups of the transactions
+    date_gte = DateFilter(field_name='day', lookup_expr=('gte'))
+    date_gt = DateFilter(field_name='day', lookup_expr=('gt'))
+    date_lt = DateFilter(field_name='day', lookup_expr=('lt'))
+    date_lte = DateFilter(field_name='day', lookup_expr=('lte'))
+    date_range = DateRangeFilter(field_name='day')
+
+    class Meta:
+        model = TransactionDailyRollup
+        fields = {
+            'category': ['exact'],
+            'account': ['exact'],
+        }
+
+
+class RecurringProjectionFilter(FilterSet):
+    # Filters the recurring rules projected with the same paid, category,
+    # account and search parameters as the transactions. The date filters
+    # bound the projected dates instead, see get_date_bounds, date_range
+    # isn't applied to projections
+    date_gte = DateFilter(method='filter_date')
+    date_gt = DateFilter(method='filter_date')
+    date_lt = DateFilter(method='filter_date')
+    date_lte = DateFilter(method='filter_date')
+    search = CharFilter(method='filter_search')
+
+    class Meta:
+        model = RecurringTransaction
+        fields = {
+            'paid': ['exact'],
+            'category': ['exact'],
+            'account': ['exact'],
+        }
+
+    def filter_date(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        # The rules are few, their descriptions are matched without index
+        for word in WORD_RE.findall(value):
+            queryset = queryset.filter(description__icontains=word)
+        return queryset
+
+    def get_date_bounds(self):
+        # Returns the (first, last) dates allowed, None when unbounded
+        data = self.form.cleaned_data
+        one_day = datetime.timedelta(days=1)
+        starts = [data.get('date_gte'),
+                  data.get('date_gt') and data['date_gt'] + one_day]
+        ends = [data.get('date_lte'),
+                data.get('date_lt') and data['date_lt'] - one_day]
+        starts = [date for date in starts if date]
+        ends = [date for date in ends if date]
+        return (max(starts) if starts else None,
+                min(ends) if ends else None)
@@ -0,0 +1,197 @@
+import csv
+import datetime
+import io
+import re
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction as db_transaction
+from django.utils.translation import gettext_lazy as _
+
+from core.models import Transaction, TransactionCategory, CATEGORY_TYPES
+from core.ledger import get_transaction_entry, record_transactions
+
+STATEMENT_FORMATS = ('csv', 'ofx')
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_ENCODING = 'utf-8'
+# Transaction.amount has 15 digits, 2 of them decimals
+MAX_AMOUNT = Decimal('1e13')
+OFX_TAG_REGEX = re.compile(r'<(/?)(\w+)>([^<\r\n]*)')
+
+
+class StatementRowError(ValueError):
+    pass
+
+
+def get_statement_format(file_name):
+    # Guesses the statement format from the file extension
+    extension = file_name.rsplit('.', 1)[-1].lower()
+    return extension if extension in STATEMENT_FORMATS else None
+
+
+def parse_csv(lines):
+    # Yields (line number, row) from a CSV with a header row containing at
+    # least the date, amount and description columns
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, {
+            key.strip().lower(): (value or '').strip()
+            for key, value in row.items() if key
+        }
+
+
+def parse_ofx(lines):
+    # Yields (line number, row) for each STMTTRN block of an OFX statement,
+    # both the SGML (v1) and XML (v2) flavours are read line by line
+    row = None
+    start_line = 0
+    for line_num, line in enumerate(lines, start=1):
+        for closing, tag, value in OFX_TAG_REGEX.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing:
+                    if row is not None:
+                        yield start_line, row
+                    row = None
+                else:
+                    row = {}
+                    start_line = line_num
+            elif row is not None and not closing and value.strip():
+                row[tag] = value.strip()
+    if row:
+        yield start_line, row
+
+
+def ofx_row_to_csv_row(row):
+    # Maps the OFX transaction tags to the CSV column names
+    return {
+        'date': row.get('DTPOSTED', '')[:8],
+        'amount': row.get('TRNAMT', ''),
+        'description': row.get('NAME') or row.get('MEMO', ''),
+        'category': '',
+    }
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ofx': lambda lines: (
+        (line_num, ofx_row_to_csv_row(row))
+        for line_num, row in parse_ofx(lines)
+    ),
+}
+
+
+class StatementImporter:
+    # Streams the rows of a bank statement into Transactions of an account,
+    # inserting them in fixed size chunks so memory doesn't grow with the
+    # size of the file. Amounts are stored positive, the sign only picks
+    # the default category when the row has no category of its own.
+    date_formats = ('%Y-%m-%d', '%Y%m%d', '%d/%m/%Y')
+
+    def __init__(self, account, income_category=None, expense_category=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        self.account = account
+        self.user = account.user
+        self.income_category = income_category
+        self.expense_category = expense_category
+        self.chunk_size = chunk_size
+        self.categories_by_name = {
+            category.name.lower(): category
+            for category in TransactionCategory.objects.filter(user=self.user)
+        }
+
+    def run(self, stream, statement_format, encoding=DEFAULT_ENCODING):
+        # Yields a progress report after each inserted chunk and a final
+        # one with done set to True. A file that can't be read ends the
+        # import with the reason in the error of the final report, the
+        # chunks inserted before stay
+        lines = io.TextIOWrapper(stream, encoding=encoding, newline='')
+        rows = PARSERS[statement_format](lines)
+        progress = {'imported': 0, 'failed': 0, 'errors': [], 'done': False}
+
+        while True:
+            try:
+                chunk = list(islice(rows, self.chunk_size))
+            except UnicodeDecodeError:
+                lines.detach()
+                yield {**progress, 'errors': [], 'done': True, 'error': _(
+                    'The file is not {} text, choose its encoding'
+                ).format(encoding)}
+                return
+            except csv.Error as exc:
+                lines.detach()
+                yield {**progress, 'errors': [], 'done': True, 'error': _(
+                    'Invalid CSV: {}').format(exc)}
+                return
+            if not chunk:
+                break
+            transactions = []
+            errors = []
+            for line_num, row in chunk:
+                try:
+                    transactions.append(self.build_transaction(row))
+                except StatementRowError as exc:
+                    errors.append({'line': line_num, 'error': str(exc)})
+            with db_transaction.atomic():
+                Transaction.objects.bulk_create(transactions)
+                record_transactions(added=[
+                    get_transaction_entry(t) for t in transactions])
+            progress = {
+                'imported': progress['imported'] + len(transactions),
+                'failed': progress['failed'] + len(errors),
+                'errors': errors,
+                'done': False,
+            }
+            yield progress
+
+        lines.detach()
+        yield {**progress, 'errors': [], 'done': True}
+
+    def build_transaction(self, row):
+        amount = self.parse_amount(row.get('amount', ''))
+        return Transaction(
+            amount=abs(amount),
+            description=row.get('description', '')[:250],
+            paid=True,
+            transaction_date=self.parse_date(row.get('date', '')),
+            category=self.get_category(row.get('category', ''), amount),
+            account=self.account,
+            currency=self.account.currency,
+            user=self.user,
+        )
+
+    def parse_amount(self, value):
+        try:
+            amount = Decimal(value.replace(',', '')).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            amount = None
+        if amount is None or not amount.is_finite() or \
+                abs(amount) >= MAX_AMOUNT:
+            raise StatementRowError(_('Invalid amount "{}"').format(value))
+        return amount
+
+    def parse_date(self, value):
+        for date_format in self.date_formats:
+            try:
+                return datetime.datetime.strptime(value, date_format).date()
+            except ValueError:
+                continue
+        raise StatementRowError(_('Invalid date "{}"').format(value))
+
+    def get_category(self, name, amount):
+        if name:
+            category = self.categories_by_name.get(name.lower())
+            if category is None:
+                raise StatementRowError(
+                    _('Unknown category "{}"').format(name))
+            return category
+
+        category = (self.income_category if amount >= 0
+                    else self.expense_category)
+        if category is None:
+            category_type = (CATEGORY_TYPES.INCOME if amount >= 0
+                             else CATEGORY_TYPES.EXPENSE)
+            raise StatementRowError(
+                _('No category given for {} rows').format(
+                    category_type.name.lower()))
+        return category
@@ -0,0 +1,84 @@
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Account, AccountType, Transaction, \
+    TransactionCategory, CATEGORY_TYPES
+from core.serializers import ValuesSerializer
+from main.transactions.serializers import TransactionSerializer
+
+
+class Command(BaseCommand):
+    help = ('Compares loading and serializing all the fields of the '
+            'transactions with a sparse fieldset and with the values_list '
+            'read path of the list action. The transactions are '
+            'created inside a transaction that is rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=10000)
+        parser.add_argument('--fields', default='id,amount,transaction_date',
+                            help='Comma separated sparse fieldset')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs of each variant, the best is kept')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        fields = options['fields'].split(',')
+        with db_transaction.atomic():
+            user = self.create_transactions(
+                options['transactions'], options['chunk_size'])
+            transactions = Transaction.objects.filter(
+                user=user).order_by('-transaction_date', '-id')
+            values_serializer = ValuesSerializer.compile(
+                TransactionSerializer())
+            variants = (
+                ('all fields', lambda: TransactionSerializer(
+                    list(transactions.all()), many=True).data),
+                (options['fields'], lambda: TransactionSerializer(
+                    list(transactions.only(*fields)), many=True,
+                    fields=fields).data),
+                ('all fields, values_list', lambda: (
+                    values_serializer.to_representation(
+                        transactions.values_list(
+                            *values_serializer.columns)))),
+            )
+
+            self.stdout.write('%-30s %10s %12s' % ('fields', 'ms', 'bytes'))
+            for name, serialize in variants:
+                timings = [self.measure(serialize)
+                           for i in range(options['repeat'])]
+                total_ms, size = min(timings)
+                self.stdout.write('%-30s %10.1f %12d' % (
+                    name, total_ms, size))
+            db_transaction.set_rollback(True)
+
+    def measure(self, serialize):
+        # Returns (ms to load and render the rows, bytes rendered)
+        start = time.perf_counter()
+        content = JSONRenderer().render(serialize())
+        return (time.perf_counter() - start) * 1000, len(content)
+
+    def create_transactions(self, count, chunk_size):
+        user = get_user_model().objects.create_user(
+            email='bench-sparse@benchmark.local', password='!')
+        account = Account.objects.create(
+            name='Bench', description='Bench', user=user,
+            account_type=AccountType.objects.create(name='Bench'))
+        category = TransactionCategory.objects.create(
+            name='Bench', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=user)
+        transactions = (
+            Transaction(amount=i % 1000, description='Bench transaction %d' % i,
+                        category=category, account=account, user=user)
+            for i in range(count)
+        )
+        while True:
+            chunk = list(islice(transactions, chunk_size))
+            if not chunk:
+                break
+            Transaction.objects.bulk_create(chunk)
+        return user
@@ -0,0 +1,67 @@
+import codecs
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Account, TransactionCategory
+from main.transactions.importers import StatementImporter, \
+    STATEMENT_FORMATS, DEFAULT_CHUNK_SIZE, DEFAULT_ENCODING, \
+    get_statement_format
+
+
+class Command(BaseCommand):
+    help = 'Imports a CSV or OFX bank statement into an account'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--account', type=int, required=True)
+        parser.add_argument('--format', choices=STATEMENT_FORMATS)
+        parser.add_argument('--income-category', type=int)
+        parser.add_argument('--expense-category', type=int)
+        parser.add_argument('--chunk-size', type=int,
+                            default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--encoding', default=DEFAULT_ENCODING)
+
+    def handle(self, *args, **options):
+        try:
+            account = Account.objects.select_related('user').get(
+                id=options['account'])
+        except Account.DoesNotExist:
+            raise CommandError('Account %s does not exist' % options['account'])
+
+        statement_format = (options['format'] or
+                            get_statement_format(options['path']))
+        if statement_format is None:
+            raise CommandError('Unable to guess the statement format')
+        try:
+            codecs.lookup(options['encoding'])
+        except LookupError:
+            raise CommandError('Unknown encoding %s' % options['encoding'])
+
+        importer = StatementImporter(
+            account,
+            income_category=self.get_category(
+                account, options['income_category']),
+            expense_category=self.get_category(
+                account, options['expense_category']),
+            chunk_size=options['chunk_size'])
+
+        with open(options['path'], 'rb') as stream:
+            for progress in importer.run(stream, statement_format,
+                                         encoding=options['encoding']):
+                for error in progress['errors']:
+                    self.stderr.write('Line %(line)s: %(error)s' % error)
+                self.stdout.write('Imported %(imported)s, failed %(failed)s'
+                                  % progress)
+                if 'error' in progress:
+                    raise CommandError(progress['error'])
+
+        self.stdout.write(self.style.SUCCESS('Statement imported'))
+
+    def get_category(self, account, category_id):
+        if category_id is None:
+            return None
+        try:
+            return TransactionCategory.objects.get(
+                id=category_id, user=account.user)
+        except TransactionCategory.DoesNotExist:
+            raise CommandError('Category %s does not exist' % category_id)
@@ -0,0 +1,126 @@
+import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+from core.search import SEARCH_RANK, filter_rank_position, is_ranked
+
+
+class TransactionCursorPagination(CursorPagination):
+    # Keyset pagination over (transaction_date, id). The cursor position
+    # holds both values, so every position is unique and the page is always
+    # fetched with a WHERE on the index instead of an OFFSET, and no COUNT(*).
+    # Search results are ordered by (rank, id) instead, best matches first
+    ordering = ('-transaction_date', '-id')
+    ranked_ordering = ('-' + SEARCH_RANK, '-id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    position_separator = '|'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ranked = is_ranked(queryset)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (reverse, current_position) = (False, None)
+        else:
+            (_, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = self.filter_position(
+                queryset, current_position, reverse)
+
+        # Always fetch an extra item to know if there is a following page
+        results = list(queryset[:self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        if is_ranked(queryset):
+            return self.ranked_ordering
+        return super().get_ordering(request, queryset, view)
+
+    def filter_position(self, queryset, position, reverse):
+        # Keeps the rows after the position in the order of the page
+        is_descending = self.ordering[0].startswith('-')
+        lookup = 'gt' if reverse == is_descending else 'lt'
+        if self.ranked:
+            rank, id_value = self.parse_rank_position(position)
+            return filter_rank_position(queryset, rank, id_value, lookup)
+        return queryset.filter(self.get_position_filter(position, lookup))
+
+    def get_position_filter(self, position, lookup):
+        # Builds the row comparison (date, id) < (d, i) as an OR of the
+        # leading column and the tie breaker, both covered by the index
+        date_value, id_value = self.parse_position(position)
+        date_field, id_field = [order.lstrip('-') for order in self.ordering]
+        return (
+            Q(**{'{}__{}'.format(date_field, lookup): date_value}) |
+            Q(**{date_field: date_value,
+                 '{}__{}'.format(id_field, lookup): id_value})
+        )
+
+    def parse_position(self, position):
+        try:
+            date_value, id_value = position.split(self.position_separator)
+            return (datetime.date.fromisoformat(date_value), int(id_value))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_rank_position(self, position):
+        try:
+            rank, id_value = position.split(self.position_separator)
+            return (float(rank), int(id_value))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(str(instance[field_name]))
+            else:
+                values.append(str(getattr(instance, field_name)))
+        return self.position_separator.join(values)
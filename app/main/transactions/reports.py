@@ -0,0 +1,128 @@
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from core.currencies import MixedCurrenciesError, convert
+
+# Columns the summary can be grouped by, as the lookup each of them is
+# read with, month is truncated from the date column of the queryset
+SUMMARY_DIMENSIONS = {
+    'month': None,
+    'category': 'category_id',
+    'account': 'account_id',
+    'category_type': 'category__category_type',
+}
+
+
+def parse_group_by(value):
+    # Reads a comma separated list of dimensions, None if any is unknown
+    if not value:
+        return list(SUMMARY_DIMENSIONS)
+    group_by = [name.strip() for name in value.split(',') if name.strip()]
+    if not group_by or any(name not in SUMMARY_DIMENSIONS
+                           for name in group_by):
+        return None
+    return group_by
+
+
+def add_currency(currencies, currency):
+    # Adds the currency of amounts added up without converting them to the
+    # set of the ones of the summary, several can't be added up
+    currencies.add(currency)
+    if len(currencies) > 1:
+        raise MixedCurrenciesError(currencies)
+
+
+def summarize(queryset, group_by, currency=None,
+              date_field='transaction_date', amount_field='amount',
+              currency_field='currency', count=Count('id'), currencies=None):
+    # Totals and counts grouped by the given dimensions, computed by the
+    # database in a single GROUP BY query, converted to the given currency
+    # while adding them up. Works over the transactions or, passing the
+    # matching columns, over their daily rollups. Without a currency the
+    # rows are also grouped by their currency and MixedCurrenciesError is
+    # raised when there are several, counting the ones already in
+    # currencies, a set shared by the summaries merged together
+    total = amount_field
+    if currency is not None:
+        total = convert(amount_field, currency_field, date_field, currency)
+    lookups = []
+    expressions = {}
+    keys = []
+    for name in group_by:
+        lookup = SUMMARY_DIMENSIONS[name]
+        if lookup is None:
+            expressions[name] = TruncMonth(date_field)
+            keys.append(name)
+        else:
+            lookups.append(lookup)
+            keys.append(lookup)
+    if currency is None:
+        lookups.append(currency_field)
+        if currencies is None:
+            currencies = set()
+
+    rows = queryset.order_by().values(*lookups, **expressions).annotate(
+        total=Sum(total),
+        count=count,
+    ).order_by(*keys)
+
+    names = {
+        lookup: name for name, lookup in SUMMARY_DIMENSIONS.items() if lookup
+    }
+    for row in rows:
+        if currency is None:
+            add_currency(currencies, row.pop(currency_field))
+        yield {names.get(key, key): value for key, value in row.items()}
+
+
+def summarize_rollups(queryset, group_by, currency=None, currencies=None):
+    # Same as summarize over TransactionDailyRollup rows
+    return summarize(queryset, group_by, currency, date_field='day',
+                     amount_field='total', currency_field='account__currency',
+                     count=Sum('count'), currencies=currencies)
+
+
+def summarize_occurrences(transactions, group_by, rates=None,
+                          currencies=None):
+    # Same rows as summarize over unsaved transactions, such as the
+    # projected occurrences of core.recurring, whose rule and category
+    # are loaded. rates maps the currencies to the factors converting them
+    # to the reporting one, applied once per group and currency. Without
+    # them the currencies are checked like in summarize
+    if rates is None and currencies is None:
+        currencies = set()
+    totals = {}
+    for transaction in transactions:
+        values = {
+            'month': transaction.transaction_date.replace(day=1),
+            'category': transaction.category_id,
+            'account': transaction.account_id,
+            'category_type': transaction.recurring.category.category_type,
+        }
+        key = (tuple(values[name] for name in group_by),
+               transaction.currency)
+        if rates is None:
+            add_currency(currencies, transaction.currency)
+        total = totals.setdefault(key, [Decimal(0), 0])
+        total[0] += transaction.amount
+        total[1] += 1
+    return merge_summaries(group_by, (
+        dict(zip(group_by, key), count=count,
+             total=total if rates is None else total * rates[currency])
+        for (key, currency), (total, count) in totals.items()
+    ))
+
+
+def merge_summaries(group_by, *summaries):
+    # Adds up the rows of several summaries with the same grouping
+    totals = {}
+    for rows in summaries:
+        for row in rows:
+            key = tuple(row[name] for name in group_by)
+            total = totals.setdefault(key, [Decimal(0), 0])
+            total[0] += row['total']
+            total[1] += row['count']
+    for key, (total, count) in sorted(totals.items()):
+        yield dict(zip(group_by, key), total=total, count=count)
@@ -1,13 +1,182 @@
+import codecs
+import datetime
+
+from django.db import transaction as db_transaction
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from core.models import Transaction
+from rest_framework.settings import api_settings
+from core.models import Transaction, TransactionCategory, Account
+from core.ledger import get_transaction_entries, record_transactions
+from core.serializers import ExpandableFieldsSerializerMixin, \
+    SparseFieldsSerializerMixin, TimedSerializerMixin, \
+    UserOwnedPrimaryKeyRelatedField
+from main.accounts.serializers import AccountSerializer
 from main.categories.serializers import TransactionCategorySerializer
+from .importers import STATEMENT_FORMATS, DEFAULT_CHUNK_SIZE, \
+    DEFAULT_ENCODING, get_statement_format
 
 
-class TransactionSerializer(serializers.ModelSerializer):
-    category = TransactionCategorySerializer
+class TransactionSerializer(TimedSerializerMixin,
+                            SparseFieldsSerializerMixin,
+                            ExpandableFieldsSerializerMixin,
+                            serializers.ModelSerializer):
+    expandable_fields = {
+        'category': TransactionCategorySerializer,
+        'account': AccountSerializer,
+    }
+    category = UserOwnedPrimaryKeyRelatedField(
+        queryset=TransactionCategory.objects.all())
+    account = UserOwnedPrimaryKeyRelatedField(queryset=Account.objects.all())
 
     class Meta:
         model = Transaction
         fields = ('id', 'amount', 'description', 'paid',
                   'transaction_date', 'category', 'account',)
         read_only_fields = ('id', )
+
+
+class TransactionBulkListSerializer(serializers.ListSerializer):
+    # Validates the whole batch with one query per related model and
+    # inserts it with a single bulk_create
+    max_items = 1000
+    default_error_messages = {
+        'max_items': _('Ensure this list has no more than {max_items} items.'),
+        'does_not_exist': _('Invalid pk "{pk_value}" - object does not exist.'),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > self.max_items:
+            message = self.error_messages['max_items'].format(
+                max_items=self.max_items)
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message]
+            }, code='max_items')
+        if not isinstance(data, list) or not data:
+            return super().to_internal_value(data)
+
+        ret = []
+        errors = []
+        for item in data:
+            try:
+                ret.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                ret.append(None)
+                errors.append(exc.detail)
+
+        self.validate_owner(ret, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return ret
+
+    def validate_owner(self, items, errors):
+        # Checks every referenced category and account belongs to the user
+        user = self.context['request'].user
+        valid_items = [item for item in items if item is not None]
+        self.category_types = dict(TransactionCategory.objects.filter(
+            user=user, id__in={item['category_id'] for item in valid_items}
+        ).values_list('id', 'category_type'))
+        self.currencies = dict(Account.objects.filter(
+            user=user, id__in={item['account_id'] for item in valid_items}
+        ).values_list('id', 'currency'))
+        owned = {
+            'category': set(self.category_types),
+            'account': set(self.currencies),
+        }
+
+        for item, item_errors in zip(items, errors):
+            if item is None:
+                continue
+            for field_name, ids in owned.items():
+                pk_value = item[field_name + '_id']
+                if pk_value not in ids:
+                    item_errors[field_name] = [
+                        self.error_messages['does_not_exist'].format(
+                            pk_value=pk_value)
+                    ]
+
+    def create(self, validated_data):
+        if not validated_data:
+            return []
+        transactions = [
+            Transaction(currency=self.currencies[item['account_id']], **item)
+            for item in validated_data
+        ]
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(transactions)
+            record_transactions(added=get_transaction_entries(
+                transactions, self.category_types))
+        return transactions
+
+
+class TransactionBulkSerializer(TransactionSerializer):
+    # Takes the related ids as plain integers, their existence and owner
+    # are checked for the whole list by TransactionBulkListSerializer
+    category = serializers.IntegerField(source='category_id')
+    account = serializers.IntegerField(source='account_id')
+
+    class Meta(TransactionSerializer.Meta):
+        list_serializer_class = TransactionBulkListSerializer
+
+
+class TransactionImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    account = UserOwnedPrimaryKeyRelatedField(queryset=Account.objects.all())
+    format = serializers.ChoiceField(choices=STATEMENT_FORMATS, required=False)
+    income_category = UserOwnedPrimaryKeyRelatedField(
+        queryset=TransactionCategory.objects.all(), required=False)
+    expense_category = UserOwnedPrimaryKeyRelatedField(
+        queryset=TransactionCategory.objects.all(), required=False)
+    chunk_size = serializers.IntegerField(
+        min_value=1, max_value=10000, default=DEFAULT_CHUNK_SIZE)
+    # Such as latin-1 or cp1252, common in the exports of banks
+    encoding = serializers.CharField(max_length=40, default=DEFAULT_ENCODING)
+
+    def validate_encoding(self, value):
+        try:
+            return codecs.lookup(value).name
+        except LookupError:
+            raise serializers.ValidationError(
+                _('Unknown encoding "{}"').format(value))
+
+    def validate(self, attrs):
+        if not attrs.get('format'):
+            attrs['format'] = get_statement_format(attrs['file'].name)
+            if attrs['format'] is None:
+                raise serializers.ValidationError(
+                    {'format': _('Unable to guess the statement format')})
+        return attrs
+
+
+class TransactionOccurrenceSerializer(TransactionSerializer):
+    # Projected occurrence of a recurring transaction, id is null as it
+    # isn't stored
+
+    class Meta(TransactionSerializer.Meta):
+        fields = TransactionSerializer.Meta.fields + ('recurring',)
+        read_only_fields = fields
+
+
+class TransactionProjectionSerializer(serializers.Serializer):
+    # Query parameters of the projection of the recurring transactions
+    max_years = 5
+    projected_until = serializers.DateField()
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+
+    def validate_projected_until(self, value):
+        today = datetime.date.today()
+        if value > today.replace(year=today.year + self.max_years, day=1):
+            raise serializers.ValidationError(_(
+                'Ensure the date is less than {max_years} years ahead.'
+            ).format(max_years=self.max_years))
+        return value
+
+
+class TransactionSummarySerializer(serializers.Serializer):
+    # Row of the transactions summary, only the grouped columns are present
+    month = serializers.DateField(required=False)
+    category = serializers.IntegerField(required=False)
+    account = serializers.IntegerField(required=False)
+    category_type = serializers.CharField(required=False)
+    total = serializers.DecimalField(max_digits=17, decimal_places=2)
+    count = serializers.IntegerField()
@@ -0,0 +1,186 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.models import Transaction, Account, AccountType, \
+    TransactionCategory, CATEGORY_TYPES
+
+IMPORT_URL = reverse('transactions:transactions-import-statement')
+
+CSV_STATEMENT = (
+    'date,amount,description,category\n'
+    '2020-08-01,1500.00,August salary,\n'
+    '2020-08-02,-35.50,Supermarket,\n'
+    '2020-08-03,-12.00,Cinema,Leisure\n'
+    '2020-08-04,abc,Broken amount,\n'
+    '2020-08-05,-3.00,Unknown category,Travel\n'
+)
+
+OFX_STATEMENT = '''OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20200810120000[-3:BRT]
+<TRNAMT>-20.00
+<NAME>Coffee shop
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20200811
+<TRNAMT>100.00
+<MEMO>Refund
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+'''
+
+
+class StatementImportTests(APITestCase):
+    # Test importing bank statements into an account
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='username@domain.com', password='Test1234')
+        self.account = Account.objects.create(
+            name='Bank', description='Bank account', user=self.user,
+            account_type=AccountType.objects.create(name='Bank'))
+        self.income_category = TransactionCategory.objects.create(
+            name='Salary', category_type=CATEGORY_TYPES.INCOME.value,
+            user=self.user)
+        self.expense_category = TransactionCategory.objects.create(
+            name='Groceries', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.leisure_category = TransactionCategory.objects.create(
+            name='Leisure', category_type=CATEGORY_TYPES.EXPENSE.value,
+            user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def post_statement(self, name, content, **extra):
+        payload = {
+            'file': SimpleUploadedFile(name, content if isinstance(
+                content, bytes) else content.encode()),
+            'account': self.account.id,
+            'income_category': self.income_category.id,
+            'expense_category': self.expense_category.id,
+            **extra
+        }
+        res = self.client.post(IMPORT_URL, payload, format='multipart')
+        if res.status_code != status.HTTP_200_OK:
+            return res, None
+        reports = [json.loads(line) for line in
+                   b''.join(res.streaming_content).splitlines()]
+        return res, reports
+
+    def test_import_csv_statement(self):
+        # Test the valid rows are imported and the invalid ones reported
+        res, reports = self.post_statement('statement.csv', CSV_STATEMENT)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(reports[-1]['done'])
+        self.assertEqual(reports[-1]['imported'], 3)
+        self.assertEqual(reports[-1]['failed'], 2)
+        self.assertEqual([e['line'] for e in reports[0]['errors']], [5, 6])
+        transactions = Transaction.objects.filter(account=self.account)
+        self.assertEqual(transactions.get(description='Supermarket').category,
+                         self.expense_category)
+        self.assertEqual(transactions.get(description='Cinema').category,
+                         self.leisure_category)
+        self.assertTrue(all(t.amount > 0 and t.user == self.user
+                            for t in transactions))
+
+    def test_import_reports_progress_per_chunk(self):
+        # Test a progress line is streamed after each chunk
+        res, reports = self.post_statement(
+            'statement.csv', CSV_STATEMENT, chunk_size=2)
+
+        self.assertEqual([r['imported'] for r in reports], [2, 3, 3, 3])
+        self.assertEqual([r['done'] for r in reports],
+                         [False, False, False, True])
+
+    def test_import_invalid_amounts(self):
+        # Test the amounts that aren't finite or too large are reported
+        res, reports = self.post_statement('statement.csv', (
+            'date,amount,description\n'
+            '2020-08-01,nan,Not a number\n'
+            '2020-08-02,-Infinity,Infinite\n'
+            '2020-08-03,1e20,Too large\n'
+            '2020-08-04,-1.00,Valid\n'))
+
+        self.assertEqual(reports[-1]['imported'], 1)
+        self.assertEqual([e['line'] for e in reports[0]['errors']],
+                         [2, 3, 4])
+
+    def test_import_statement_encoding(self):
+        # Test a file in another encoding is read with the one given, and
+        # reported in the last line otherwise
+        content = 'date,amount,description\n2020-08-01,-4.50,Café\n'
+
+        res, reports = self.post_statement('statement.csv',
+                                           content.encode('latin-1'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(reports[-1]['done'])
+        self.assertIn('error', reports[-1])
+        self.assertFalse(Transaction.objects.exists())
+
+        res, reports = self.post_statement('statement.csv',
+                                           content.encode('latin-1'),
+                                           encoding='latin-1')
+
+        self.assertNotIn('error', reports[-1])
+        self.assertEqual(reports[-1]['imported'], 1)
+        self.assertTrue(Transaction.objects.filter(
+            description='Café').exists())
+
+        res, reports = self.post_statement('statement.csv', content,
+                                           encoding='klingon')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('encoding', res.data)
+
+    def test_import_ofx_statement(self):
+        # Test importing the transactions of an OFX statement
+        res, reports = self.post_statement('statement.ofx', OFX_STATEMENT)
+
+        self.assertEqual(reports[-1]['imported'], 2)
+        refund = Transaction.objects.get(description='Refund')
+        self.assertEqual(refund.category, self.income_category)
+        self.assertEqual(str(refund.transaction_date), '2020-08-11')
+
+    def test_import_account_not_belonging_user(self):
+        # Test importing into an account of another user is rejected
+        another_user = get_user_model().objects.create_user(
+            email='another@domain.com', password='Test1234')
+        self.account.user = another_user
+        self.account.save()
+
+        res, reports = self.post_statement('statement.csv', CSV_STATEMENT)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('account', res.data)
+
+    def test_import_unknown_format(self):
+        # Test the format is required when it can't be guessed
+        res, reports = self.post_statement('statement.txt', CSV_STATEMENT)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_statement_command(self):
+        # Test importing a statement from the command line
+        with tempfile.NamedTemporaryFile('w', suffix='.csv',
+                                         delete=False) as statement:
+            statement.write(CSV_STATEMENT)
+        self.addCleanup(os.remove, statement.name)
+
+        call_command('import_statement', statement.name,
+                     account=self.account.id,
+                     income_category=self.income_category.id,
+                     expense_category=self.expense_category.id,
+                     stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.assertEqual(
+            Transaction.objects.filter(account=self.account).count(), 3)
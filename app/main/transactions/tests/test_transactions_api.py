@@ -1,14 +1,24 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from core.models import Transaction, Account, AccountType, TransactionCategory, CATEGORY_TYPES
+from core.rollups import rebuild_rollups
 from main.transactions.serializers import TransactionSerializer
 from urllib.parse import urlencode
+import csv
+import io
+import json
 import datetime
 
 TRANSACTIONS_URL = reverse('transactions:transactions-list')
+TRANSACTIONS_BULK_URL = reverse('transactions:transactions-bulk')
+TRANSACTIONS_EXPORT_URL = reverse('transactions:transactions-export')
+TRANSACTIONS_SUMMARY_URL = reverse('transactions:transactions-summary')
 
 
 def url_with_querystring(path, **kwargs):
@@ -105,13 +115,13 @@ class PrivateTransactionApiTests(APITestCase):
         }
         Transaction.objects.create(**payloadTransaction)
 
-        transactions = Transaction.objects.all()
+        transactions = Transaction.objects.order_by('-transaction_date', '-id')
         serialized_transactions = TransactionSerializer(
             transactions, many=True)
         res = self.client.get(TRANSACTIONS_URL)
-        self.assertEqual(len(res.data), 2)
+        self.assertEqual(len(res.data['results']), 2)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serialized_transactions.data)
+        self.assertEqual(res.data['results'], serialized_transactions.data)
 
     def test_create_valid_transaction_success(self):
         # Test creating transaction with valid payload is successful
@@ -125,6 +135,8 @@ class PrivateTransactionApiTests(APITestCase):
         }
         res = self.client.post(TRANSACTIONS_URL, payloadTransaction)
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        transaction = Transaction.objects.get(id=res.data['id'])
+        self.assertEqual(transaction.user, self.user)
 
     def test_not_create_transaction_with_empty_data(self):
         # Test not creating a transaction when the data is empty
@@ -168,6 +180,41 @@ class PrivateTransactionApiTests(APITestCase):
         res = self.client.post(TRANSACTIONS_URL, payloadTransaction)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_not_use_category_or_account_of_another_user(self):
+        # Test a transaction can't point at the data of another user
+        another_user = get_user_model().objects.create_user(
+            email='another@domain.com', password='Test1234')
+        another_account = Account.objects.create(
+            **{**self.payloadAccount, 'user': another_user})
+        another_category = TransactionCategory.objects.create(
+            **{**self.payloadCategory, 'user': another_user})
+        payloadTransaction = {
+            'amount': 10.0,
+            'description': 'New transaction 2',
+            'paid': True,
+            'transaction_date': self.DATE_TEST,
+            'category': self.category.id,
+            'account': self.account.id
+        }
+
+        for field, value in (('account', another_account.id),
+                             ('category', another_category.id)):
+            res = self.client.post(TRANSACTIONS_URL,
+                                   {**payloadTransaction, field: value})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, res.data)
+
+            res = self.client.patch(get_detail_transactions_url(
+                self.transaction), {field: value})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, res.data)
+
+        another_account.refresh_from_db()
+        self.assertEqual(another_account.balance, 0)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.account, self.account)
+        self.assertEqual(self.transaction.category, self.category)
+
     def test_update_transaction_success(self):
         # Test for updating transaction is successful
         payload_partial_updated = {
@@ -208,10 +255,10 @@ class PrivateTransactionApiTests(APITestCase):
 
         res = self.client.get(
             get_transactions_url_with_query_args(date_range='today'))
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
         res = self.client.get(
             get_transactions_url_with_query_args(date_gte='2020-07-01', date_lte='2020-07-31'))
-        self.assertEqual(len(res.data), len(self.DATES_PREVIOUS_MONTH))
+        self.assertEqual(len(res.data['results']), len(self.DATES_PREVIOUS_MONTH))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_retrieve_transactions_list_filtered_by_account(self):
@@ -232,10 +279,10 @@ class PrivateTransactionApiTests(APITestCase):
 
         res = self.client.get(
             get_transactions_url_with_query_args(account=self.account.id))
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
         res = self.client.get(
             get_transactions_url_with_query_args(account=another_account.id))
-        self.assertEqual(len(res.data), 3)
+        self.assertEqual(len(res.data['results']), 3)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_retrieve_transactions_list_filtered_by_category(self):
@@ -256,10 +303,10 @@ class PrivateTransactionApiTests(APITestCase):
 
         res = self.client.get(
             get_transactions_url_with_query_args(category=self.category.id))
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
         res = self.client.get(
             get_transactions_url_with_query_args(category=another_category.id))
-        self.assertEqual(len(res.data), 4)
+        self.assertEqual(len(res.data['results']), 4)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_retrieve_transactions_list_filtered_by_paid(self):
@@ -275,8 +322,450 @@ class PrivateTransactionApiTests(APITestCase):
 
         res = self.client.get(
             get_transactions_url_with_query_args(paid=True))
-        self.assertEqual(len(res.data), 3)
+        self.assertEqual(len(res.data['results']), 3)
         res = self.client.get(
             get_transactions_url_with_query_args(paid=False))
-        self.assertEqual(len(res.data), 4)
+        self.assertEqual(len(res.data['results']), 4)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_transactions_list_paginated_by_cursor(self):
+        # Test walking the transactions list page by page with the cursor
+        for dpm in self.DATES_THIS_MONTH + self.DATES_PREVIOUS_MONTH:
+            for i in range(2):
+                Transaction.objects.create(
+                    **{**self.payloadTransaction, 'transaction_date': dpm})
+
+        expected_ids = list(Transaction.objects.order_by(
+            '-transaction_date', '-id').values_list('id', flat=True))
+        received_ids = []
+        url = get_transactions_url_with_query_args(page_size=5)
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 5)
+            received_ids += [t['id'] for t in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(received_ids, expected_ids)
+
+    def test_retrieve_transactions_previous_page_by_cursor(self):
+        # Test going back from the second page returns the first page
+        for dpm in self.DATES_THIS_MONTH:
+            Transaction.objects.create(
+                **{**self.payloadTransaction, 'transaction_date': dpm})
+
+        first_page = self.client.get(
+            get_transactions_url_with_query_args(page_size=2))
+        second_page = self.client.get(first_page.data['next'])
+        res = self.client.get(second_page.data['previous'])
+
+        self.assertEqual(res.data['results'], first_page.data['results'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_retrieve_transactions_paginated_with_filters(self):
+        # Test the cursor keeps applying the date and account filters
+        for dpm in self.DATES_THIS_MONTH + self.DATES_PREVIOUS_MONTH:
+            Transaction.objects.create(
+                **{**self.payloadTransaction, 'transaction_date': dpm})
+
+        res = self.client.get(get_transactions_url_with_query_args(
+            date_gte='2020-07-01', date_lte='2020-07-31',
+            account=self.account.id, page_size=2))
+        self.assertEqual(len(res.data['results']), 2)
+        res = self.client.get(res.data['next'])
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNone(res.data['next'])
+
+    def test_invalid_cursor_not_found(self):
+        # Test a tampered cursor is rejected
+        res = self.client.get(
+            get_transactions_url_with_query_args(cursor='cD1ub3RhZGF0ZQ=='))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def get_bulk_payload(self, size):
+        return [{
+            'amount': 10.0 + i,
+            'description': 'Bulk transaction {}'.format(i),
+            'paid': True,
+            'transaction_date': self.DATE_TEST,
+            'category': self.category.id,
+            'account': self.account.id
+        } for i in range(size)]
+
+    def test_retrieve_transactions_sparse_fields(self):
+        # Test only the requested fields are serialized and loaded
+        for dpm in self.DATES_THIS_MONTH:
+            Transaction.objects.create(
+                **{**self.payloadTransaction, 'transaction_date': dpm})
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(get_transactions_url_with_query_args(
+                fields='id,amount,transaction_date', page_size=2))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for transaction in res.data['results']:
+            self.assertEqual(set(transaction),
+                             {'id', 'amount', 'transaction_date'})
+        select = [q['sql'] for q in queries.captured_queries
+                  if 'core_transaction' in q['sql']]
+        self.assertEqual(len(select), 1)
+        self.assertNotIn('description', select[0])
+
+        # The cursor still works with the trimmed rows
+        res = self.client.get(res.data['next'])
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_retrieve_transactions_exclude_fields(self):
+        # Test the excluded fields are dropped from the detail
+        res = self.client.get(
+            get_detail_transactions_url(self.transaction)
+            + '?exclude=description,paid')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {'id', 'amount', 'transaction_date',
+                                         'category', 'account'})
+
+    def test_retrieve_transactions_unknown_sparse_field(self):
+        # Test an unknown field name is rejected
+        res = self.client.get(
+            get_transactions_url_with_query_args(fields='id,password'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_retrieve_transactions_list_same_json_as_serializer(self):
+        # Test the values_list read path renders the serializer output
+        Transaction.objects.create(**{
+            **self.payloadTransaction, 'amount': '12.5', 'paid': True,
+            'description': 'Caf\u00e9 "bar"'})
+        Transaction.objects.create(**{
+            **self.payloadTransaction, 'amount': '-0.10'})
+
+        res = self.client.get(TRANSACTIONS_URL)
+        transactions = Transaction.objects.order_by('-transaction_date', '-id')
+        self.assertEqual(
+            JSONRenderer().render(res.data['results']),
+            JSONRenderer().render(
+                TransactionSerializer(transactions, many=True).data))
+
+    def test_retrieve_transactions_expanded_constant_queries(self):
+        # Test each expansion costs the same queries whatever the rows
+        for dpm in self.DATES_THIS_MONTH + self.DATES_PREVIOUS_MONTH:
+            Transaction.objects.create(
+                **{**self.payloadTransaction, 'transaction_date': dpm})
+
+        for expand in ('category', 'account', 'account.account_type',
+                       'category,account.account_type'):
+            # The data version of the user and the page of transactions
+            with self.assertNumQueries(2):
+                res = self.client.get(
+                    get_transactions_url_with_query_args(expand=expand))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data['results']), 7)
+
+    def test_retrieve_transaction_expanded_detail(self):
+        # Test the expanded relations are nested in the detail
+        res = self.client.get(
+            get_detail_transactions_url(self.transaction)
+            + '?expand=category,account.account_type')
+
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['category']['name'], 'Salary')
+        self.assertEqual(res.data['category']['category_type'],
+                         CATEGORY_TYPES.INCOME.value)
+        self.assertEqual(res.data['account']['name'], 'Transactions Account')
+        self.assertEqual(res.data['account']['account_type']['name'],
+                         'account_testing')
+
+    def test_retrieve_transactions_expanded_sparse_fields(self):
+        # Test expansions combine with a sparse fieldset
+        res = self.client.get(get_transactions_url_with_query_args(
+            fields='id,category', expand='category,account'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        transaction = res.data['results'][0]
+        self.assertEqual(set(transaction), {'id', 'category'})
+        self.assertEqual(transaction['category']['id'], self.category.id)
+
+    def test_retrieve_transactions_unknown_expand(self):
+        # Test an unknown relation is rejected
+        res = self.client.get(
+            get_transactions_url_with_query_args(expand='category.user'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('expand', res.data)
+
+    def test_search_transactions_ranked(self):
+        # Test the search matches all the words and ranks the results
+        for description in ('AMAZON MKTPLACE 1234', 'Amazon Prime',
+                            'Uber trip', 'Amazon.com books amazon'):
+            Transaction.objects.create(
+                **{**self.payloadTransaction, 'description': description})
+
+        res = self.client.get(
+            get_transactions_url_with_query_args(search='amazon'))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        descriptions = [t['description'] for t in res.data['results']]
+        self.assertEqual(sorted(descriptions), [
+            'AMAZON MKTPLACE 1234', 'Amazon Prime',
+            'Amazon.com books amazon'])
+        self.assertEqual(descriptions[0], 'Amazon.com books amazon')
+        self.assertIsNone(res.data['next'])
+
+        res = self.client.get(
+            get_transactions_url_with_query_args(search='amaz prim'))
+        self.assertEqual([t['description'] for t in res.data['results']],
+                         ['Amazon Prime'])
+
+    def test_search_transactions_paginated_by_rank(self):
+        # Test the ranked results are paged by cursor, in both directions
+        for i in range(7):
+            Transaction.objects.create(**{
+                **self.payloadTransaction,
+                'description': 'Amazon ' + ' amazon' * (i % 3)})
+        ranked = [t['id'] for t in self.client.get(
+            get_transactions_url_with_query_args(search='amazon')
+        ).data['results']]
+
+        pages = []
+        url = get_transactions_url_with_query_args(search='amazon',
+                                                   page_size=3)
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([t['id'] for t in res.data['results']])
+            url = res.data['next']
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), ranked)
+        res = self.client.get(res.data['previous'])
+        self.assertEqual([t['id'] for t in res.data['results']], pages[1])
+
+    def test_search_transactions_with_filters(self):
+        # Test the search combines with the other filters
+        other_account = Account.objects.create(
+            **{**self.payloadAccount, 'name': 'Other account'})
+        Transaction.objects.create(**{
+            **self.payloadTransaction, 'description': 'Amazon Prime',
+            'account': other_account})
+        old = Transaction.objects.create(**{
+            **self.payloadTransaction, 'description': 'Amazon Prime',
+            'transaction_date': '2020-07-05'})
+
+        res = self.client.get(get_transactions_url_with_query_args(
+            search='amazon', account=self.account.id, date_lt='2020-08-01'))
+        self.assertEqual([t['id'] for t in res.data['results']], [old.id])
+
+    def test_search_trigram_contains_lookup(self):
+        # Test the lookup of the Postgres search matches like icontains,
+        # compiled as the ILIKE served by the trigram index
+        Transaction.objects.create(**{
+            **self.payloadTransaction, 'description': 'AMAZON 100%_off'})
+        queryset = Transaction.objects.filter(
+            description__trigram_contains='amazon 100%_')
+
+        self.assertEqual(queryset.count(), 1)
+        self.assertFalse(Transaction.objects.filter(
+            description__trigram_contains='100%x').exists())
+        if connection.vendor == 'postgresql':
+            self.assertIn('"description" ILIKE', str(queryset.query))
+
+    def test_search_follows_description_changes(self):
+        # Test edited and deleted transactions are searched as they are
+        self.client.patch(get_detail_transactions_url(self.transaction),
+                          {'description': 'Netflix subscription'})
+
+        res = self.client.get(
+            get_transactions_url_with_query_args(search='netflix'))
+        self.assertEqual([t['id'] for t in res.data['results']],
+                         [self.transaction.id])
+
+        self.client.delete(get_detail_transactions_url(self.transaction))
+        res = self.client.get(
+            get_transactions_url_with_query_args(search='netflix'))
+        self.assertEqual(res.data['results'], [])
+
+    def test_bulk_create_transactions_success(self):
+        # Test creating a list of transactions in a single request
+        payload = self.get_bulk_payload(5)
+        res = self.client.post(TRANSACTIONS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 5)
+        created = Transaction.objects.filter(
+            description__startswith='Bulk transaction')
+        self.assertEqual(created.count(), 5)
+        self.assertTrue(all(t.user == self.user for t in created))
+
+    def test_bulk_create_transactions_constant_queries(self):
+        # Test the number of queries doesn't grow with the number of items
+        self.client.post(TRANSACTIONS_BULK_URL,
+                         self.get_bulk_payload(1), format='json')
+        with CaptureQueriesContext(connection) as few_queries:
+            self.client.post(TRANSACTIONS_BULK_URL,
+                             self.get_bulk_payload(3), format='json')
+        with CaptureQueriesContext(connection) as many_queries:
+            self.client.post(TRANSACTIONS_BULK_URL,
+                             self.get_bulk_payload(60), format='json')
+
+        self.assertEqual(len(few_queries), len(many_queries))
+
+    def test_bulk_create_transactions_errors_per_item(self):
+        # Test the errors are reported for each item and nothing is created
+        another_user = get_user_model().objects.create_user(
+            email='another@domain.com', password='Test1234')
+        another_category = TransactionCategory.objects.create(
+            **{**self.payloadCategory, 'user': another_user})
+        payload = self.get_bulk_payload(3)
+        payload[1]['category'] = another_category.id
+        payload[2]['amount'] = ''
+
+        res = self.client.post(TRANSACTIONS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('category', res.data[1])
+        self.assertIn('amount', res.data[2])
+        self.assertFalse(Transaction.objects.filter(
+            description__startswith='Bulk transaction').exists())
+
+    def test_bulk_create_transactions_empty_list(self):
+        # Test an empty list creates nothing
+        res = self.client.post(TRANSACTIONS_BULK_URL, [], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, [])
+
+    def test_bulk_create_transactions_not_a_list(self):
+        # Test the bulk endpoint only accepts a list
+        res = self.client.post(TRANSACTIONS_BULK_URL,
+                               self.get_bulk_payload(1)[0], format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_transactions_csv(self):
+        # Test exporting the transactions as CSV
+        res = self.client.get(TRANSACTIONS_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['amount'], '200.00')
+        self.assertEqual(rows[0]['transaction_date'], self.DATE_TEST)
+
+    def test_export_transactions_ndjson_filtered(self):
+        # Test exporting as JSON lines with the same filters as the list
+        for dpm in self.DATES_PREVIOUS_MONTH:
+            Transaction.objects.create(
+                **{**self.payloadTransaction, 'transaction_date': dpm})
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_EXPORT_URL, export_format='ndjson',
+            date_gte='2020-07-01', date_lte='2020-07-31'))
+
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        exported = [json.loads(line) for line in lines]
+        self.assertEqual(len(exported), len(self.DATES_PREVIOUS_MONTH))
+        serialized = TransactionSerializer(
+            Transaction.objects.get(id=exported[0]['id'])).data
+        self.assertEqual(exported[0], json.loads(json.dumps(serialized)))
+
+    def test_export_transactions_wrong_format(self):
+        # Test an unknown export format is rejected
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_EXPORT_URL, export_format='xml'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_summary_grouped_by_month_and_type(self):
+        # Test the summary totals are grouped in the database
+        expense_category = TransactionCategory.objects.create(
+            **{**self.payloadCategory, 'name': 'Food',
+               'category_type': CATEGORY_TYPES.EXPENSE.value})
+        for dpm in self.DATES_PREVIOUS_MONTH:
+            Transaction.objects.create(**{
+                **self.payloadTransaction, 'transaction_date': dpm,
+                'category': expense_category, 'amount': 10})
+        rebuild_rollups(self.user)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url_with_querystring(
+                TRANSACTIONS_SUMMARY_URL, group_by='month,category_type'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'month': '2020-07-01', 'category_type': 'EX',
+             'total': '30.00', 'count': 3},
+            {'month': '2020-08-01', 'category_type': 'IN',
+             'total': '200.00', 'count': 1},
+        ])
+
+    def test_summary_honours_filters(self):
+        # Test the summary only includes the filtered transactions
+        for dpm in self.DATES_PREVIOUS_MONTH:
+            Transaction.objects.create(
+                **{**self.payloadTransaction, 'transaction_date': dpm})
+        rebuild_rollups(self.user)
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_SUMMARY_URL, date_lte='2020-07-31'))
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]['month'], '2020-07-01')
+        self.assertEqual(res.data[0]['category'], self.category.id)
+        self.assertEqual(res.data[0]['account'], self.account.id)
+        self.assertEqual(res.data[0]['total'], '600.00')
+
+    def test_summary_filtered_by_paid(self):
+        # Test filtering by payment state reads the transactions
+        Transaction.objects.create(**{**self.payloadTransaction, 'paid': True})
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_SUMMARY_URL, paid=True, group_by='account'))
+
+        self.assertEqual(res.data, [
+            {'account': self.account.id, 'total': '200.00', 'count': 1}])
+
+    def test_summary_filtered_by_search(self):
+        # Test the search reads the transactions, the rollups don't keep the
+        # descriptions
+        for description in ('Amazon Prime', 'AMAZON MKTPLACE', 'Uber trip'):
+            Transaction.objects.create(**{
+                **self.payloadTransaction, 'description': description,
+                'amount': 10})
+        rebuild_rollups(self.user)
+
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_SUMMARY_URL, search='amazon', group_by='account'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'account': self.account.id, 'total': '20.00', 'count': 2}])
+
+    def test_summary_wrong_group_by(self):
+        # Test grouping by an unknown column is rejected
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_SUMMARY_URL, group_by='description'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_summary_mixed_currencies(self):
+        # Test amounts in several currencies aren't added up without a
+        # currency to convert them to
+        euro_account = Account.objects.create(
+            **{**self.payloadAccount, 'name': 'Euros', 'currency': 'EUR'})
+        Transaction.objects.create(**{
+            **self.payloadTransaction, 'account': euro_account})
+        rebuild_rollups(self.user)
+
+        for params in ({'group_by': 'month'}, {'group_by': 'category_type'},
+                       {'group_by': 'month', 'paid': False}):
+            res = self.client.get(url_with_querystring(
+                TRANSACTIONS_SUMMARY_URL, **params))
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('EUR, USD', res.data['currency'][0])
+
+        # Each account has a single currency
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_SUMMARY_URL, group_by='account'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(url_with_querystring(
+            TRANSACTIONS_SUMMARY_URL, group_by='month',
+            account=euro_account.id))
+        self.assertEqual(res.data, [
+            {'month': '2020-08-01', 'total': '200.00', 'count': 1}])
@@ -1,23 +1,201 @@
-from rest_framework import viewsets
+import json
+from itertools import islice
 
-from .serializers import TransactionSerializer
-from core.models import Transaction
-from rest_framework.authentication import TokenAuthentication
+from django.db import transaction as db_transaction
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+
+from .serializers import TransactionSerializer, TransactionBulkSerializer, \
+    TransactionImportSerializer, TransactionOccurrenceSerializer, \
+    TransactionProjectionSerializer, TransactionSummarySerializer
+from .importers import StatementImporter
+from .exporters import CONVERTED_EXPORT_FIELDS, EXPORTERS, EXPORT_FIELDS, \
+    EXPORT_FORMATS, get_export_rows
+from .reports import SUMMARY_DIMENSIONS, merge_summaries, parse_group_by, \
+    summarize, summarize_occurrences, summarize_rollups
+from core.models import RecurringTransaction, Transaction, \
+    TransactionDailyRollup
+from core.mixins import ExpandFieldsMixin, ReportingCurrencyMixin, \
+    SparseFieldsMixin, UserDataVersionMixin, ValuesListMixin
+from core.currencies import check_rates, get_latest_rates
+from core.ledger import get_transaction_entry, record_transactions
+from core.recurring import project_occurrences
 from rest_framework.permissions import IsAuthenticated
-from .filters import CustomTransactionFilter
+from django_filters.utils import translate_validation
+from .filters import CustomTransactionFilter, RecurringProjectionFilter, \
+    TransactionRollupFilter
+from .pagination import TransactionCursorPagination
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(UserDataVersionMixin, SparseFieldsMixin,
+                         ExpandFieldsMixin, ValuesListMixin,
+                         ReportingCurrencyMixin, viewsets.ModelViewSet):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
-    authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     filterset_class = CustomTransactionFilter
+    pagination_class = TransactionCursorPagination
+    # Read by the pagination to build the cursors
+    sparse_required_fields = ('transaction_date',)
 
     def get_queryset(self):
         # Return objects for the current authenticated user only
-        return self.queryset.filter(category__user=self.request.user)
+        return self.queryset.filter(user=self.request.user)
+
+    @db_transaction.atomic
+    def perform_create(self, serializer):
+        # Adds the user logged in to the transaction
+        transaction = serializer.save(user=self.request.user)
+        record_transactions(added=[get_transaction_entry(transaction)])
+
+    @db_transaction.atomic
+    def perform_update(self, serializer):
+        old_entry = get_transaction_entry(serializer.instance)
+        transaction = serializer.save()
+        record_transactions(added=[get_transaction_entry(transaction)],
+                            removed=[old_entry])
+
+    @db_transaction.atomic
+    def perform_destroy(self, instance):
+        entry = get_transaction_entry(instance)
+        instance.delete()
+        record_transactions(removed=[entry])
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        # Creates all the transactions of a list in a single request
+        serializer = TransactionBulkSerializer(
+            data=request.data, many=True,
+            context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=self.request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=(MultiPartParser,))
+    def import_statement(self, request):
+        # Imports a bank statement into an account, the response streams
+        # one JSON line with the progress after each inserted chunk
+        serializer = TransactionImportSerializer(
+            data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        importer = StatementImporter(
+            data['account'],
+            income_category=data.get('income_category'),
+            expense_category=data.get('expense_category'),
+            chunk_size=data['chunk_size'])
+        progress = importer.run(data['file'], data['format'],
+                                encoding=data['encoding'])
+        return StreamingHttpResponse(
+            (json.dumps(report) + '\n' for report in progress),
+            content_type='application/x-ndjson')
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # Streams the filtered transactions as CSV or newline delimited JSON,
+        # with their amounts converted to the currency given if any
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORTERS:
+            raise ValidationError({'export_format': [
+                'Choose one of: {}'.format(', '.join(EXPORTERS))]})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        currency = self.get_reporting_currency()
+        fields = EXPORT_FIELDS
+        if currency is not None:
+            # Checked before streaming, the status can't change later
+            check_rates(queryset, 'currency', 'transaction_date', currency)
+            fields = CONVERTED_EXPORT_FIELDS
+        rows = get_export_rows(queryset, currency)
+        response = StreamingHttpResponse(
+            EXPORTERS[export_format](rows, fields),
+            content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = \
+            'attachment; filename="transactions.{}"'.format(export_format)
+        return response
+
+    def get_rollup_queryset(self):
+        # Daily rollups of the user filtered like the transactions
+        filterset = TransactionRollupFilter(
+            self.request.query_params,
+            queryset=TransactionDailyRollup.objects.filter(
+                user=self.request.user),
+            request=self.request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        # Totals of the filtered transactions grouped by month, category,
+        # account and type, or by the ones given in group_by, converted to
+        # the currency given if any
+        group_by = parse_group_by(request.query_params.get('group_by'))
+        if group_by is None:
+            raise ValidationError({'group_by': [
+                'Choose from: {}'.format(', '.join(SUMMARY_DIMENSIONS))]})
+
+        currency = self.get_reporting_currency()
+        # Currencies of the amounts added up without converting them
+        currencies = set()
+        if {'paid', 'search'} & set(request.query_params):
+            # The rollups don't split by payment state or description
+            queryset = self.filter_queryset(self.get_queryset())
+            if currency is not None:
+                check_rates(queryset, 'currency', 'transaction_date',
+                            currency)
+            rows = summarize(queryset, group_by, currency,
+                             currencies=currencies)
+        else:
+            queryset = self.get_rollup_queryset()
+            if currency is not None:
+                check_rates(queryset, 'account__currency', 'day', currency)
+            rows = summarize_rollups(queryset, group_by, currency,
+                                     currencies=currencies)
+        if 'projected_until' in request.query_params:
+            # Adds the occurrences of the recurring transactions not
+            # created yet
+            projection = TransactionProjectionSerializer(
+                data=request.query_params)
+            projection.is_valid(raise_exception=True)
+            # The future rates aren't known, the latest ones are used
+            rates = None if currency is None else get_latest_rates(currency)
+            rows = merge_summaries(group_by, rows, summarize_occurrences(
+                self.get_projection(
+                    projection.validated_data['projected_until']),
+                group_by, rates, currencies))
+        serializer = TransactionSummarySerializer(rows, many=True)
+        return Response(serializer.data)
+
+    def get_projection(self, until):
+        # Occurrences of the recurring transactions of the user not created
+        # yet up to the given date, filtered like the transactions
+        filterset = RecurringProjectionFilter(
+            self.request.query_params,
+            queryset=RecurringTransaction.objects.filter(
+                user=self.request.user).select_related(
+                    'category', 'account'),
+            request=self.request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        start, end = filterset.get_date_bounds()
+        return project_occurrences(
+            filterset.qs, until if end is None else min(end, until), start)
 
-    # def perform_create(self, serializer):
-    #     # Adds the user logged in to the category
-    #     serializer.save(user=self.request.user)
+    @action(detail=False, methods=['get'])
+    def projected(self, request):
+        # Lists the next occurrences of the recurring transactions up to
+        # projected_until by date, computed on the fly without storing them
+        projection = TransactionProjectionSerializer(data=request.query_params)
+        projection.is_valid(raise_exception=True)
+        transactions = islice(
+            self.get_projection(projection.validated_data['projected_until']),
+            projection.validated_data['limit'])
+        serializer = TransactionOccurrenceSerializer(transactions, many=True)
+        return Response(serializer.data)
@@ -0,0 +1,62 @@
+import random
+import statistics
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.test import Client
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = ('Measures the Google login latency while the users table grows. '
+            'The users are created inside a transaction that is rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000,1000000',
+                            help='Comma separated number of users to reach')
+        parser.add_argument('--logins', type=int, default=200,
+                            help='Logins measured at each size')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        random.seed(options['seed'])
+        client = Client()
+        url = reverse('user:token')
+
+        self.stdout.write('%10s %10s %10s %10s' % (
+            'users', 'p50 ms', 'p95 ms', 'max ms'))
+        with db_transaction.atomic():
+            created = 0
+            for size in sizes:
+                self.create_users(created, size, options['chunk_size'])
+                created = size
+                timings = []
+                for i in range(options['logins']):
+                    id_google = 'bench-%d' % random.randrange(created)
+                    start = time.perf_counter()
+                    res = client.post(url, {'id_google': id_google})
+                    timings.append((time.perf_counter() - start) * 1000)
+                    assert res.status_code == 200, res.content
+                timings.sort()
+                self.stdout.write('%10d %10.2f %10.2f %10.2f' % (
+                    size, statistics.median(timings),
+                    timings[int(len(timings) * 0.95) - 1], timings[-1]))
+            db_transaction.set_rollback(True)
+
+    def create_users(self, start, end, chunk_size):
+        User = get_user_model()
+        users = (
+            User(email='bench-%d@benchmark.local' % i, name='Bench %d' % i,
+                 id_google='bench-%d' % i, password='!')
+            for i in range(start, end)
+        )
+        while True:
+            chunk = list(islice(users, chunk_size))
+            if not chunk:
+                break
+            User.objects.bulk_create(chunk)
@@ -32,13 +32,15 @@ class AuthTokenSerializer(serializers.Serializer):
     def validate(self, attrs):
         id_google = attrs.get('id_google')
 
-        user = get_user_model().objects.filter(
+        # Single lookup on the unique index, the token comes in the same
+        # query when the user already has one
+        user = get_user_model().objects.select_related('auth_token').filter(
             id_google=id_google
-        )
+        ).first()
 
-        if not user:
+        if user is None or not user.is_active:
             msg = _('Unable to authenticate with provided credentials')
             raise serializers.ValidationError(msg, code='authentication')
 
-        attrs['user'] = user[0]
+        attrs['user'] = user
         return attrs
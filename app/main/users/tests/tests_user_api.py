@@ -2,6 +2,7 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
@@ -17,7 +18,7 @@ class PublicUserApiTests(TestCase):
         self.payloadUser = {
             'email': 'username@domain.com', 'password': 'Test1234'}
         self.user = get_user_model().objects.create_user(
-            **self.payloadUser
+            **self.payloadUser, id_google='google-id-1'
         )
 
     def test_create_valid_user_success(self):
@@ -54,20 +55,42 @@ class PublicUserApiTests(TestCase):
 
     def test_create_token_successful(self):
         # Test creating a token for an existing user
-        payload = {
-            'email': self.payloadUser['email'],
-            'password': self.payloadUser['password'],
-        }
+        payload = {'id_google': self.user.id_google}
 
         res = self.client.post(TOKEN_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn('token', res.data)
 
+    def test_create_token_existing_token_single_query(self):
+        # Test the login of a user with a token is a single indexed lookup
+        token = Token.objects.create(user=self.user)
+        payload = {'id_google': self.user.id_google}
+
+        with self.assertNumQueries(1):
+            res = self.client.post(TOKEN_URL, payload)
+        self.assertEqual(res.data['token'], token.key)
+
+    def test_create_token_inactive_user(self):
+        # Test that token is not created for a deactivated user
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(TOKEN_URL, {'id_google': self.user.id_google})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_users_without_google_id_allowed(self):
+        # Test many users can be created without a google id
+        user = get_user_model().objects.create_user(
+            email='nogoogle@domain.com', password='Test1234', id_google='')
+        another_user = get_user_model().objects.create_user(
+            email='nogoogle2@domain.com', password='Test1234')
+        self.assertIsNone(user.id_google)
+        self.assertIsNone(another_user.id_google)
+
     def test_create_token_invalid_credentials(self):
         # Test that token is not created for invalid credentials
         payload = {
-            'email': self.payloadUser['email'],
-            'password': 'invalidpassword',
+            'id_google': 'invalid-google-id',
         }
 
         res = self.client.post(TOKEN_URL, payload)
@@ -1,6 +1,7 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
 from main.users.serializers import UserSerializer, AuthTokenSerializer
@@ -25,11 +26,22 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data,
+                                           context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        try:
+            # Already loaded by the serializer lookup
+            token = user.auth_token
+        except Token.DoesNotExist:
+            token, created = Token.objects.get_or_create(user=user)
+        return Response({'token': token.key})
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     # Create a new user in the system
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):